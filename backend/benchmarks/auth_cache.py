@@ -0,0 +1,199 @@
+"""
+Auth Cache Benchmark
+--------------------
+Cost of checking a Firebase ID token in middleware/auth.py, with real RS256
+verification through firebase_admin against a local stand-in for Google's
+signing-cert endpoint:
+
+  cold               first verification after start: cert fetch + RSA
+  cold, prefetched   the same after _CertRefresher.refresh() has filled
+                     firebase_admin's cert cache (what the lifespan does)
+  verify per request every request runs verify_id_token() (token cache off)
+  token cache        repeated requests with the same token (the default)
+
+    python -m benchmarks.auth_cache [--requests 2000] [--cert-latency 0.08]
+
+Tokens are minted with a throwaway RSA key whose certificate the local
+endpoint serves with `Cache-Control: max-age`, as Google does. Reported per
+path: p50 / p95 latency and cert-endpoint fetches.
+"""
+
+import argparse
+import datetime
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+from benchmarks.standins import _init_fake_firebase
+
+PROJECT_ID = "benchmark"
+KID = "bench-key"
+
+
+# ── Signing key and cert endpoint ──────────────────────────────────────────────
+def _key_and_cert():
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "benchmark")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(1).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    )
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class _CertServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, cert_pem: str, latency: float) -> None:
+        self.body = json.dumps({KID: cert_pem}).encode()
+        self.latency = latency
+        self.fetches = 0
+        super().__init__(("127.0.0.1", 0), _CertHandler)
+
+
+class _CertHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.server.fetches += 1
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "public, max-age=3600")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _mint(signer, uid: str) -> str:
+    from google.auth import jwt
+
+    now = int(time.time())
+    return jwt.encode(signer, {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "auth_time": now,
+        "iat": now,
+        "exp": now + 3600,
+    }).decode()
+
+
+# ── Paths ──────────────────────────────────────────────────────────────────────
+def _fresh_cert_cache(url: str) -> None:
+    """A new firebase_admin cert transport (empty HTTP cache) reading `url`."""
+    from firebase_admin import _token_gen, auth
+
+    verifier = auth._get_client(None)._token_verifier
+    verifier.request = _token_gen.CertificateFetchRequest(verifier.request.timeout_seconds)
+    verifier.id_token_verifier.cert_url = url
+
+
+def _timed(fn: Callable[[], object], runs: int) -> List[float]:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cold-runs", type=int, default=20)
+    parser.add_argument("--cert-latency", type=float, default=0.08, help="seconds per cert fetch")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    from google.auth import crypt
+
+    from middleware import auth as auth_middleware
+
+    _init_fake_firebase()
+    key_pem, cert_pem = _key_and_cert()
+    signer = crypt.RSASigner.from_string(key_pem, key_id=KID)
+    server = _CertServer(cert_pem, args.cert_latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/certs"
+    cache = auth_middleware._token_cache
+    token = _mint(signer, "bench-user")
+
+    def verify() -> None:
+        auth_middleware._verify_token(token)
+
+    def cold() -> None:
+        _fresh_cert_cache(url)
+        cache._entries.clear()
+        verify()
+
+    def cold_prefetched() -> float:
+        _fresh_cert_cache(url)
+        cache._entries.clear()
+        auth_middleware._CertRefresher().refresh()
+        start = time.perf_counter()
+        verify()
+        return time.perf_counter() - start
+
+    def uncached() -> None:
+        cache._entries.clear()
+        verify()
+
+    results: List[Dict[str, object]] = []
+
+    def record(name: str, latencies: List[float], fetches_before: int, runs: int) -> None:
+        results.append({
+            "path": name,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "cert_fetches_per_request": (server.fetches - fetches_before) / runs,
+        })
+
+    before = server.fetches
+    record("cold", _timed(cold, args.cold_runs), before, args.cold_runs)
+
+    before = server.fetches
+    prefetched = sorted(cold_prefetched() * 1000 for _ in range(args.cold_runs))
+    # The prefetch happens before the first request, so it is not charged to it
+    record("cold, prefetched", prefetched, before + args.cold_runs, args.cold_runs)
+
+    _fresh_cert_cache(url)
+    verify()
+    before = server.fetches
+    record("verify per request", _timed(uncached, args.requests), before, args.requests)
+
+    cache._entries.clear()
+    verify()
+    before = server.fetches
+    record("token cache", _timed(verify, args.requests), before, args.requests)
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"cert endpoint latency {args.cert_latency}s, {args.requests} requests per warm path")
+    print(f"{'path':<19} {'p50 ms':>8} {'p95 ms':>8} {'cert fetches/req':>17}")
+    for r in results:
+        print(
+            f"{r['path']:<19} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f}"
+            f" {r['cert_fetches_per_request']:>17.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
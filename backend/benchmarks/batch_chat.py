@@ -0,0 +1,164 @@
+"""
+Batch Chat Benchmark
+--------------------
+Answers the same set of questions about one session three ways:
+
+  sequential   one answer_query() after another (a client looping over
+               POST /api/chat)
+  concurrent   answer_query() for every question, CHAT_BATCH_CONCURRENCY at
+               a time (a client with a worker pool)
+  batch        answer_batch() – POST /api/chat/batch
+
+    python -m benchmarks.batch_chat [--queries 100] [--concurrency 8]
+                                    [--llm-latency 0.3] [--embed-latency 0.05]
+
+Runs in process with the numpy vector store, the offline stand-ins for
+Gemini (benchmarks/standins.py) and the answer cache off. Reported: wall
+time, questions per second and embedding API calls per mode.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="batch-chat-bench-")
+for key, value in {
+    "VECTOR_BACKEND": "numpy",
+    "NUMPY_STORE_DIR": os.path.join(_TMP, "vectors"),
+    "SPARSE_INDEX_PATH": os.path.join(_TMP, "sparse.sqlite3"),
+    "EMBEDDING_CACHE_PATH": os.path.join(_TMP, "embeddings.sqlite3"),
+    "SESSION_DB_PATH": os.path.join(_TMP, "sessions.sqlite3"),
+    "ANSWER_CACHE_BACKEND": "none",
+}.items():
+    os.environ.setdefault(key, value)
+
+import argparse
+import asyncio
+import json
+import shutil
+import time
+from typing import List
+
+from langchain_core.documents import Document
+
+from benchmarks.retrieval import FIXTURES
+from benchmarks.standins import FakeChatModel, SlowHashEmbeddings
+from services.chat_service import answer_batch, answer_query
+from services.chunking import chunk_documents
+from services.clients import close_registry, get_registry
+from services.embedding_cache import CachedEmbeddings, content_hash, get_embedding_store
+from services.vectorstore import collection_for, index_chunks
+
+SESSION_ID = "bench-batch"
+
+
+async def _index(fixtures: dict) -> List[str]:
+    chunks = chunk_documents([
+        Document(page_content=d["text"], metadata={"source": d["source"]})
+        for d in fixtures["documents"]
+    ])
+    for chunk in chunks:
+        chunk.metadata["chunk_hash"] = content_hash(chunk.page_content)
+    await index_chunks(SESSION_ID, chunks)
+    return [c.page_content for c in chunks]
+
+
+def _questions(fixtures: dict, count: int) -> List[str]:
+    # Distinct texts, so neither the embedding cache nor batch dedup hides work
+    base = [q["query"] for q in fixtures["queries"]]
+    return [f"{base[i % len(base)]} (variant {i // len(base)})" for i in range(count)]
+
+
+async def sequential(queries: List[str], concurrency: int) -> None:
+    for query in queries:
+        await answer_query(query, SESSION_ID)
+
+
+async def concurrent(queries: List[str], concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(query: str) -> None:
+        async with slots:
+            await answer_query(query, SESSION_ID)
+
+    await asyncio.gather(*(one(q) for q in queries))
+
+
+async def batch(queries: List[str], concurrency: int) -> None:
+    async for _, outcome in answer_batch(queries, SESSION_ID, concurrency):
+        if isinstance(outcome, Exception):
+            raise outcome
+
+
+MODES = {"sequential": sequential, "concurrent": concurrent, "batch": batch}
+
+
+async def run(args) -> List[dict]:
+    with open(args.fixtures) as fh:
+        fixtures = json.load(fh)
+    registry = get_registry()
+    registry._llm = FakeChatModel(
+        first_token_latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )
+    registry._embeddings = CachedEmbeddings(
+        SlowHashEmbeddings(), store=get_embedding_store(), namespace="index",
+    )
+    texts = await _index(fixtures)
+
+    results = []
+    for name, mode in MODES.items():
+        # Fresh cache namespace per mode, so every mode embeds its own queries;
+        # chunk vectors (reranking) are cached up front, as after indexing
+        base = SlowHashEmbeddings(args.embed_latency)
+        registry._embeddings = CachedEmbeddings(base, store=get_embedding_store(), namespace=name)
+        registry._embeddings.embed_documents(texts)
+        # The cached store handle holds the previous embeddings
+        registry.drop_vectorstore(collection_for(SESSION_ID))
+        base.calls = 0
+        queries = _questions(fixtures, args.queries)
+        start = time.perf_counter()
+        await mode(queries, args.concurrency)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "mode": name,
+            "seconds": elapsed,
+            "queries_per_s": len(queries) / elapsed,
+            "embed_calls": base.calls,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per answer, to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embedding call")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        close_registry()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{args.queries} questions, concurrency {args.concurrency}, "
+        f"LLM {args.llm_latency}s + {args.answer_tokens} tokens, embeddings {args.embed_latency}s/call"
+    )
+    print(f"{'mode':<11} {'seconds':>8} {'q/s':>7} {'embed calls':>12} {'speed-up':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<11} {r['seconds']:>8.2f} {r['queries_per_s']:>7.1f}"
+            f" {r['embed_calls']:>12} {results[0]['seconds'] / r['seconds']:>8.1f}×"
+        )
+
+
+if __name__ == "__main__":
+    main()
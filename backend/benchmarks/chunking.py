@@ -0,0 +1,145 @@
+"""
+Chunking Benchmark
+------------------
+Compares the previous fixed splitter (1000 characters, 200 overlap) with the
+structure-aware token chunker (services/chunking.py):
+
+  chunks, embedded tokens and embedding cost on a synthetic catalog of
+  headed sections, paragraphs and price tables (--pages pages), and
+  recall@k of dense retrieval on the fixture set in fixtures/retrieval.json
+
+    python -m benchmarks.chunking [--pages 500] [--k 3] [--usd-per-mtok 0.15]
+
+Retrieval uses the offline hashed embeddings from benchmarks.retrieval, so
+recall is comparable between runs, not an absolute quality figure.
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.retrieval import FIXTURES, SESSION_ID, HashEmbeddings, _recalled
+from services.chunking import chunk_documents
+from services.numpy_store import NumpyVectorStore
+from services.tokens import count_tokens
+
+Chunker = Callable[[List[Document]], List[Document]]
+
+_WORDS = (
+    "return refund exchange warranty shipping delivery order blender jar espresso "
+    "store credit receipt carrier freight assembly discount clearance loyalty"
+).split()
+
+
+def _fixed(documents: List[Document]) -> List[Document]:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return splitter.split_documents(documents)
+
+
+def _structured(documents: List[Document]) -> List[Document]:
+    return chunk_documents(documents)
+
+
+STRATEGIES: Dict[str, Chunker] = {
+    "fixed 1000/200 chars": _fixed,
+    "structure-aware tokens": _structured,
+}
+
+
+def _catalog(pages: int, rng: random.Random) -> List[Document]:
+    def sentence() -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    docs = []
+    for page in range(pages):
+        parts = [f"{page + 1}. {rng.choice(_WORDS).title()} {rng.choice(_WORDS)}"]
+        for _ in range(rng.randint(2, 4)):
+            parts.append(" ".join(sentence() for _ in range(rng.randint(2, 8))))
+        if page % 3 == 0:
+            rows = [f"SKU-{page}-{r} | {rng.choice(_WORDS)} | {rng.uniform(1, 500):.2f}" for r in range(40)]
+            parts.append("SKU | Name | Price\n" + "\n".join(rows))
+        docs.append(Document(page_content="\n\n".join(parts), metadata={"page": page}))
+    return docs
+
+
+def _cost(chunker: Chunker, documents: List[Document], usd_per_mtok: float) -> dict:
+    start = time.perf_counter()
+    chunks = chunker(documents)
+    elapsed = time.perf_counter() - start
+    tokens = sum(count_tokens(c.page_content) for c in chunks)
+    return {
+        "chunks": len(chunks),
+        "embedded_tokens": tokens,
+        "usd": tokens / 1e6 * usd_per_mtok,
+        "chunk_s": elapsed,
+    }
+
+
+def _recall(chunker: Chunker, fixtures: dict, k: int) -> dict:
+    documents = [
+        Document(page_content=d["text"], metadata={"source": d["source"], "session_id": SESSION_ID})
+        for d in fixtures["documents"]
+    ]
+    chunks = chunker(documents)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(tmp, HashEmbeddings())
+        store.add_documents(chunks)
+        retriever = store.as_retriever(search_kwargs={"k": k, "filter": {"session_id": SESSION_ID}})
+        hits, tokens = 0, 0
+        for q in fixtures["queries"]:
+            docs = retriever.invoke(q["query"])
+            hits += _recalled(q["relevant"], docs)
+            tokens += sum(count_tokens(d.page_content) for d in docs)
+    return {
+        "recall": hits / len(fixtures["queries"]),
+        "context_tokens": tokens / len(fixtures["queries"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--usd-per-mtok", type=float, default=0.15, help="embedding price per 1M tokens")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as fh:
+        fixtures = json.load(fh)
+    catalog = _catalog(args.pages, random.Random(0))
+
+    results = [
+        {
+            "strategy": name,
+            **_cost(chunker, catalog, args.usd_per_mtok),
+            **_recall(chunker, fixtures, args.k),
+        }
+        for name, chunker in STRATEGIES.items()
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    source_tokens = sum(count_tokens(d.page_content) for d in catalog)
+    print(f"{args.pages} pages, {source_tokens} source tokens; {len(fixtures['queries'])} queries, k={args.k}")
+    print(
+        f"{'strategy':<24} {'chunks':>7} {'tokens':>9} {'overhead':>8} {'USD':>8}"
+        f" {'chunk s':>8} {'recall@k':>8} {'ctx tok':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['strategy']:<24} {r['chunks']:>7} {r['embedded_tokens']:>9}"
+            f" {r['embedded_tokens'] / source_tokens - 1:>8.1%} {r['usd']:>8.4f}"
+            f" {r['chunk_s']:>8.2f} {r['recall']:>8.2f} {r['context_tokens']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Client Pooling Benchmark
+------------------------
+Per-request client construction – what get_vectorstore() and _build_llm()
+did before services/clients.py – against the pooled ClientRegistry, on a
+local Chroma server standing in for Chroma Cloud:
+
+  per-request  new Chroma HttpClient, Gemini embeddings, Chroma wrapper and
+               Gemini chat model for every request, then one
+               session-filtered similarity search
+  pooled       the same search through one registry (clients and
+               collection handle built once)
+
+    python -m benchmarks.clients [--requests 200] [--levels 1,8]
+                                 [--chroma-url http://localhost:8000]
+
+Without --chroma-url a `chroma run` server is started on a free port in a
+temporary directory. Query vectors come from the offline hash embeddings,
+so Gemini is never called; constructing its clients is still paid on the
+per-request path.
+"""
+
+import os
+
+# Gemini clients are built (never called) on both paths
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import argparse
+import json
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+
+from benchmarks.retrieval import FIXTURES, SESSION_ID, HashEmbeddings, _load_chunks
+from core.config import CHAT_MODEL, EMBEDDING_MODEL
+from services.clients import ClientRegistry
+
+COLLECTION = "benchmark_clients"
+
+_SERVER = (
+    "import sys; from chromadb.cli.cli import app; "
+    "sys.argv = ['chroma', 'run', '--path', sys.argv[1], '--port', sys.argv[2]]; app()"
+)
+
+
+# ── Chroma server ──────────────────────────────────────────────────────────────
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(path: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _SERVER, path, str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://localhost:{port}"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(url + "/api/v2/heartbeat", timeout=1)
+            return proc, url
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Chroma server did not start")
+
+
+# ── Paths ──────────────────────────────────────────────────────────────────────
+def _http_client(url: str):
+    import chromadb
+
+    parsed = urlparse(url)
+    return chromadb.HttpClient(host=parsed.hostname, port=parsed.port or 8000)
+
+
+def per_request(url: str) -> Callable[[str], List[Document]]:
+    from langchain_chroma import Chroma
+    from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
+    def search(query: str) -> List[Document]:
+        GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key="benchmark")
+        store = Chroma(
+            client=_http_client(url), collection_name=COLLECTION,
+            embedding_function=HashEmbeddings(),
+        )
+        ChatGoogleGenerativeAI(model=CHAT_MODEL, google_api_key="benchmark")
+        return store.similarity_search(query, k=3, filter={"session_id": SESSION_ID})
+
+    return search
+
+
+def pooled(registry: ClientRegistry) -> Callable[[str], List[Document]]:
+    def search(query: str) -> List[Document]:
+        store = registry.vectorstore(COLLECTION)
+        registry.llm
+        return store.similarity_search(query, k=3, filter={"session_id": SESSION_ID})
+
+    return search
+
+
+def _measure(search: Callable[[str], List[Document]], queries: List[str],
+             requests: int, concurrency: int) -> dict:
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        search(queries[i % len(queries)])
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "requests_per_s": requests / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--levels", default="1,8", help="concurrent requests")
+    parser.add_argument("--chroma-url", help="use a running Chroma server")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as fh:
+        fixtures = json.load(fh)
+    queries = [q["query"] for q in fixtures["queries"]]
+
+    tmp = tempfile.mkdtemp(prefix="clients-bench-")
+    server = None
+    try:
+        url = args.chroma_url
+        if url is None:
+            server, url = _start_server(os.path.join(tmp, "chroma"))
+        registry = ClientRegistry()
+        registry._chroma = _http_client(url)
+        registry._embeddings = HashEmbeddings()
+        registry.vectorstore(COLLECTION).add_documents(_load_chunks(fixtures, 1, 400, 100))
+
+        results = []
+        for level in [int(n) for n in args.levels.split(",")]:
+            for name, search in (("per-request", per_request(url)), ("pooled", pooled(registry))):
+                search(queries[0])  # import and connect outside the timing
+                results.append({
+                    "path": name, "concurrency": level,
+                    **_measure(search, queries, args.requests, level),
+                })
+        registry._chroma.delete_collection(COLLECTION)
+        registry.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} searches per run against {url}")
+    print(f"{'path':<12} {'conc':>5} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8}")
+    for r in results:
+        print(
+            f"{r['path']:<12} {r['concurrency']:>5} {r['p50_ms']:>8.2f}"
+            f" {r['p95_ms']:>8.2f} {r['requests_per_s']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
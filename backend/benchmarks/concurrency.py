@@ -0,0 +1,150 @@
+"""
+Concurrency Benchmark
+---------------------
+Requests per second as in-flight chat requests grow, for the two ways a
+handler can run the RAG pipeline on the event loop:
+
+  blocking  retriever.invoke / llm.invoke called inside the coroutine –
+            what the chat handler did before the service layer went async
+  async     await answer_query() (ainvoke all the way down)
+
+    python -m benchmarks.concurrency [--levels 1,4,16,64] [--requests 64]
+                                     [--llm-latency 0.3] [--embed-latency 0.05]
+
+Runs in process with the numpy vector store, the offline stand-ins for
+Gemini (benchmarks/standins.py) and the answer cache off. Every request
+asks a distinct question, so the embedding cache never answers for the API.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="concurrency-bench-")
+for key, value in {
+    "VECTOR_BACKEND": "numpy",
+    "NUMPY_STORE_DIR": os.path.join(_TMP, "vectors"),
+    "SPARSE_INDEX_PATH": os.path.join(_TMP, "sparse.sqlite3"),
+    "EMBEDDING_CACHE_PATH": os.path.join(_TMP, "embeddings.sqlite3"),
+    "SESSION_DB_PATH": os.path.join(_TMP, "sessions.sqlite3"),
+    "ANSWER_CACHE_BACKEND": "none",
+}.items():
+    os.environ.setdefault(key, value)
+
+import argparse
+import asyncio
+import itertools
+import json
+import shutil
+import time
+from typing import List
+
+from langchain_core.documents import Document
+
+from benchmarks.retrieval import FIXTURES
+from benchmarks.standins import FakeChatModel, SlowHashEmbeddings
+from services.chat_service import _build_prompt, answer_query
+from services.chunking import chunk_documents
+from services.clients import close_registry, get_registry
+from services.embedding_cache import CachedEmbeddings, content_hash, get_embedding_store
+from services.vectorstore import collection_for, get_session_retriever, index_chunks
+
+SESSION_ID = "bench-concurrency"
+_serial = itertools.count()
+
+
+async def _index(fixtures: dict) -> List[str]:
+    chunks = chunk_documents([
+        Document(page_content=d["text"], metadata={"source": d["source"]})
+        for d in fixtures["documents"]
+    ])
+    for chunk in chunks:
+        chunk.metadata["chunk_hash"] = content_hash(chunk.page_content)
+    await index_chunks(SESSION_ID, chunks)
+    return [c.page_content for c in chunks]
+
+
+async def blocking(query: str) -> None:
+    docs = get_session_retriever(SESSION_ID).invoke(query)
+    prompt, _, _ = _build_prompt(query, docs)
+    get_registry().llm.invoke(prompt)
+
+
+async def non_blocking(query: str) -> None:
+    await answer_query(query, SESSION_ID)
+
+
+MODES = {"blocking": blocking, "async": non_blocking}
+
+
+async def _level(handler, queries: List[str], in_flight: int, requests: int) -> float:
+    pending = iter(range(requests))
+
+    async def client() -> None:
+        for _ in pending:
+            n = next(_serial)
+            await handler(f"{queries[n % len(queries)]} (request {n})")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(in_flight)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run(args) -> List[dict]:
+    with open(args.fixtures) as fh:
+        fixtures = json.load(fh)
+    registry = get_registry()
+    registry._llm = FakeChatModel(
+        first_token_latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )
+    registry._embeddings = CachedEmbeddings(
+        SlowHashEmbeddings(args.embed_latency), store=get_embedding_store(), namespace="bench",
+    )
+    texts = await _index(fixtures)
+    registry._embeddings.embed_documents(texts)
+    registry.drop_vectorstore(collection_for(SESSION_ID))
+    queries = [q["query"] for q in fixtures["queries"]]
+
+    results = []
+    for level in args.levels:
+        row = {"in_flight": level}
+        for name, handler in MODES.items():
+            # Blocking handlers serialise, so a handful of requests shows it
+            requests = max(level, args.requests) if name == "async" else max(level, 8)
+            row[name] = await _level(handler, queries, level, requests)
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--levels", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=64, help="requests per async level")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embedding call")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    args.levels = [int(n) for n in args.levels.split(",")]
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        close_registry()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"requests/s by in-flight requests (LLM {args.llm_latency}s + {args.answer_tokens} tokens)")
+    print(f"{'in flight':>9} {'blocking':>9} {'async':>9} {'speed-up':>9}")
+    for r in results:
+        print(
+            f"{r['in_flight']:>9} {r['blocking']:>9.2f} {r['async']:>9.2f}"
+            f" {r['async'] / r['blocking']:>8.1f}×"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Embedding Scheduler Benchmark
+-----------------------------
+Indexes the same chunks through EmbeddingScheduler (services/vectorstore.py)
+against a fake embedding API that enforces a quota – chunks per second,
+with one second of burst – and answers 429 when it is exceeded:
+
+  unthrottled  EMBED_CONCURRENCY batches at once, no rate limit, no retries
+               (how a burst of uploads hit the API before the scheduler)
+  retry only   the same, with exponential backoff on 429
+  sequential   one batch at a time, rate limit at the quota, with backoff
+  scheduled    EMBED_CONCURRENCY batches, rate limit at the quota, backoff
+
+    python -m benchmarks.embedding_scheduler [--chunks 2000] [--quota 200]
+                                             [--latency 0.5] [--batch 64]
+
+Reported per configuration: outcome, wall time, chunks/s, API calls and
+429 responses. Vectors are deterministic hashes stored in a temporary
+numpy store, so only the API behaviour is simulated.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+from benchmarks.retrieval import HashEmbeddings
+from core.config import EMBED_CONCURRENCY
+from services.numpy_store import NumpyVectorStore
+from services.vectorstore import EmbeddingRetriesExhausted, EmbeddingScheduler
+
+SESSION_ID = "bench-scheduler"
+
+
+class TooManyRequests(Exception):
+    status_code = 429
+
+
+class QuotaEmbeddings(HashEmbeddings):
+    """Fake embedding API: fixed latency per call and a chunks/s quota."""
+
+    def __init__(self, quota: float, latency: float) -> None:
+        super().__init__()
+        self.quota = quota
+        self.latency = latency
+        self.calls = 0
+        self.rejected = 0
+        self._allowance = quota
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _admit(self, count: int) -> bool:
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            self._allowance = min(self.quota, self._allowance + (now - self._updated) * self.quota)
+            self._updated = now
+            if self._allowance < count:
+                self.rejected += 1
+                return False
+            self._allowance -= count
+            return True
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        if not self._admit(len(texts)):
+            raise TooManyRequests("429 RESOURCE_EXHAUSTED: quota exceeded")
+        return super().embed_documents(texts)
+
+
+def _chunks(count: int) -> List[Document]:
+    return [
+        Document(
+            page_content=f"Chunk {i}: store policy paragraph about item {i % 97} and order {i}.",
+            metadata={"session_id": SESSION_ID, "source": "benchmark.txt"},
+        )
+        for i in range(count)
+    ]
+
+
+def _configurations(args) -> Dict[str, dict]:
+    common = {"batch_size": args.batch, "backoff_base": args.backoff_base}
+    return {
+        "unthrottled": {**common, "concurrency": EMBED_CONCURRENCY, "rate_limit": 0, "max_retries": 0},
+        "retry only":  {**common, "concurrency": EMBED_CONCURRENCY, "rate_limit": 0},
+        "sequential":  {**common, "concurrency": 1, "rate_limit": args.quota},
+        "scheduled":   {**common, "concurrency": EMBED_CONCURRENCY, "rate_limit": args.quota},
+    }
+
+
+async def _run(name: str, settings: dict, args) -> dict:
+    api = QuotaEmbeddings(args.quota, args.latency)
+    docs = _chunks(args.chunks)
+    ids = [f"{SESSION_ID}-{i}" for i in range(len(docs))]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(tmp, api)
+        start = time.perf_counter()
+        try:
+            done = await EmbeddingScheduler(**settings).run(store, docs, ids)
+            outcome = "ok"
+        except EmbeddingRetriesExhausted as exc:
+            done, outcome = exc.done, "failed"
+        except TooManyRequests:
+            done, outcome = store.total_count(), "failed"
+        elapsed = time.perf_counter() - start
+    return {
+        "configuration": name,
+        "outcome": outcome,
+        "indexed": done,
+        "seconds": elapsed,
+        "chunks_per_s": done / elapsed,
+        "api_calls": api.calls,
+        "rejected_429": api.rejected,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--quota", type=float, default=200, help="API quota, chunks per second")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per API call")
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--backoff-base", type=float, default=0.5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    # One warning per retry would bury the table
+    logging.getLogger("services.vectorstore").setLevel(logging.ERROR)
+
+    results = [
+        asyncio.run(_run(name, settings, args))
+        for name, settings in _configurations(args).items()
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{args.chunks} chunks in batches of {args.batch}; API quota {args.quota:g} chunks/s,"
+        f" {args.latency}s per call"
+    )
+    print(f"{'configuration':<13} {'outcome':>7} {'indexed':>8} {'seconds':>8} {'chunks/s':>9} {'calls':>6} {'429s':>5}")
+    for r in results:
+        print(
+            f"{r['configuration']:<13} {r['outcome']:>7} {r['indexed']:>8} {r['seconds']:>8.2f}"
+            f" {r['chunks_per_s']:>9.1f} {r['api_calls']:>6} {r['rejected_429']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
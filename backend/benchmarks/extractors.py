@@ -0,0 +1,180 @@
+"""
+Extractor Throughput Benchmark
+------------------------------
+Generates a synthetic retail file per format and measures end-to-end
+parsing + chunking throughput through stream_chunks() (process pool
+included, embedding excluded).
+
+    python -m benchmarks.extractors [--mb 20] [--formats csv,xlsx,...] [--pdf file.pdf]
+
+PDFs cannot be generated without an extra dependency; pass an existing one
+with --pdf to include it.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import zipfile
+from typing import Callable, Dict, Optional
+
+from services.document_processor import shutdown_executor, stream_chunks
+
+_WORDS = (
+    "return refund exchange warranty shipping delivery order blender jar espresso "
+    "store credit receipt carrier freight assembly discount clearance loyalty"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+
+def _product(rng: random.Random, i: int) -> dict:
+    return {
+        "sku": f"SKU-{i:06d}",
+        "name": f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS)}",
+        "price": round(rng.uniform(1, 500), 2),
+        "stock": rng.randint(0, 1000),
+        "description": _sentence(rng),
+    }
+
+
+def _fill(fh, size: int, write_one: Callable[[int], None]) -> None:
+    i = 0
+    while fh.tell() < size:
+        for _ in range(100):
+            write_one(i)
+            i += 1
+
+
+def make_txt(path: str, size: int, rng: random.Random) -> None:
+    with open(path, "w") as fh:
+        _fill(fh, size, lambda i: fh.write(_sentence(rng) + ("\n\n" if i % 5 == 4 else " ")))
+
+
+def make_html(path: str, size: int, rng: random.Random) -> None:
+    with open(path, "w") as fh:
+        fh.write("<html><body>")
+        _fill(fh, size, lambda i: fh.write(
+            f"<h2>Section {i}</h2><p>{_sentence(rng)}</p>" if i % 2 else
+            f"<table><tr><th>SKU</th><th>Price</th></tr><tr><td>SKU-{i}</td><td>{i}</td></tr></table>"
+        ))
+        fh.write("</body></html>")
+
+
+def make_csv(path: str, size: int, rng: random.Random) -> None:
+    with open(path, "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(_product(rng, 0)))
+        writer.writeheader()
+        _fill(fh, size, lambda i: writer.writerow(_product(rng, i)))
+
+
+def make_jsonl(path: str, size: int, rng: random.Random) -> None:
+    with open(path, "w") as fh:
+        _fill(fh, size, lambda i: fh.write(json.dumps(_product(rng, i)) + "\n"))
+
+
+def make_json(path: str, size: int, rng: random.Random) -> None:
+    # ~190 bytes per record
+    records = [_product(rng, i) for i in range(max(1, size // 190))]
+    with open(path, "w") as fh:
+        json.dump({"generated": "benchmark", "products": records}, fh)
+
+
+def make_xlsx(path: str, size: int, rng: random.Random) -> None:
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Prices")
+    fields = list(_product(rng, 0))
+    sheet.append(fields)
+    # Compressed, so sized by rows (~190 bytes of cell text each) rather than bytes
+    for i in range(max(1, size // 190)):
+        product = _product(rng, i)
+        sheet.append([product[f] for f in fields])
+    workbook.save(path)
+
+
+def make_docx(path: str, size: int, rng: random.Random) -> None:
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    parts = []
+    written = 0
+    i = 0
+    while written < size:
+        if i % 10 == 9:
+            rows = "".join(
+                f"<w:tr><w:tc><w:p><w:r><w:t>SKU-{i}-{r}</w:t></w:r></w:p></w:tc>"
+                f"<w:tc><w:p><w:r><w:t>{r * 3}</w:t></w:r></w:p></w:tc></w:tr>"
+                for r in range(20)
+            )
+            block = f"<w:tbl>{rows}</w:tbl>"
+        else:
+            block = f"<w:p><w:r><w:t>{_sentence(rng)}</w:t></w:r></w:p>"
+        parts.append(block)
+        written += len(block)
+        i += 1
+    xml = f'<w:document xmlns:w="{w}"><w:body>{"".join(parts)}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", xml)
+
+
+GENERATORS: Dict[str, Callable[[str, int, random.Random], None]] = {
+    "txt": make_txt, "html": make_html, "docx": make_docx, "csv": make_csv,
+    "xlsx": make_xlsx, "json": make_json, "jsonl": make_jsonl,
+}
+
+
+async def measure(path: str, filename: str) -> dict:
+    start = time.perf_counter()
+    units = chunks = 0
+    async for count, batch in stream_chunks(path, filename):
+        units += count
+        chunks += len(batch)
+    elapsed = time.perf_counter() - start
+    mb = os.path.getsize(path) / 1e6
+    return {
+        "format": os.path.splitext(filename)[1].lstrip("."),
+        "mb": round(mb, 1),
+        "seconds": round(elapsed, 2),
+        "mb_per_s": round(mb / elapsed, 2),
+        "units_per_s": round(units / elapsed),
+        "chunks_per_s": round(chunks / elapsed),
+    }
+
+
+async def run(formats, size: int, pdf: Optional[str]) -> None:
+    rng = random.Random(0)
+    print(f"{'format':<7} {'MB':>6} {'s':>7} {'MB/s':>7} {'units/s':>9} {'chunks/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = []
+        for fmt in formats:
+            path = os.path.join(tmp, f"bench.{fmt}")
+            GENERATORS[fmt](path, size, rng)
+            targets.append((path, f"bench.{fmt}"))
+        if pdf:
+            targets.append((pdf, os.path.basename(pdf)))
+        for path, filename in targets:
+            r = await measure(path, filename)
+            print(
+                f"{r['format']:<7} {r['mb']:>6} {r['seconds']:>7} {r['mb_per_s']:>7}"
+                f" {r['units_per_s']:>9} {r['chunks_per_s']:>9}"
+            )
+    shutdown_executor()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=20, help="target size per generated file")
+    parser.add_argument("--formats", default=",".join(GENERATORS))
+    parser.add_argument("--pdf", help="existing PDF to include")
+    args = parser.parse_args()
+    formats = [f for f in args.formats.split(",") if f in GENERATORS]
+    asyncio.run(run(formats, int(args.mb * 1e6), args.pdf))
+
+
+if __name__ == "__main__":
+    main()
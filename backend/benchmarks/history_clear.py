@@ -0,0 +1,146 @@
+"""
+History Clear Benchmark
+-----------------------
+Deletes a large chat history (100k messages by default) through
+clear_history(), against the InMemoryFirestore stand-in:
+
+  sequential   HISTORY_CLEAR_PARALLEL=1: one batch commit in flight
+  parallel     the configured HISTORY_CLEAR_PARALLEL, run as a background
+               job (start_clear_job) and polled through get_clear_job as
+               GET /api/chat/history/clear/{job_id} does
+  interrupted  the same job with Firestore going down mid-clear: the job
+               must report failed, the cached window must be dropped rather
+               than emptied, and a second clear must remove the rest
+
+    python -m benchmarks.history_clear [--messages 100000] [--latency 0.02]
+
+Reported per scenario: messages deleted and left, seconds, messages/s, the
+final job status with the number of status polls, and whether the cached
+window was emptied (success) or dropped (failure).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from benchmarks.standins import InMemoryFirestore, Unavailable
+from services import chat_history
+
+USER = "bench-user"
+
+
+def _seed(firestore: InMemoryFirestore, messages: int) -> None:
+    base = datetime.now(timezone.utc).timestamp()
+    for i in range(messages):
+        firestore.docs[("chat_sessions", USER, "messages", f"m{i:07d}")] = {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "timestamp": datetime.fromtimestamp(base + i, timezone.utc),
+        }
+
+
+def _left(firestore: InMemoryFirestore) -> int:
+    return sum(1 for path in firestore.docs if path[:3] == ("chat_sessions", USER, "messages"))
+
+
+def _warm_cache() -> None:
+    chat_history._history_cache.load(USER, [{"id": "cached", "content": "hi"}], complete=False)
+
+
+def _cache_state() -> str:
+    entry = chat_history._history_cache.get(USER)
+    if entry is None:
+        return "dropped"
+    return "kept" if entry[0] else "emptied"
+
+
+async def _poll(job_id: str) -> dict:
+    polls, seen = 0, set()
+    while True:
+        await asyncio.sleep(0.25)
+        try:
+            job = await chat_history.get_clear_job(job_id)
+        except Unavailable:
+            continue
+        polls += 1
+        seen.add(job["deleted"])
+        if job["status"] != "running":
+            return {"job": job["status"], "polls": polls, "progress_seen": len(seen)}
+
+
+async def _run(firestore: InMemoryFirestore, messages: int, parallel: int, job: bool,
+               outage_after: float = 0.0) -> dict:
+    chat_history._db = lambda: firestore
+    chat_history.HISTORY_CLEAR_PARALLEL = parallel
+    _seed(firestore, messages)
+    _warm_cache()
+
+    start = time.perf_counter()
+    row = {}
+    if job:
+        if outage_after:
+            asyncio.get_running_loop().call_later(outage_after, firestore.outage, 2.0)
+        started = await chat_history.start_clear_job(USER)
+        row = await _poll(started["id"])
+    else:
+        await chat_history.clear_history(USER)
+    elapsed = time.perf_counter() - start
+
+    left = _left(firestore)
+    row.update({
+        "parallel": parallel,
+        "deleted": messages - left,
+        "left": left,
+        "seconds": elapsed,
+        "per_s": (messages - left) / elapsed,
+        "cache": _cache_state(),
+    })
+    if outage_after:
+        await asyncio.sleep(2.0)
+        await chat_history.clear_history(USER)
+        row["left_after_retry"] = _left(firestore)
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Firestore round trip")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    # The interrupted clear logs its traceback; the table says it all
+    logging.getLogger("services.chat_history").setLevel(logging.CRITICAL)
+
+    parallel = chat_history.HISTORY_CLEAR_PARALLEL
+    results = []
+    for name, workers, job, outage_after in (
+        ("sequential", 1, False, 0.0),
+        ("parallel", parallel, True, 0.0),
+        ("interrupted", parallel, True, 1.0),
+    ):
+        row = asyncio.run(_run(InMemoryFirestore(args.latency), args.messages, workers, job, outage_after))
+        results.append({"scenario": name, **row})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.messages} messages, Firestore round trip {args.latency * 1000:g} ms")
+    print(
+        f"{'scenario':<11} {'parallel':>8} {'deleted':>8} {'left':>7} {'seconds':>8}"
+        f" {'msgs/s':>8} {'job':>7} {'polls':>6} {'cache':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<11} {r['parallel']:>8} {r['deleted']:>8} {r['left']:>7}"
+            f" {r['seconds']:>8.1f} {r['per_s']:>8.0f}"
+            f" {r.get('job', '-'):>7} {r.get('polls', '-'):>6} {r['cache']:>8}"
+        )
+    r = results[-1]
+    print(f"interrupted: {r['left_after_retry']} message(s) left after clearing again")
+
+
+if __name__ == "__main__":
+    main()
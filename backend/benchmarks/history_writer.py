@@ -0,0 +1,161 @@
+"""
+History Writer Benchmark
+------------------------
+Checks that the chat-history write-behind buffer loses no message across a
+Firestore outage, against the InMemoryFirestore stand-in:
+
+  outage    messages are saved at a steady rate while Firestore is down for
+            a few seconds; the flusher keeps retrying, the bounded queue
+            fills and save_message falls back to (failing) direct writes
+  shutdown  the process stops while Firestore is still down; unflushed
+            messages are spilled to HISTORY_SPILL_DIR and re-sent by the
+            next writer to start
+
+    python -m benchmarks.history_writer [--messages 3000] [--outage 3]
+                                        [--queue-max 500]
+
+Reported per scenario: messages accepted (save_message returned), rejected
+(save_message raised, so the caller saw the failure), persisted, lost
+(accepted but never persisted – must be 0) and seconds until the buffer
+drained after Firestore came back.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="history-writer-bench-")
+os.environ.setdefault("HISTORY_SPILL_DIR", os.path.join(_TMP, "spill"))
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import time
+from typing import List
+
+from benchmarks.standins import InMemoryFirestore
+from services import chat_history
+
+USERS = 50
+
+
+class _Counts:
+    def __init__(self) -> None:
+        self.accepted: List[str] = []
+        self.rejected = 0
+
+
+async def _save(counts: _Counts, messages: int, rate: float) -> None:
+    async def one(i: int) -> None:
+        try:
+            doc_id = await chat_history.save_message(f"user{i % USERS}", "user", f"message {i}")
+            counts.accepted.append(doc_id)
+        except Exception:
+            counts.rejected += 1
+
+    tasks = []
+    for i in range(messages):
+        tasks.append(asyncio.create_task(one(i)))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+
+
+def _persisted(firestore: InMemoryFirestore) -> set:
+    return {path[-1] for path in firestore.docs if path[-2] == "messages"}
+
+
+async def _drained(timeout: float = 60.0) -> float:
+    start = time.perf_counter()
+    while chat_history._buffer._pending or not chat_history._buffer._queue.empty():
+        if time.perf_counter() - start > timeout:
+            break
+        await asyncio.sleep(0.05)
+    return time.perf_counter() - start
+
+
+def _row(name: str, counts: _Counts, firestore: InMemoryFirestore, drain_s: float) -> dict:
+    persisted = _persisted(firestore)
+    return {
+        "scenario": name,
+        "accepted": len(counts.accepted),
+        "rejected": counts.rejected,
+        "persisted": len(persisted),
+        "lost": sum(doc_id not in persisted for doc_id in counts.accepted),
+        "drain_s": drain_s,
+    }
+
+
+async def outage(args) -> dict:
+    firestore = InMemoryFirestore(args.latency)
+    chat_history._db = lambda: firestore
+    await chat_history.start_history_writer()
+    counts = _Counts()
+    firestore.outage(args.outage)
+    await _save(counts, args.messages, args.rate)
+    drain_s = await _drained()
+    await chat_history.stop_history_writer()
+    return _row("outage", counts, firestore, drain_s)
+
+
+async def shutdown(args) -> dict:
+    firestore = InMemoryFirestore(args.latency)
+    chat_history._db = lambda: firestore
+    await chat_history.start_history_writer()
+    counts = _Counts()
+    firestore.outage(3600)
+    await _save(counts, min(args.messages, args.queue_max), args.rate)
+    await chat_history.stop_history_writer()
+    spilled = sum(
+        sum(1 for _ in open(os.path.join(chat_history.HISTORY_SPILL_DIR, name)))
+        for name in os.listdir(chat_history.HISTORY_SPILL_DIR)
+    )
+
+    firestore.outage(0)
+    await chat_history.start_history_writer()
+    drain_s = await _drained()
+    await chat_history.stop_history_writer()
+    row = _row("shutdown", counts, firestore, drain_s)
+    row["spilled"] = spilled
+    row["spill_files_left"] = len(os.listdir(chat_history.HISTORY_SPILL_DIR))
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=3000)
+    parser.add_argument("--rate", type=float, default=500, help="messages saved per second")
+    parser.add_argument("--outage", type=float, default=3, help="seconds Firestore is down")
+    parser.add_argument("--queue-max", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds per Firestore round trip")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    # Every failed attempt and the spill are logged; the table says it all
+    logging.getLogger("services.chat_history").setLevel(logging.CRITICAL)
+
+    chat_history.HISTORY_QUEUE_MAX = args.queue_max
+    chat_history.HISTORY_ENQUEUE_TIMEOUT = 0.2
+    try:
+        results = [asyncio.run(outage(args)), asyncio.run(shutdown(args))]
+    finally:
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{args.messages} messages at {args.rate:g}/s, Firestore down {args.outage:g}s,"
+        f" queue max {args.queue_max}"
+    )
+    print(f"{'scenario':<9} {'accepted':>9} {'rejected':>9} {'persisted':>10} {'lost':>5} {'drain s':>8}")
+    for r in results:
+        print(
+            f"{r['scenario']:<9} {r['accepted']:>9} {r['rejected']:>9} {r['persisted']:>10}"
+            f" {r['lost']:>5} {r['drain_s']:>8.2f}"
+        )
+    r = results[1]
+    print(f"shutdown: {r['spilled']} message(s) spilled, {r['spill_files_left']} spill file(s) left")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Load Benchmark
+--------------
+Runs the real app from main.py under uvicorn in a child process, with the
+offline stand-ins from benchmarks/standins.py for Gemini, Firebase Auth and
+Firestore, a local Chroma (or the numpy store) and an ingestion worker
+process, then drives it with concurrent virtual users:
+
+  upload   POST /api/upload with a fresh document, then poll
+           GET /api/upload/{job_id} until it is indexed
+  chat     POST /api/chat/stream as a signed-in user, read to the last event
+
+Each scenario runs at every concurrency level in --levels for --duration
+seconds. Reported per scenario and level: p50 / p95 / p99 latency (chat
+also time to first token), completed requests per second, errors – 429 /
+503 from admission control included – and peak RSS of the API and worker
+processes.
+
+    python -m benchmarks.load [--scenarios upload,chat] [--levels 1,4,16,64]
+                              [--duration 20] [--save-baseline] [--check]
+
+--save-baseline writes the results to --baseline; --check compares against
+it and exits with status 1 when p95 rose or throughput fell by more than
+--tolerance. Baselines are machine-specific: record them on the machine (or
+CI runner class) that checks them. Per-user rate limits are off by default
+(ADMISSION_*_RATE=0) so the run measures capacity; set them in the
+environment to include them.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks import standins
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval.json")
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load.json")
+# Chat users share this many pre-indexed sessions
+CHAT_SESSIONS = 8
+
+
+# ── Child processes ────────────────────────────────────────────────────────────
+def _serve(port: int, settings: dict) -> None:
+    standins.install(**settings)
+    import uvicorn
+    from main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _work(stop_event, settings: dict) -> None:
+    standins.install(**settings)
+    from services.ingestion_worker import run_forever
+
+    run_forever(stop_event)
+
+
+def _configure(args, tmp: str) -> None:
+    """Environment for the child processes; explicit settings win."""
+    defaults = {
+        "GOOGLE_API_KEY":          "benchmark",
+        "VECTOR_BACKEND":          args.backend,
+        "CHROMA_PERSIST_DIR":      os.path.join(tmp, "chroma"),
+        "NUMPY_STORE_DIR":         os.path.join(tmp, "vectors"),
+        "SPARSE_INDEX_PATH":       os.path.join(tmp, "sparse.sqlite3"),
+        "EMBEDDING_CACHE_PATH":    os.path.join(tmp, "embeddings.sqlite3"),
+        "INGEST_DB_PATH":          os.path.join(tmp, "ingestion.sqlite3"),
+        "INGEST_UPLOAD_DIR":       os.path.join(tmp, "uploads"),
+        "SESSION_DB_PATH":         os.path.join(tmp, "sessions.sqlite3"),
+        # The worker runs as its own process with the stand-ins installed
+        "INGEST_WORKER_PROCESSES": "0",
+        "INGEST_POLL_INTERVAL":    "0.05",
+        "ANSWER_CACHE_BACKEND":    "memory" if args.answer_cache else "none",
+        "ADMISSION_CHAT_RATE":     "0",
+        "ADMISSION_UPLOAD_RATE":   "0",
+        "LOG_LEVEL":               "WARNING",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss(pids: List[int]) -> int:
+    """Resident set size in bytes, summed over live pids (Linux /proc)."""
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm") as fh:
+                total += int(fh.read().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+# ── Scenarios ──────────────────────────────────────────────────────────────────
+class Failed(Exception):
+    def __init__(self, kind: str) -> None:
+        super().__init__(kind)
+        self.kind = kind
+
+
+class Sample:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.first_tokens: List[float] = []
+        self.errors: Dict[str, int] = {}
+
+
+async def upload_once(client: httpx.AsyncClient, user: int, fixtures: dict, rng: random.Random) -> dict:
+    doc = rng.choice(fixtures["documents"])
+    # A unique line so every upload is new content and goes through embedding
+    body = f"{doc['text']}\n\nReference {rng.getrandbits(64):016x}\n"
+    resp = await client.post(
+        "/api/upload",
+        files={"file": (f"bench-{user}.txt", body.encode("utf-8"), "text/plain")},
+        data={"session_id": f"bench-upload-{user}"},
+        headers=standins.bearer(f"user{user}"),
+    )
+    if resp.status_code != 202:
+        raise Failed(str(resp.status_code))
+    job_id = resp.json()["job_id"]
+    while True:
+        await asyncio.sleep(0.05)
+        status = (await client.get(f"/api/upload/{job_id}")).json()
+        if status["status"] == "done":
+            return {}
+        if status["status"] == "failed":
+            raise Failed("ingest_failed")
+
+
+async def chat_once(client: httpx.AsyncClient, user: int, fixtures: dict, rng: random.Random) -> dict:
+    query = rng.choice(fixtures["queries"])["query"]
+    payload = {"query": query, "session_id": f"bench-chat-{user % CHAT_SESSIONS}"}
+    start = time.perf_counter()
+    first_token = None
+    async with client.stream(
+        "POST", "/api/chat/stream", json=payload, headers=standins.bearer(f"user{user}"),
+    ) as resp:
+        if resp.status_code != 200:
+            raise Failed(str(resp.status_code))
+        async for line in resp.aiter_lines():
+            if line == "event: token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif line == "event: error":
+                raise Failed("stream_error")
+            elif line == "event: done":
+                break
+    return {"first_token": first_token}
+
+
+SCENARIOS: Dict[str, Callable] = {"upload": upload_once, "chat": chat_once}
+
+
+async def seed_chat_sessions(client: httpx.AsyncClient, fixtures: dict) -> None:
+    """Index the fixture documents into the sessions the chat users query."""
+    job_ids = []
+    for session in range(CHAT_SESSIONS):
+        for doc in fixtures["documents"]:
+            resp = await client.post(
+                "/api/upload",
+                files={"file": (doc["source"].replace(".pdf", ".txt"), doc["text"].encode("utf-8"))},
+                data={"session_id": f"bench-chat-{session}"},
+            )
+            resp.raise_for_status()
+            job_ids.append(resp.json()["job_id"])
+    for job_id in job_ids:
+        while (await client.get(f"/api/upload/{job_id}")).json()["status"] not in ("done", "failed"):
+            await asyncio.sleep(0.1)
+
+
+async def run_level(
+    client: httpx.AsyncClient, scenario: str, users: int, duration: float,
+    fixtures: dict, pids: List[int],
+) -> dict:
+    op = SCENARIOS[scenario]
+    sample = Sample()
+    deadline = time.perf_counter() + duration
+    peak = 0
+
+    async def user(n: int) -> None:
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                extra = await op(client, n, fixtures, rng)
+            except Failed as exc:
+                sample.errors[exc.kind] = sample.errors.get(exc.kind, 0) + 1
+                await asyncio.sleep(0.1)
+                continue
+            except httpx.HTTPError as exc:
+                kind = type(exc).__name__
+                sample.errors[kind] = sample.errors.get(kind, 0) + 1
+                await asyncio.sleep(0.1)
+                continue
+            sample.latencies.append(time.perf_counter() - start)
+            if extra.get("first_token") is not None:
+                sample.first_tokens.append(extra["first_token"])
+
+    async def watch_memory() -> None:
+        nonlocal peak
+        while True:
+            peak = max(peak, _rss(pids))
+            await asyncio.sleep(0.25)
+
+    watcher = asyncio.create_task(watch_memory())
+    started = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(users)))
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+
+    def pct(values: List[float], q: float) -> Optional[float]:
+        if not values:
+            return None
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 1)
+
+    return {
+        "scenario":    scenario,
+        "users":       users,
+        "requests":    len(sample.latencies),
+        "throughput":  round(len(sample.latencies) / elapsed, 2),
+        "p50_ms":      pct(sample.latencies, 0.50),
+        "p95_ms":      pct(sample.latencies, 0.95),
+        "p99_ms":      pct(sample.latencies, 0.99),
+        "mean_ms":     round(statistics.mean(sample.latencies) * 1000, 1) if sample.latencies else None,
+        "ttft_p50_ms": pct(sample.first_tokens, 0.50),
+        "ttft_p95_ms": pct(sample.first_tokens, 0.95),
+        "errors":      sample.errors,
+        "peak_rss_mb": round(peak / 2 ** 20, 1),
+    }
+
+
+# ── Baselines ──────────────────────────────────────────────────────────────────
+def _key(result: dict) -> str:
+    return f"{result['scenario']}@{result['users']}"
+
+
+def compare(results: List[dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Human-readable regressions against the baseline."""
+    regressions = []
+    for result in results:
+        base = baseline.get(_key(result))
+        if base is None:
+            continue
+        if base.get("p95_ms") and result["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{_key(result)}: p95 {result['p95_ms']} ms vs baseline {base['p95_ms']} ms"
+            )
+        if base.get("throughput") and result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{_key(result)}: throughput {result['throughput']}/s vs baseline {base['throughput']}/s"
+            )
+        if sum(result["errors"].values()) > sum(base.get("errors", {}).values()):
+            regressions.append(f"{_key(result)}: errors {result['errors']} vs baseline {base.get('errors')}")
+    return regressions
+
+
+def _print(results: List[dict]) -> None:
+    print(
+        f"{'scenario':<8} {'users':>5} {'req':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'p99 ms':>8} {'ttft50':>7} {'RSS MB':>7}  errors"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<8} {r['users']:>5} {r['requests']:>6} {r['throughput']:>7}"
+            f" {r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} {r['p99_ms'] or '-':>8}"
+            f" {r['ttft_p50_ms'] or '-':>7} {r['peak_rss_mb']:>7}  {r['errors'] or ''}"
+        )
+
+
+# ── Driver ─────────────────────────────────────────────────────────────────────
+async def drive(args, port: int, pids: List[int]) -> List[dict]:
+    with open(FIXTURES) as fh:
+        fixtures = json.load(fh)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits,
+    ) as client:
+        # Wait for the warm-up too, so the first level does not pay for it
+        for _ in range(300):
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError("App did not become ready")
+
+        results = []
+        for scenario in args.scenarios:
+            if scenario == "chat":
+                await seed_chat_sessions(client, fixtures)
+            for users in args.levels:
+                result = await run_level(client, scenario, users, args.duration, fixtures, pids)
+                results.append(result)
+                print(f"  {scenario} × {users}: {result['throughput']} req/s, p95 {result['p95_ms']} ms",
+                      file=sys.stderr)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default="upload,chat")
+    parser.add_argument("--levels", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per level")
+    parser.add_argument("--backend", default="chroma_local", choices=["chroma_local", "numpy"])
+    parser.add_argument("--answer-cache", action="store_true", help="leave the answer cache on")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression vs baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    standins.add_arguments(parser)
+    args = parser.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s in SCENARIOS]
+    args.levels = [int(n) for n in args.levels.split(",")]
+
+    tmp = tempfile.mkdtemp(prefix="load-bench-")
+    _configure(args, tmp)
+    settings = standins.settings_from(args)
+    ctx = multiprocessing.get_context("spawn")
+    port = _free_port()
+    stop = ctx.Event()
+    server = ctx.Process(target=_serve, args=(port, settings), name="bench-api")
+    worker = ctx.Process(target=_work, args=(stop, settings), name="bench-worker")
+    server.start()
+    worker.start()
+    try:
+        results = asyncio.run(drive(args, port, [server.pid, worker.pid]))
+    finally:
+        stop.set()
+        server.terminate()
+        worker.join(30)
+        if worker.is_alive():
+            worker.terminate()
+        server.join(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as fh:
+            json.dump({_key(r): r for r in results}, fh, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    if args.check:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Store Onboarding Benchmark
+--------------------------
+Total time to index a store's document set:
+
+  sequential   one job at a time – enqueue, wait until indexed, next file
+               (what 50–200 single /api/upload round trips amount to)
+  bulk         all files enqueued as one batch (POST /api/upload/bulk), so
+               parsing of the next file overlaps embedding of the current one
+
+    python -m benchmarks.onboarding [--files 50] [--kb 200] [--embed-ms 150]
+
+Runs the real ingestion worker, process pool and numpy vector store in a
+temporary directory. Embeddings are deterministic hashes with an artificial
+per-batch latency standing in for the embedding API; HTTP transfer time is
+not included.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="onboarding-bench-")
+for key, value in {
+    "VECTOR_BACKEND": "numpy",
+    "NUMPY_STORE_DIR": os.path.join(_TMP, "vectors"),
+    "SPARSE_INDEX_PATH": os.path.join(_TMP, "sparse.sqlite3"),
+    "EMBEDDING_CACHE_PATH": os.path.join(_TMP, "embeddings.sqlite3"),
+    "INGEST_DB_PATH": os.path.join(_TMP, "ingestion.sqlite3"),
+    "INGEST_UPLOAD_DIR": os.path.join(_TMP, "uploads"),
+    "SESSION_DB_PATH": os.path.join(_TMP, "sessions.sqlite3"),
+    "INGEST_POLL_INTERVAL": "0.05",
+}.items():
+    os.environ.setdefault(key, value)
+
+import argparse
+import asyncio
+import random
+import shutil
+import time
+from typing import List, Tuple
+
+from benchmarks.extractors import make_csv, make_html, make_txt
+from benchmarks.retrieval import HashEmbeddings
+from services.clients import close_registry, get_registry
+from services.document_processor import _store, shutdown_executor
+from services.ingestion_queue import close_ingestion_queue, get_ingestion_queue
+from services.ingestion_worker import run_worker
+
+
+class SlowEmbeddings(HashEmbeddings):
+    """Hash embeddings plus a fixed delay per call, like a remote API."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+
+def _make_files(root: str, count: int, size: int) -> List[Tuple[str, str]]:
+    rng = random.Random(0)
+    makers = [("csv", make_csv), ("txt", make_txt), ("html", make_html)]
+    files = []
+    for i in range(count):
+        ext, make = makers[i % len(makers)]
+        path = os.path.join(root, f"doc{i:03d}.{ext}")
+        make(path, size, rng)
+        files.append((os.path.basename(path), path))
+    return files
+
+
+def _stage(files: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Copy sources into the upload dir, as the upload endpoints do."""
+    staged = []
+    for name, path in files:
+        with open(path, "rb") as src:
+            staged.append((name, _store(src, os.path.splitext(name)[1])))
+    return staged
+
+
+async def _wait(job_ids: List[str]) -> None:
+    queue = get_ingestion_queue()
+    while True:
+        jobs = await asyncio.to_thread(queue.get_many, job_ids)
+        if all(job["status"] in ("done", "failed") for job in jobs):
+            failed = [job["filename"] for job in jobs if job["status"] == "failed"]
+            if failed:
+                raise RuntimeError(f"Ingestion failed for {failed}")
+            return
+        await asyncio.sleep(0.02)
+
+
+async def sequential(files, session_id: str) -> float:
+    queue = get_ingestion_queue()
+    start = time.perf_counter()
+    for name, path in _stage(files):
+        job = await asyncio.to_thread(queue.enqueue, session_id, name, path)
+        await _wait([job["id"]])
+    return time.perf_counter() - start
+
+
+async def bulk(files, session_id: str) -> float:
+    queue = get_ingestion_queue()
+    start = time.perf_counter()
+    jobs = await asyncio.to_thread(queue.enqueue_many, session_id, _stage(files), session_id)
+    await _wait([job["id"] for job in jobs])
+    return time.perf_counter() - start
+
+
+async def run(args) -> None:
+    registry = get_registry()
+    registry._embeddings = SlowEmbeddings(args.embed_ms / 1000)
+
+    stop = False
+    worker = asyncio.create_task(run_worker(lambda: stop))
+    try:
+        files = _make_files(os.path.join(_TMP, "src"), args.files, args.kb * 1024)
+        seq = await sequential(files, "bench-sequential")
+        blk = await bulk(files, "bench-bulk")
+    finally:
+        stop = True
+        await worker
+
+    print(f"{args.files} files × ~{args.kb} KB, {args.embed_ms} ms per embedding batch")
+    print(f"sequential  {seq:8.1f} s")
+    print(f"bulk        {blk:8.1f} s   ({seq / blk:.1f}× faster)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--kb", type=int, default=200, help="approximate size per file")
+    parser.add_argument("--embed-ms", type=float, default=150)
+    args = parser.parse_args()
+    os.makedirs(os.path.join(_TMP, "src"), exist_ok=True)
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutdown_executor()
+        close_ingestion_queue()
+        close_registry()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
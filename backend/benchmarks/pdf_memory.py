@@ -0,0 +1,159 @@
+"""
+PDF Memory Benchmark
+--------------------
+Peak resident memory and wall time of parsing + chunking generated text
+PDFs of growing page counts through stream_chunks() (process pool
+included, embedding excluded).
+
+    python -m benchmarks.pdf_memory [--pages 10,100,500] [--chars-per-page 3000]
+
+Each size runs in a fresh interpreter so peak RSS is not carried over from
+the previous one. Reported per size: wall time, pages/s, chunks, peak RSS of
+the streaming process (and its growth over the same process idle) and the
+largest peak RSS of any parser process. Memory should stay flat as page
+counts grow: at most 2 × PDF_WORKERS page ranges are in flight at once.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.extractors import _sentence
+from core.config import PDF_PAGES_PER_TASK, PDF_WORKERS
+
+_LINES_PER_PAGE = 45
+
+
+# ── PDF generation ─────────────────────────────────────────────────────────────
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_lines(rng: random.Random, page: int, chars: int) -> List[str]:
+    words, lines, line = [], [f"Store policy handbook, page {page + 1}"], ""
+    while sum(map(len, lines)) < chars:
+        words.extend(_sentence(rng).split())
+        while words:
+            word = words.pop(0)
+            if len(line) + len(word) > 90:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}".strip()
+    return (lines + [line])[:_LINES_PER_PAGE * 2]
+
+
+def make_pdf(path: str, pages: int, chars_per_page: int, seed: int = 0) -> None:
+    """Write a text PDF (Helvetica, one content stream per page) by hand."""
+    rng = random.Random(seed)
+    offsets: List[int] = []
+    # 1: catalog, 2: page tree, 3: font, then (page, content) pairs
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+    with open(path, "wb") as fh:
+        def obj(body: bytes) -> None:
+            offsets.append(fh.tell())
+            fh.write(f"{len(offsets)} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        fh.write(b"%PDF-1.4\n")
+        obj(b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        obj(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            text = "\n".join(
+                f"({_escape(line)}) Tj T*" for line in _page_lines(rng, i, chars_per_page)
+            )
+            stream = f"BT /F1 9 Tf 11 TL 40 800 Td\n{text}\nET".encode("latin-1")
+            obj(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842]"
+                f" /Resources << /Font << /F1 3 0 R >> >> /Contents {len(offsets) + 2} 0 R >>".encode()
+            )
+            obj(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        xref = fh.tell()
+        fh.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        fh.write("".join(f"{o:010d} 00000 n \n" for o in offsets).encode())
+        fh.write(
+            f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        )
+
+
+# ── Measurement (child interpreter) ────────────────────────────────────────────
+def _peak_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+async def _stream(path: str) -> dict:
+    from services import document_processor
+
+    baseline = _peak_mb(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    pages = chunks = 0
+    async for units, batch in document_processor.stream_chunks(path, "bench.pdf"):
+        pages += units
+        chunks += len(batch)
+    elapsed = time.perf_counter() - start
+    # Reap the parser processes so their peak shows up under RUSAGE_CHILDREN
+    document_processor._executor.shutdown(wait=True)
+    document_processor._executor = None
+    return {
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "pages_per_s": pages / elapsed,
+        "peak_rss_mb": _peak_mb(resource.RUSAGE_SELF),
+        "rss_growth_mb": _peak_mb(resource.RUSAGE_SELF) - baseline,
+        "parser_peak_rss_mb": _peak_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def _measure(path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pdf_memory", "--child", path],
+        check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", default="10,100,500")
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(_stream(args.child))))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in [int(n) for n in args.pages.split(",")]:
+            path = os.path.join(tmp, f"bench-{pages}.pdf")
+            make_pdf(path, pages, args.chars_per_page)
+            results.append({"mb": os.path.getsize(path) / 1e6, **_measure(path)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"PDF_WORKERS={PDF_WORKERS}, PDF_PAGES_PER_TASK={PDF_PAGES_PER_TASK}")
+    print(
+        f"{'pages':>6} {'MB':>6} {'seconds':>8} {'pages/s':>8} {'chunks':>7}"
+        f" {'peak RSS':>9} {'growth':>7} {'parser peak':>12}"
+    )
+    for r in results:
+        print(
+            f"{r['pages']:>6} {r['mb']:>6.2f} {r['seconds']:>8.2f} {r['pages_per_s']:>8.1f}"
+            f" {r['chunks']:>7} {r['peak_rss_mb']:>7.0f}MB {r['rss_growth_mb']:>5.0f}MB"
+            f" {r['parser_peak_rss_mb']:>10.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
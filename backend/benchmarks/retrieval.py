@@ -0,0 +1,167 @@
+"""
+Retrieval Benchmark
+-------------------
+Compares plain top-k dense retrieval, hybrid retrieval (dense + BM25 sparse
+index fused with reciprocal rank fusion) and the rerank stage (over-fetch →
+dedupe → MMR → adaptive k) on top of each, on the fixture set in
+fixtures/retrieval.json.
+
+    python -m benchmarks.retrieval [--copies 2] [--chunk-size 400]
+
+Runs fully offline: chunks are indexed into a temporary NumpyVectorStore
+(with deterministic hashed bag-of-words embeddings) and a temporary sparse
+index under the same chunk IDs, so numbers are
+comparable between runs and machines. Each document is indexed `--copies`
+times (re-uploads of the same file), which is where near-duplicate removal
+pays off. A fixture query counts as recalled when every `relevant` snippet
+appears in some retrieved chunk.
+
+Reports per strategy: recall@k, mean chunks returned, mean prompt tokens and
+p50/p95 latency of retrieval + prompt assembly (the LLM call is excluded).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from core.config import HYBRID_CANDIDATES, RETRIEVER_FETCH_K, RETRIEVER_K
+from services import sparse_index
+from services.chat_service import _build_prompt
+from services.hybrid_retriever import HybridRetriever
+from services.numpy_store import NumpyVectorStore
+from services.reranker import RerankingRetriever
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval.json")
+SESSION_ID = "benchmark"
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unigram + bigram feature hashing; no network needed."""
+
+    def __init__(self, dim: int = 512) -> None:
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vec[index] += 1.0 if digest[4] & 1 else -1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def _load_chunks(fixtures: dict, copies: int, chunk_size: int, overlap: int) -> List[Document]:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+    chunks: List[Document] = []
+    for copy in range(copies):
+        for doc in fixtures["documents"]:
+            source = doc["source"] if copy == 0 else f"copy{copy}_{doc['source']}"
+            for chunk in splitter.split_text(doc["text"]):
+                chunks.append(Document(
+                    page_content=chunk,
+                    metadata={"source": source, "session_id": SESSION_ID},
+                ))
+    return chunks
+
+
+def _recalled(relevant: List[str], docs: List[Document]) -> bool:
+    return all(any(snippet in d.page_content for d in docs) for snippet in relevant)
+
+
+def _run(name: str, retriever, queries: List[dict]) -> Dict[str, float]:
+    recalled, returned, tokens, latencies = 0, [], [], []
+    for q in queries:
+        start = time.perf_counter()
+        docs = retriever.invoke(q["query"])
+        _, prompt_tokens, used = _build_prompt(q["query"], docs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalled += _recalled(q["relevant"], docs[:used])
+        returned.append(used)
+        tokens.append(prompt_tokens)
+    latencies.sort()
+    return {
+        "strategy": name,
+        "recall": recalled / len(queries),
+        "mean_chunks": statistics.mean(returned),
+        "mean_prompt_tokens": statistics.mean(tokens),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--copies", type=int, default=2)
+    parser.add_argument("--chunk-size", type=int, default=400)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--baseline-k", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as fh:
+        fixtures = json.load(fh)
+    embeddings = HashEmbeddings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(tmp, embeddings)
+        chunks = _load_chunks(fixtures, args.copies, args.chunk_size, args.overlap)
+        ids = [f"{SESSION_ID}-{i}" for i in range(len(chunks))]
+        store.add_documents(chunks, ids=ids)
+        # HybridRetriever searches the process-wide sparse index
+        sparse_index._index = sparse_index.SparseIndex(os.path.join(tmp, "sparse.sqlite3"))
+        sparse_index._index.add(SESSION_ID, zip(ids, chunks))
+
+        def dense(k: int):
+            return store.as_retriever(search_kwargs={"filter": {"session_id": SESSION_ID}, "k": k})
+
+        def hybrid(k: int):
+            candidates = max(HYBRID_CANDIDATES, k)
+            return HybridRetriever(dense=dense(candidates), session_id=SESSION_ID, k=k, candidates=candidates)
+
+        def reranked(base):
+            return RerankingRetriever(base=base, embeddings=embeddings, k=RETRIEVER_K)
+
+        rerank = f"fetch-{RETRIEVER_FETCH_K} max-{RETRIEVER_K}"
+        try:
+            results = [
+                _run(f"dense top-{args.baseline_k}", dense(args.baseline_k), fixtures["queries"]),
+                _run(f"hybrid top-{args.baseline_k}", hybrid(args.baseline_k), fixtures["queries"]),
+                _run(f"rerank {rerank}", reranked(dense(RETRIEVER_FETCH_K)), fixtures["queries"]),
+                _run(f"hybrid+rerank {rerank}", reranked(hybrid(RETRIEVER_FETCH_K)), fixtures["queries"]),
+            ]
+        finally:
+            sparse_index.close_sparse_index()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(chunks)} chunks, {len(fixtures['queries'])} queries")
+    print(f"{'strategy':<30} {'recall@k':>8} {'chunks':>7} {'tokens':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    for r in results:
+        print(
+            f"{r['strategy']:<30} {r['recall']:>8.2f} {r['mean_chunks']:>7.2f}"
+            f" {r['mean_prompt_tokens']:>7.0f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Session Scaling Benchmark
+-------------------------
+Shows how session-scoped query latency changes as the total number of
+sessions in the vector store grows, per collection layout:
+
+  single   one Chroma collection, session selected by a `where` filter
+  bucket   sessions hashed into COLLECTION_BUCKETS Chroma collections
+  session  one Chroma collection per session
+  numpy    NumpyVectorStore, one memory-mapped shard per session
+
+    python -m benchmarks.session_scaling [--steps 10,100,500] [--chunks 30]
+
+Uses an embedded chromadb PersistentClient in a temporary directory and
+random unit vectors, so no API keys or network are needed. Sessions are
+added in steps and every step runs the same number of random
+single-session queries.
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import chromadb
+import numpy as np
+
+from benchmarks.retrieval import HashEmbeddings
+from services.numpy_store import NumpyVectorStore
+
+LAYOUTS = ("single", "bucket", "session", "numpy")
+
+
+def _collection_name(layout: str, session_id: str, buckets: int) -> str:
+    digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+    if layout == "single":
+        return "bench_all"
+    if layout == "session":
+        return f"bench_s{digest[:20]}"
+    return f"bench_b{int(digest[:8], 16) % buckets:03d}"
+
+
+class _Fixture:
+    def __init__(self, layout: str, root: str, dim: int, buckets: int) -> None:
+        self.layout = layout
+        self.dim = dim
+        self.buckets = buckets
+        self.sessions: List[str] = []
+        if layout == "numpy":
+            self.store = NumpyVectorStore(os.path.join(root, "numpy"), HashEmbeddings(dim))
+        else:
+            self.client = chromadb.PersistentClient(path=os.path.join(root, layout))
+            self.collections: Dict[str, object] = {}
+
+    def _collection(self, session_id: str):
+        name = _collection_name(self.layout, session_id, self.buckets)
+        if name not in self.collections:
+            self.collections[name] = self.client.get_or_create_collection(
+                name, metadata={"hnsw:space": "cosine"}
+            )
+        return self.collections[name]
+
+    def add_session(self, session_id: str, vectors: np.ndarray) -> None:
+        ids = [f"{session_id}-{i}" for i in range(len(vectors))]
+        metadatas = [{"session_id": session_id} for _ in ids]
+        if self.layout == "numpy":
+            self.store._append(session_id, ids, ids, metadatas, vectors)
+        else:
+            self._collection(session_id).add(
+                ids=ids, embeddings=vectors.tolist(), metadatas=metadatas, documents=ids,
+            )
+        self.sessions.append(session_id)
+
+    def query(self, session_id: str, vector: np.ndarray, k: int) -> None:
+        if self.layout == "numpy":
+            self.store.similarity_search_by_vector_with_score(
+                vector.tolist(), k, filter={"session_id": session_id}
+            )
+        else:
+            self._collection(session_id).query(
+                query_embeddings=[vector.tolist()], n_results=k,
+                where={"session_id": session_id},
+            )
+
+
+def _unit(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", default="10,100,500",
+                        help="cumulative session counts to measure at")
+    parser.add_argument("--chunks", type=int, default=30, help="chunks per session")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--buckets", type=int, default=32)
+    parser.add_argument("--layouts", default=",".join(LAYOUTS))
+    args = parser.parse_args()
+
+    steps = sorted(int(s) for s in args.steps.split(","))
+    layouts = [l for l in args.layouts.split(",") if l in LAYOUTS]
+    rng = np.random.default_rng(0)
+
+    print(f"{'layout':<8} {'sessions':>8} {'vectors':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in layouts:
+            fixture = _Fixture(layout, tmp, args.dim, args.buckets)
+            for target in steps:
+                while len(fixture.sessions) < target:
+                    fixture.add_session(
+                        f"session-{len(fixture.sessions)}", _unit(rng, args.chunks, args.dim)
+                    )
+                picker = random.Random(target)
+                latencies = []
+                for query in _unit(rng, args.queries, args.dim):
+                    session_id = picker.choice(fixture.sessions)
+                    start = time.perf_counter()
+                    fixture.query(session_id, query, args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                latencies.sort()
+                print(
+                    f"{layout:<8} {target:>8} {target * args.chunks:>9}"
+                    f" {statistics.median(latencies):>8.2f}"
+                    f" {latencies[int(len(latencies) * 0.95) - 1]:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Offline Stand-ins
+-----------------
+Local replacements for the external services, so benchmarks can run the
+real app without network access or credentials:
+
+  FakeChatModel        chat model with a fixed time to first token and token
+                       rate; answers are built from the prompt's last words
+  HashEmbeddings       deterministic embeddings (benchmarks/retrieval.py),
+                       behind the real embedding cache
+  InMemoryFirestore    the part of the async Firestore client used by chat
+                       history, with a fixed latency per round trip and
+                       simulated outages
+  verify_id_token      accepts "bench:<uid>" bearer tokens
+
+install() wires them into the current process before the app starts. The app
+code itself is untouched; the vector store stays real (local Chroma or numpy).
+"""
+
+import asyncio
+import bisect
+import copy
+import itertools
+import json
+import operator
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.api_core.exceptions import InvalidArgument, ServiceUnavailable
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from benchmarks.retrieval import HashEmbeddings
+
+TOKEN_PREFIX = "bench:"
+
+
+# ── LLM ────────────────────────────────────────────────────────────────────────
+class FakeChatModel(BaseChatModel):
+    first_token_latency: float = 0.3
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _answer(self, messages) -> List[str]:
+        words = str(messages[-1].content).split()[-40:] or ["ok"]
+        return [f"{w} " for w in itertools.islice(itertools.cycle(words), self.answer_tokens)]
+
+    def _duration(self) -> float:
+        return self.first_token_latency + self.answer_tokens / self.tokens_per_second
+
+    def _result(self, messages) -> ChatResult:
+        message = AIMessage(content="".join(self._answer(messages)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._duration())
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._duration())
+        return self._result(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._answer(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class SlowHashEmbeddings(HashEmbeddings):
+    """HashEmbeddings plus a fixed delay per call, like a remote API."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    # task_type as in GoogleGenerativeAIEmbeddings, so queries can be batched
+    def embed_documents(self, texts, task_type: Optional[str] = None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts, task_type: Optional[str] = None):
+        return await asyncio.to_thread(self.embed_documents, texts, task_type)
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+# ── Firestore ──────────────────────────────────────────────────────────────────
+Path = Tuple[str, ...]
+
+_OPS = {
+    "<": operator.lt, "<=": operator.le, "==": operator.eq,
+    ">": operator.gt, ">=": operator.ge, "!=": operator.ne,
+}
+
+
+class _Documents(dict):
+    """
+    Path → data, indexed by parent collection. Sorted views per (collection,
+    ordering) are kept until a document in that collection is written;
+    deletes only leave holes that queries skip.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.collections: Dict[Path, Dict[Path, dict]] = defaultdict(dict)
+        self._sorted: Dict[Tuple[Path, tuple], Tuple[List[tuple], List[Path]]] = {}
+
+    def __setitem__(self, path: Path, data: dict) -> None:
+        super().__setitem__(path, data)
+        self.collections[path[:-1]][path] = data
+        for view in [v for v in self._sorted if v[0] == path[:-1]]:
+            del self._sorted[view]
+
+    def __delitem__(self, path: Path) -> None:
+        super().__delitem__(path)
+        del self.collections[path[:-1]][path]
+
+    def pop(self, path: Path, *default):
+        if path in self:
+            del self.collections[path[:-1]][path]
+        return super().pop(path, *default)
+
+    def ordered(self, collection: Path, order: tuple, key) -> Tuple[List[tuple], List[Path]]:
+        """(sort keys, paths) of the collection; may list deleted paths."""
+        view = self._sorted.get((collection, order))
+        if view is None:
+            rows = sorted(
+                (key(path[-1], data), path) for path, data in self.collections[collection].items()
+            )
+            view = self._sorted[(collection, order)] = (
+                [k for k, _ in rows], [p for _, p in rows],
+            )
+        return view
+
+
+class _Snapshot:
+    def __init__(self, reference: "_DocumentRef", data: Optional[dict]) -> None:
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocumentRef:
+    def __init__(self, db: "InMemoryFirestore", path: Path) -> None:
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> "_Collection":
+        return _Collection(self._db, self.path + (name,))
+
+    async def get(self) -> _Snapshot:
+        await self._db.round_trip()
+        return _Snapshot(self, self._db.docs.get(self.path))
+
+    async def set(self, data: dict, merge: bool = False) -> None:
+        await self._db.round_trip()
+        _check_size(data)
+        base = self._db.docs.get(self.path, {}) if merge else {}
+        self._db.docs[self.path] = {**base, **data}
+
+    async def delete(self) -> None:
+        await self._db.round_trip()
+        self._db.docs.pop(self.path, None)
+
+
+class _Query:
+    def __init__(self, db: "InMemoryFirestore", path: Path) -> None:
+        self._db = db
+        self._path = path
+        self._order: List[str] = []
+        self._filters: List[Any] = []
+        self._limit: Optional[int] = None
+        self._last = False
+        self._after: Optional[_Snapshot] = None
+        self._before: Optional[_Snapshot] = None
+
+    def _with(self, **changes) -> "_Query":
+        query = copy.copy(self)
+        query._order = list(self._order)
+        query._filters = list(self._filters)
+        for key, value in changes.items():
+            setattr(query, key, value)
+        return query
+
+    def order_by(self, field: str) -> "_Query":
+        return self._with(_order=self._order + [field])
+
+    def where(self, filter) -> "_Query":
+        return self._with(_filters=self._filters + [filter])
+
+    def select(self, fields) -> "_Query":
+        return self
+
+    def limit(self, count: int) -> "_Query":
+        return self._with(_limit=count, _last=False)
+
+    def limit_to_last(self, count: int) -> "_Query":
+        return self._with(_limit=count, _last=True)
+
+    def start_after(self, snapshot: _Snapshot) -> "_Query":
+        return self._with(_after=snapshot)
+
+    def end_before(self, snapshot: _Snapshot) -> "_Query":
+        return self._with(_before=snapshot)
+
+    def _key(self, doc_id: str, data: dict) -> tuple:
+        return tuple(doc_id if f == "__name__" else data.get(f) for f in self._order) + (doc_id,)
+
+    async def get(self) -> List[_Snapshot]:
+        await self._db.round_trip()
+        docs = self._db.docs
+        keys, paths = docs.ordered(self._path, tuple(self._order), self._key)
+        lo, hi = 0, len(keys)
+        if self._after is not None:
+            lo = bisect.bisect_right(keys, self._key(self._after.id, self._after.to_dict() or {}))
+        if self._before is not None:
+            hi = bisect.bisect_left(keys, self._key(self._before.id, self._before.to_dict() or {}))
+        positions = range(hi - 1, lo - 1, -1) if self._last else range(lo, hi)
+        rows = []
+        for i in positions:
+            data = docs.collections[self._path].get(paths[i])
+            if data is None or not all(
+                _OPS[f.op_string](data.get(f.field_path), f.value) for f in self._filters
+            ):
+                continue
+            rows.append((paths[i], data))
+            if self._limit is not None and len(rows) == self._limit:
+                break
+        if self._last:
+            rows.reverse()
+        return [_Snapshot(_DocumentRef(self._db, path), data) for path, data in rows]
+
+
+class _Collection(_Query):
+    def document(self, doc_id: Optional[str] = None) -> _DocumentRef:
+        return _DocumentRef(self._db, self._path + (doc_id or uuid.uuid4().hex,))
+
+
+class _Batch:
+    def __init__(self, db: "InMemoryFirestore") -> None:
+        self._db = db
+        self._ops: List[Tuple[Path, Optional[dict]]] = []
+
+    def set(self, reference: _DocumentRef, data: dict) -> None:
+        self._ops.append((reference.path, dict(data)))
+
+    def delete(self, reference: _DocumentRef) -> None:
+        self._ops.append((reference.path, None))
+
+    async def commit(self) -> None:
+        await self._db.round_trip()
+        for _, data in self._ops:
+            if data is not None:
+                _check_size(data)
+        for path, data in self._ops:
+            if data is None:
+                self._db.docs.pop(path, None)
+            else:
+                self._db.docs[path] = data
+
+
+class Unavailable(ServiceUnavailable):
+    """Raised by every InMemoryFirestore round trip during an outage."""
+
+
+# Firestore's limit on one document, checked (roughly, as JSON) on every write
+MAX_DOCUMENT_BYTES = 1_048_576
+
+
+def _check_size(data: dict) -> None:
+    if len(json.dumps(data, default=str)) > MAX_DOCUMENT_BYTES:
+        raise InvalidArgument("Document exceeds the maximum size of 1,048,576 bytes")
+
+
+class InMemoryFirestore:
+    """
+    Documents keyed by path; every get() / set() / commit() costs `latency`
+    seconds, and fails with Unavailable during an outage(). Writes of
+    documents over MAX_DOCUMENT_BYTES fail with InvalidArgument, as in
+    Firestore (a whole batch is rejected).
+    """
+
+    def __init__(self, latency: float = 0.02) -> None:
+        self.latency = latency
+        self.docs: Dict[Path, dict] = _Documents()
+        self._down_until = 0.0
+
+    def outage(self, seconds: float) -> None:
+        """Fail every round trip for the next `seconds` (0 ends an outage)."""
+        self._down_until = time.monotonic() + seconds
+
+    async def round_trip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if time.monotonic() < self._down_until:
+            raise Unavailable("503 Firestore unavailable (simulated outage)")
+
+    def collection(self, name: str) -> _Collection:
+        return _Collection(self, (name,))
+
+    def batch(self) -> _Batch:
+        return _Batch(self)
+
+
+# ── Auth ───────────────────────────────────────────────────────────────────────
+def verify_id_token(token: str, *args, **kwargs) -> dict:
+    from firebase_admin import auth
+
+    if not token.startswith(TOKEN_PREFIX):
+        raise auth.InvalidIdTokenError("Not a benchmark token", cause=None)
+    uid = token[len(TOKEN_PREFIX):]
+    return {"uid": uid, "email": f"{uid}@benchmark.local", "exp": time.time() + 3600}
+
+
+def bearer(uid: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {TOKEN_PREFIX}{uid}"}
+
+
+def _init_fake_firebase() -> None:
+    import firebase_admin
+    from firebase_admin import credentials
+    from google.auth.credentials import AnonymousCredentials
+
+    class _Credential(credentials.Base):
+        def get_credential(self):
+            return AnonymousCredentials()
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(_Credential(), {"projectId": "benchmark"})
+
+
+# ── Wiring ─────────────────────────────────────────────────────────────────────
+def install(
+    llm_latency: float = 0.3,
+    llm_tokens_per_second: float = 50.0,
+    answer_tokens: int = 60,
+    embed_latency: float = 0.0,
+    firestore_latency: float = 0.02,
+) -> None:
+    """Swap the external services for stand-ins. Call before the app starts."""
+    # Registered first, so init_firebase() never looks for real credentials
+    _init_fake_firebase()
+
+    from firebase_admin import auth
+    from middleware import auth as auth_middleware
+    from services import chat_history
+    from services.clients import get_registry
+    from services.embedding_cache import CachedEmbeddings, get_embedding_store
+
+    auth.verify_id_token = verify_id_token
+    auth_middleware._CertRefresher.refresh = lambda self: 3600.0
+
+    firestore = InMemoryFirestore(firestore_latency)
+    chat_history._db = lambda: firestore
+
+    registry = get_registry()
+    registry._llm = FakeChatModel(
+        first_token_latency=llm_latency,
+        tokens_per_second=llm_tokens_per_second,
+        answer_tokens=answer_tokens,
+    )
+    registry._embeddings = CachedEmbeddings(
+        SlowHashEmbeddings(embed_latency), store=get_embedding_store(), namespace="benchmark-hash",
+    )
+
+
+def settings_from(args) -> Dict[str, float]:
+    """install() keyword arguments from parsed command-line options."""
+    return {
+        "llm_latency":           args.llm_latency,
+        "llm_tokens_per_second": args.llm_tokens_per_second,
+        "answer_tokens":         args.answer_tokens,
+        "embed_latency":         args.embed_latency,
+        "firestore_latency":     args.firestore_latency,
+    }
+
+
+def add_arguments(parser) -> None:
+    group = parser.add_argument_group("stand-ins")
+    group.add_argument("--llm-latency", type=float, default=0.3, help="seconds to first token")
+    group.add_argument("--llm-tokens-per-second", type=float, default=50.0)
+    group.add_argument("--answer-tokens", type=int, default=60)
+    group.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embedding call")
+    group.add_argument("--firestore-latency", type=float, default=0.02, help="seconds per round trip")
+
@@ -0,0 +1,240 @@
+"""
+Startup Benchmark
+-----------------
+How quickly a fresh API process comes up, measured from the moment it is
+launched:
+
+  import profile  `python -X importtime -c "import main"` – the modules with
+                  the largest cumulative import time
+  cold start      uvicorn serving main:app in a new interpreter (--runs times,
+                  median reported):
+                    import  seconds spent in `import main`
+                    live    until GET /health answers 200
+                    ready   until GET /ready answers 200 (warm-up complete)
+                  plus the slowest warm-up check per run
+
+    python -m benchmarks.startup [--runs 5] [--top 15] [--real] [--json]
+
+By default the app runs with the offline stand-ins (benchmarks/standins.py)
+and a local Chroma in a temporary directory, so no credentials are needed.
+The stand-ins are installed after `import main` and their own setup time is
+reported separately (and included in live / ready). --real skips them and
+uses the credentials from the environment instead.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Kept to the standard library: this module is imported by the measured
+# child process, and anything imported here would count against it
+_CHILD = "from benchmarks.startup import _child; _child()"
+
+
+# ── Child process ──────────────────────────────────────────────────────────────
+def _child() -> None:
+    """Import the app, optionally install the stand-ins, serve until killed."""
+    port, phases_path, real = int(sys.argv[1]), sys.argv[2], sys.argv[3] == "real"
+    phases: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    from main import app
+    phases["import_s"] = time.perf_counter() - start
+
+    if not real:
+        start = time.perf_counter()
+        from benchmarks import standins
+
+        standins.install(llm_latency=0, embed_latency=0, firestore_latency=0)
+        phases["standins_s"] = time.perf_counter() - start
+
+    with open(phases_path, "w") as fh:
+        json.dump(phases, fh)
+
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _environment(tmp: str) -> Dict[str, str]:
+    """Child environment; explicit settings win."""
+    env = dict(os.environ)
+    defaults = {
+        "GOOGLE_API_KEY":          "benchmark",
+        "VECTOR_BACKEND":          "chroma_local",
+        "CHROMA_PERSIST_DIR":      os.path.join(tmp, "chroma"),
+        "NUMPY_STORE_DIR":         os.path.join(tmp, "vectors"),
+        "SPARSE_INDEX_PATH":       os.path.join(tmp, "sparse.sqlite3"),
+        "EMBEDDING_CACHE_PATH":    os.path.join(tmp, "embeddings.sqlite3"),
+        "INGEST_DB_PATH":          os.path.join(tmp, "ingestion.sqlite3"),
+        "INGEST_UPLOAD_DIR":       os.path.join(tmp, "uploads"),
+        "SESSION_DB_PATH":         os.path.join(tmp, "sessions.sqlite3"),
+        "INGEST_WORKER_PROCESSES": "0",
+        "LOG_LEVEL":               "WARNING",
+    }
+    for key, value in defaults.items():
+        env.setdefault(key, value)
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ── Import profile ─────────────────────────────────────────────────────────────
+def import_profile(env: Dict[str, str], top: int) -> Tuple[float, List[dict]]:
+    """(total seconds, slowest modules by cumulative import time)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`import main` failed:\n{proc.stderr[-2000:]}")
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if not self_us.isdigit():
+            continue  # header row
+        modules.append({
+            "module": name,
+            "self_s": int(self_us) / 1e6,
+            "cumulative_s": int(cumulative_us) / 1e6,
+        })
+    total = next((m["cumulative_s"] for m in modules if m["module"] == "main"), 0.0)
+    modules.sort(key=lambda m: m["cumulative_s"], reverse=True)
+    return total, [m for m in modules if m["module"] != "main"][:top]
+
+
+# ── Cold start ─────────────────────────────────────────────────────────────────
+def _get(url: str) -> Optional[Tuple[int, dict]]:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return resp.status, json.load(resp)
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.load(exc)
+    except (OSError, ValueError):
+        return None
+
+
+def cold_start(env: Dict[str, str], real: bool, timeout: float) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fh:
+        phases_path = fh.name
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _CHILD, str(port), phases_path, "real" if real else "standins"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    result: dict = {"live_s": None, "ready_s": None}
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline and proc.poll() is None:
+            if result["live_s"] is None:
+                got = _get(base + "/health")
+                if got and got[0] == 200:
+                    result["live_s"] = time.perf_counter() - start
+            if result["live_s"] is not None:
+                got = _get(base + "/ready")
+                if got and got[0] == 200:
+                    result["ready_s"] = time.perf_counter() - start
+                    report = got[1]
+                    slowest = max(report["dependencies"].items(), key=lambda kv: kv[1]["seconds"] or 0)
+                    result["slowest_check"] = f"{slowest[0]} {slowest[1]['seconds']:.2f}s"
+                    break
+            time.sleep(0.01)
+        else:
+            if proc.poll() is not None:
+                raise RuntimeError(f"App exited with status {proc.returncode}")
+            got = _get(base + "/ready")
+            result["not_ready"] = got[1]["dependencies"] if got else "no answer"
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        try:
+            with open(phases_path) as fh:
+                result.update(json.load(fh))
+        except (OSError, ValueError):
+            pass
+        os.unlink(phases_path)
+    return result
+
+
+def _median(runs: List[dict], key: str) -> Optional[float]:
+    values = [r[key] for r in runs if r.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules in the import profile")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for /ready")
+    parser.add_argument("--real", action="store_true", help="real services instead of stand-ins")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="startup-bench-")
+    try:
+        env = _environment(tmp)
+        import_total, modules = import_profile(env, args.top)
+        runs = [cold_start(env, args.real, args.timeout) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    summary = {
+        key: _median(runs, key) for key in ("import_s", "standins_s", "live_s", "ready_s")
+    }
+    if args.json:
+        print(json.dumps({
+            "import_main_s": import_total, "slowest_imports": modules,
+            "median": summary, "runs": runs,
+        }, indent=2))
+        return
+
+    print(f"import main: {import_total:.2f}s cumulative; slowest modules:")
+    print(f"  {'module':<48} {'cumul s':>8} {'self s':>8}")
+    for m in modules:
+        print(f"  {m['module']:<48} {m['cumulative_s']:>8.3f} {m['self_s']:>8.3f}")
+    print()
+    print(f"cold start, {args.runs} run(s), {'real services' if args.real else 'stand-ins'}:")
+    print(f"  {'run':>3} {'import s':>9} {'stand-ins s':>12} {'live s':>7} {'ready s':>8}  slowest check")
+    for i, r in enumerate(runs, 1):
+        print(
+            f"  {i:>3} {_fmt(r.get('import_s')):>9} {_fmt(r.get('standins_s')):>12}"
+            f" {_fmt(r['live_s']):>7} {_fmt(r['ready_s']):>8}  {r.get('slowest_check', '')}"
+        )
+        if "not_ready" in r:
+            print(f"      not ready after {args.timeout:g}s: {r['not_ready']}")
+    print(
+        f"  {'med':>3} {_fmt(summary['import_s']):>9} {_fmt(summary['standins_s']):>12}"
+        f" {_fmt(summary['live_s']):>7} {_fmt(summary['ready_s']):>8}"
+    )
+
+
+if __name__ == "__main__":
+    main()
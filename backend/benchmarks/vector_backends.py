@@ -0,0 +1,165 @@
+"""
+Vector Backend Benchmark
+------------------------
+Indexing time, query latency, recall and disk use of the two embedded
+vector backends as one session grows to 10k, 100k and 1M chunks:
+
+  chroma  embedded chromadb PersistentClient (HNSW, approximate), session
+          selected by a `where` filter as in production
+  numpy   NumpyVectorStore shard (exact brute-force scan of a memory map)
+
+    python -m benchmarks.vector_backends [--sizes 10000,100000,1000000]
+                                         [--backends chroma,numpy] [--dim 256]
+
+Random unit vectors, so no API keys or network are needed. Recall@k is
+measured against exact search over the same vectors (numpy is exact by
+construction). Chroma Cloud is not measured: its latency is dominated by the
+network round trip (see benchmarks/clients.py).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.retrieval import HashEmbeddings
+from services.numpy_store import NumpyVectorStore
+
+BACKENDS = ("chroma", "numpy")
+SESSION_ID = "bench-backends"
+# chromadb rejects larger add() calls
+_BATCH = 5000
+
+
+def _unit(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _disk_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    ) / 1e6
+
+
+class _Chroma:
+    def __init__(self, path: str) -> None:
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(
+            "bench", metadata={"hnsw:space": "cosine"}
+        )
+
+    def add(self, start: int, vectors: np.ndarray) -> None:
+        ids = [f"c{start + i}" for i in range(len(vectors))]
+        self.collection.add(
+            ids=ids, embeddings=vectors, documents=ids,
+            metadatas=[{"session_id": SESSION_ID} for _ in ids],
+        )
+
+    def query(self, vector: np.ndarray, k: int) -> List[int]:
+        found = self.collection.query(
+            query_embeddings=[vector], n_results=k, where={"session_id": SESSION_ID},
+        )
+        return [int(i[1:]) for i in found["ids"][0]]
+
+
+class _Numpy:
+    def __init__(self, path: str) -> None:
+        self.store = NumpyVectorStore(path, HashEmbeddings())
+
+    def add(self, start: int, vectors: np.ndarray) -> None:
+        ids = [f"c{start + i}" for i in range(len(vectors))]
+        self.store._append(SESSION_ID, ids, ids, [{"session_id": SESSION_ID}] * len(ids), vectors)
+
+    def query(self, vector: np.ndarray, k: int) -> List[int]:
+        hits = self.store.similarity_search_by_vector_with_score(
+            vector.tolist(), k, filter={"session_id": SESSION_ID}
+        )
+        return [int(d.id[1:]) for d, _ in hits]
+
+
+FIXTURES = {"chroma": _Chroma, "numpy": _Numpy}
+
+
+def _measure(name: str, root: str, vectors: np.ndarray, queries: np.ndarray,
+             exact: List[set], k: int) -> Dict[str, float]:
+    # A fresh directory per run: chromadb caches clients per path
+    path = os.path.join(root, f"{name}-{len(vectors)}")
+    start = time.perf_counter()
+    fixture = FIXTURES[name](path)
+    for i in range(0, len(vectors), _BATCH):
+        fixture.add(i, vectors[i:i + _BATCH])
+    index_s = time.perf_counter() - start
+
+    fixture.query(queries[0], k)  # open / load outside the timing
+    latencies, hits = [], 0
+    for query, truth in zip(queries, exact):
+        start = time.perf_counter()
+        found = fixture.query(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(truth.intersection(found))
+    latencies.sort()
+    result = {
+        "backend": name,
+        "chunks": len(vectors),
+        "index_s": index_s,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "recall": hits / (k * len(queries)),
+        "disk_mb": _disk_mb(path),
+    }
+    del fixture
+    shutil.rmtree(path, ignore_errors=True)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends.split(",") if b in BACKENDS]
+    rng = np.random.default_rng(0)
+    queries = _unit(rng, args.queries, args.dim)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(n) for n in args.sizes.split(",")]:
+            vectors = _unit(rng, size, args.dim)
+            scores = vectors @ queries.T
+            exact = [set(np.argpartition(-column, args.k - 1)[:args.k].tolist()) for column in scores.T]
+            for name in backends:
+                results.append(_measure(name, tmp, vectors, queries, exact, args.k))
+                if not args.json:
+                    r = results[-1]
+                    if len(results) == 1:
+                        print(f"dim {args.dim}, k {args.k}, {args.queries} queries, one session")
+                        print(
+                            f"{'backend':<7} {'chunks':>8} {'index s':>8} {'p50 ms':>8}"
+                            f" {'p95 ms':>8} {'recall':>7} {'disk MB':>8}"
+                        )
+                    print(
+                        f"{r['backend']:<7} {r['chunks']:>8} {r['index_s']:>8.1f} {r['p50_ms']:>8.2f}"
+                        f" {r['p95_ms']:>8.2f} {r['recall']:>7.3f} {r['disk_mb']:>8.0f}",
+                        flush=True,
+                    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
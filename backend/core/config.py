@@ -17,29 +17,225 @@ FIREBASE_CREDENTIALS_PATH: str = os.environ.get(
     "FIREBASE_CREDENTIALS_PATH", "firebase_credentials.json"
 )
 
+# Verified-token cache: entries live until the token's exp, capped by max TTL
+AUTH_CACHE_MAX_ENTRIES: int       = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_MAX_TTL: float         = float(os.environ.get("AUTH_CACHE_MAX_TTL", "3600"))
+AUTH_CERTS_REFRESH_SECONDS: float = float(os.environ.get("AUTH_CERTS_REFRESH_SECONDS", "3600"))
+
+# ── Chat History (write-behind) ────────────────────────────────────────────────
+HISTORY_BATCH_SIZE: int         = int(os.environ.get("HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL: float   = float(os.environ.get("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_QUEUE_MAX: int          = int(os.environ.get("HISTORY_QUEUE_MAX", "5000"))
+# When the queue is full: "block" waits up to HISTORY_ENQUEUE_TIMEOUT for space,
+# "direct" writes straight away; both fall back to a direct write
+HISTORY_BACKPRESSURE: str       = os.environ.get("HISTORY_BACKPRESSURE", "block")
+HISTORY_ENQUEUE_TIMEOUT: float  = float(os.environ.get("HISTORY_ENQUEUE_TIMEOUT", "1.0"))
+# Messages still unflushed at shutdown (Firestore unreachable) are written
+# here and re-sent by the next process to start
+HISTORY_SPILL_DIR: str          = os.environ.get("HISTORY_SPILL_DIR", "data/history_spill")
+# Recent messages cached per user, number of users cached, reload interval
+HISTORY_CACHE_SIZE: int         = int(os.environ.get("HISTORY_CACHE_SIZE", "200"))
+HISTORY_CACHE_USERS: int        = int(os.environ.get("HISTORY_CACHE_USERS", "5000"))
+HISTORY_CACHE_TTL: float        = float(os.environ.get("HISTORY_CACHE_TTL", "300"))
+# Delete batches (≤ 500 writes each) committed in parallel by clear_history
+HISTORY_CLEAR_PARALLEL: int     = int(os.environ.get("HISTORY_CLEAR_PARALLEL", "4"))
+
 # ── Model Names ────────────────────────────────────────────────────────────────
 CHAT_MODEL      = "models/gemini-2.5-flash"  
 EMBEDDING_MODEL = "models/gemini-embedding-001"
 
 # ── Vector Store ───────────────────────────────────────────────────────────────
 COLLECTION_NAME = "retail_chatbot_collection"
+# "chroma_cloud" (api.trychroma.com), "chroma_local" (embedded PersistentClient)
+# or "numpy" (in-process index, one memory-mapped shard per session)
+VECTOR_BACKEND: str     = os.environ.get("VECTOR_BACKEND", "chroma_cloud")
+CHROMA_PERSIST_DIR: str = os.environ.get("CHROMA_PERSIST_DIR", "data/chroma")
+NUMPY_STORE_DIR: str    = os.environ.get("NUMPY_STORE_DIR", "data/vectors")
+# Session shards kept loaded (ids, docs, memory map) per process, least
+# recently used dropped first; they reload from disk on next use
+NUMPY_MAX_OPEN_SHARDS: int = int(os.environ.get("NUMPY_MAX_OPEN_SHARDS", "256"))
+# Chroma collection layout: "bucket" (session hashed into one of
+# COLLECTION_BUCKETS collections), "session" (one collection per session) or
+# "single" (everything in COLLECTION_NAME, the layout before sharding). Data
+# is not moved between layouts: switching an existing deployment away from
+# "single" means re-indexing its documents. The numpy backend always shards
+# per session.
+COLLECTION_SHARDING: str = os.environ.get("COLLECTION_SHARDING", "single")
+COLLECTION_BUCKETS: int  = int(os.environ.get("COLLECTION_BUCKETS", "32"))
+
+# ── Session Lifecycle ──────────────────────────────────────────────────────────
+SESSION_DB_PATH: str         = os.environ.get("SESSION_DB_PATH", "data/sessions.sqlite3")
+# Idle sessions' vectors and sparse index entries are evicted after this long
+SESSION_TTL_SECONDS: float   = float(os.environ.get("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_GC_INTERVAL: float   = float(os.environ.get("SESSION_GC_INTERVAL", "600"))
+# last_access is written at most this often per session
+SESSION_TOUCH_INTERVAL: float = float(os.environ.get("SESSION_TOUCH_INTERVAL", "60"))
+# Comma-separated Firebase UIDs allowed to call /api/admin
+ADMIN_UIDS = {u.strip() for u in os.environ.get("ADMIN_UIDS", "").split(",") if u.strip()}
 
 # ── RAG / Chunking ─────────────────────────────────────────────────────────────
-CHUNK_SIZE    = 1000
-CHUNK_OVERLAP = 200
-RETRIEVER_K   = 3
+# In TOKEN_ENCODING tokens; 256 is roughly 1000 characters of English
+CHUNK_TOKENS: int         = int(os.environ.get("CHUNK_TOKENS", "256"))
+# Applied only where a paragraph has to be cut mid-flow, never at headings,
+# tables or paragraph breaks
+CHUNK_OVERLAP_TOKENS: int = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "32"))
+# Trailing fragments smaller than this are merged into the previous chunk
+CHUNK_MIN_TOKENS: int     = int(os.environ.get("CHUNK_MIN_TOKENS", "48"))
+
+# ── Retrieval / Reranking ──────────────────────────────────────────────────────
+# Candidates over-fetched per query, then deduped and MMR-reranked down to
+# between RETRIEVER_MIN_K and RETRIEVER_K chunks
+RETRIEVER_K: int              = int(os.environ.get("RETRIEVER_K", "5"))
+RETRIEVER_MIN_K: int          = int(os.environ.get("RETRIEVER_MIN_K", "2"))
+RETRIEVER_FETCH_K: int        = int(os.environ.get("RETRIEVER_FETCH_K", "20"))
+RERANK_ENABLED: bool          = os.environ.get("RERANK_ENABLED", "true").lower() == "true"
+# 1.0 = pure relevance, 0.0 = pure diversity
+RERANK_MMR_LAMBDA: float      = float(os.environ.get("RERANK_MMR_LAMBDA", "0.7"))
+# Shingle overlap at which two chunks count as near-duplicates
+RERANK_DEDUP_THRESHOLD: float = float(os.environ.get("RERANK_DEDUP_THRESHOLD", "0.8"))
+# Chunks scoring more than this below the best cosine similarity are dropped
+RERANK_SCORE_MARGIN: float    = float(os.environ.get("RERANK_SCORE_MARGIN", "0.08"))
+
+# ── Prompt Budget ──────────────────────────────────────────────────────────────
+# Hard cap on the RAG prompt (template + question + context), in tokens
+MAX_PROMPT_TOKENS: int       = int(os.environ.get("MAX_PROMPT_TOKENS", "4000"))
+# A chunk that does not fit is truncated only if this many tokens remain
+MIN_CHUNK_TOKENS: int        = int(os.environ.get("MIN_CHUNK_TOKENS", "64"))
+# Recent turns used to rewrite follow-ups into standalone questions
+HISTORY_TURNS: int           = int(os.environ.get("HISTORY_TURNS", "6"))
+CONDENSE_HISTORY_TOKENS: int = int(os.environ.get("CONDENSE_HISTORY_TOKENS", "1000"))
+TOKEN_ENCODING: str          = "cl100k_base"
+# POST /api/chat/batch (signed-in users only): questions per request, and
+# answers generated at once
+CHAT_BATCH_MAX_QUERIES: int  = int(os.environ.get("CHAT_BATCH_MAX_QUERIES", "50"))
+CHAT_BATCH_CONCURRENCY: int  = int(os.environ.get("CHAT_BATCH_CONCURRENCY", "8"))
+
+# ── Hybrid Retrieval ───────────────────────────────────────────────────────────
+HYBRID_RETRIEVAL: bool = os.environ.get("HYBRID_RETRIEVAL", "true").lower() == "true"
+# Candidates taken from each of the dense and sparse searches before fusion
+HYBRID_CANDIDATES: int = int(os.environ.get("HYBRID_CANDIDATES", "10"))
+RRF_K: int             = int(os.environ.get("RRF_K", "60"))
+SPARSE_INDEX_PATH: str = os.environ.get("SPARSE_INDEX_PATH", "data/sparse_index.sqlite3")
+BM25_K1: float         = 1.5
+BM25_B: float          = 0.75
+
+# ── Embedding Cache ────────────────────────────────────────────────────────────
+EMBEDDING_CACHE_PATH: str = os.environ.get(
+    "EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3"
+)
+# Query vectors are cached in memory only, this many per process
+QUERY_EMBEDDING_CACHE_SIZE: int = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+
+# ── Embedding Scheduler ────────────────────────────────────────────────────────
+EMBED_BATCH_SIZE: int     = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY: int    = int(os.environ.get("EMBED_CONCURRENCY", "4"))
+# Chunks per second sent for embedding (token bucket); 0 disables limiting
+EMBED_RATE_LIMIT: float   = float(os.environ.get("EMBED_RATE_LIMIT", "100"))
+EMBED_MAX_RETRIES: int    = int(os.environ.get("EMBED_MAX_RETRIES", "5"))
+EMBED_BACKOFF_BASE: float = float(os.environ.get("EMBED_BACKOFF_BASE", "1.0"))
+EMBED_BACKOFF_MAX: float  = float(os.environ.get("EMBED_BACKOFF_MAX", "30.0"))
+
+# ── Answer Cache ───────────────────────────────────────────────────────────────
+# "memory" (in-process LRU) or "none"
+ANSWER_CACHE_BACKEND: str       = os.environ.get("ANSWER_CACHE_BACKEND", "memory")
+ANSWER_CACHE_MAX_ENTRIES: int   = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+ANSWER_CACHE_TTL_SECONDS: float = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# ── Concurrency ────────────────────────────────────────────────────────────────
+# Processes available for CPU-bound parsing / chunking (all file types)
+PDF_WORKERS: int        = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages handed to a parser process at a time
+PDF_PAGES_PER_TASK: int = int(os.environ.get("PDF_PAGES_PER_TASK", "16"))
+# Text, CSV and JSON Lines files are split into byte ranges of this size,
+# cut at record boundaries, and parsed in parallel
+INGEST_SPLIT_BYTES: int = int(os.environ.get("INGEST_SPLIT_BYTES", str(8 * 1024 * 1024)))
+# Spreadsheet rows handed to a parser process at a time
+XLSX_ROWS_PER_TASK: int = int(os.environ.get("XLSX_ROWS_PER_TASK", "5000"))
+
+# ── Ingestion Queue ────────────────────────────────────────────────────────────
+INGEST_DB_PATH: str    = os.environ.get("INGEST_DB_PATH", "data/ingestion.sqlite3")
+INGEST_UPLOAD_DIR: str = os.environ.get("INGEST_UPLOAD_DIR", "data/uploads")
+# Worker processes spawned by the API itself; set to 0 when running
+# `python worker.py` as a separate service
+INGEST_WORKER_PROCESSES: int  = int(os.environ.get("INGEST_WORKER_PROCESSES", "1"))
+# Jobs each worker process runs at once
+INGEST_JOB_CONCURRENCY: int   = int(os.environ.get("INGEST_JOB_CONCURRENCY", "2"))
+INGEST_POLL_INTERVAL: float   = float(os.environ.get("INGEST_POLL_INTERVAL", "1.0"))
+INGEST_MAX_ATTEMPTS: int      = int(os.environ.get("INGEST_MAX_ATTEMPTS", "3"))
+# A running job without a heartbeat for this long is handed to another worker
+INGEST_STALE_SECONDS: float   = float(os.environ.get("INGEST_STALE_SECONDS", "600"))
+# How often each worker looks for stale jobs, and the least time between two
+# progress writes (heartbeats) of a running job
+INGEST_REQUEUE_INTERVAL: float  = float(os.environ.get("INGEST_REQUEUE_INTERVAL", "60"))
+INGEST_PROGRESS_INTERVAL: float = float(os.environ.get("INGEST_PROGRESS_INTERVAL", "1.0"))
+# Bulk upload limits: files per request (ZIP members included) and total
+# uncompressed bytes unpacked from archives
+BULK_MAX_FILES: int           = int(os.environ.get("BULK_MAX_FILES", "500"))
+BULK_MAX_UNPACKED_BYTES: int  = int(os.environ.get("BULK_MAX_UNPACKED_BYTES", str(2 * 1024 ** 3)))
+
+# ── Observability ──────────────────────────────────────────────────────────────
+LOG_LEVEL: str         = os.environ.get("LOG_LEVEL", "INFO")
+# Requests sending `X-Profile: 1` are run under a sampling profiler
+# (pyinstrument if installed, else cProfile); reports go to PROFILE_DIR
+PROFILING_ENABLED: bool = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_HEADER: str    = os.environ.get("PROFILE_HEADER", "X-Profile")
+PROFILE_DIR: str       = os.environ.get("PROFILE_DIR", "data/profiles")
+
+# ── Admission Control ──────────────────────────────────────────────────────────
+ADMISSION_ENABLED: bool  = os.environ.get("ADMISSION_ENABLED", "true").lower() == "true"
+# Token-bucket store: "memory" (per process) or "none" (no rate limits)
+ADMISSION_BACKEND: str   = os.environ.get("ADMISSION_BACKEND", "memory")
+# Per caller (UID when signed in, else client IP): sustained requests per
+# second and burst size
+ADMISSION_CHAT_RATE: float    = float(os.environ.get("ADMISSION_CHAT_RATE", "0.5"))
+ADMISSION_CHAT_BURST: int     = int(os.environ.get("ADMISSION_CHAT_BURST", "10"))
+ADMISSION_UPLOAD_RATE: float  = float(os.environ.get("ADMISSION_UPLOAD_RATE", "0.1"))
+ADMISSION_UPLOAD_BURST: int   = int(os.environ.get("ADMISSION_UPLOAD_BURST", "5"))
+# Requests served at once per workload, per process
+ADMISSION_CHAT_CONCURRENCY: int   = int(os.environ.get("ADMISSION_CHAT_CONCURRENCY", "32"))
+ADMISSION_UPLOAD_CONCURRENCY: int = int(os.environ.get("ADMISSION_UPLOAD_CONCURRENCY", "4"))
+# Running + queued requests one caller may hold in each workload
+ADMISSION_PER_CALLER: int     = int(os.environ.get("ADMISSION_PER_CALLER", "4"))
+# Waiting room per workload; beyond it, or after the timeout, requests get 503
+ADMISSION_QUEUE_MAX: int      = int(os.environ.get("ADMISSION_QUEUE_MAX", "64"))
+ADMISSION_QUEUE_TIMEOUT: float = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_MAX_CALLERS: int    = int(os.environ.get("ADMISSION_MAX_CALLERS", "100000"))
+# Take the client IP from the first X-Forwarded-For hop (behind a proxy)
+ADMISSION_TRUST_PROXY: bool   = os.environ.get("ADMISSION_TRUST_PROXY", "false").lower() == "true"
+
+# ── Startup ────────────────────────────────────────────────────────────────────
+# Clients are built and checked in the background after the app starts
+# serving; /ready reports 503 until every check has passed. Each check gives
+# up after WARMUP_TIMEOUT seconds and is retried after WARMUP_RETRY_INTERVAL.
+WARMUP_TIMEOUT: float        = float(os.environ.get("WARMUP_TIMEOUT", "30"))
+WARMUP_RETRY_INTERVAL: float = float(os.environ.get("WARMUP_RETRY_INTERVAL", "15"))
+# Check remote services (Firestore read, Chroma Cloud heartbeat) as well as
+# building their clients
+WARMUP_PING: bool            = os.environ.get("WARMUP_PING", "true").lower() == "true"
 
 # ── Validation ─────────────────────────────────────────────────────────────────
 def validate_config() -> None:
     """Raise early if critical keys are missing."""
-    missing = [
-        name for name, val in {
-            "GOOGLE_API_KEY": GOOGLE_API_KEY,
+    if VECTOR_BACKEND not in ("chroma_cloud", "chroma_local", "numpy"):
+        raise EnvironmentError(
+            f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}'. "
+            "Choose one of: chroma_cloud, chroma_local, numpy"
+        )
+    if COLLECTION_SHARDING not in ("bucket", "session", "single"):
+        raise EnvironmentError(
+            f"Unknown COLLECTION_SHARDING '{COLLECTION_SHARDING}'. "
+            "Choose one of: bucket, session, single"
+        )
+    if not 0 <= CHUNK_OVERLAP_TOKENS < CHUNK_TOKENS:
+        raise EnvironmentError("CHUNK_OVERLAP_TOKENS must be between 0 and CHUNK_TOKENS")
+    required = {"GOOGLE_API_KEY": GOOGLE_API_KEY}
+    if VECTOR_BACKEND == "chroma_cloud":
+        required.update({
             "CHROMA_API_KEY": CHROMA_API_KEY,
             "CHROMA_TENANT":  CHROMA_TENANT,
             "CHROMA_DATABASE": CHROMA_DATABASE,
-        }.items() if not val
-    ]
+        })
+    missing = [name for name, val in required.items() if not val]
     if missing:
         raise EnvironmentError(
             f"Missing required environment variables: {', '.join(missing)}"
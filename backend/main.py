@@ -7,21 +7,66 @@ Run locally:
 API Docs:
     http://localhost:8000/docs
 """
+import asyncio
 import sys
 import os
+from contextlib import asynccontextmanager
 sys.path.append(os.path.dirname(__file__))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 
-from core.config import validate_config
+from core.config import INGEST_WORKER_PROCESSES, validate_config
+from middleware.admission import AdmissionControlMiddleware
+from middleware.auth import start_cert_refresher, stop_cert_refresher
+from middleware.request_context import RequestContextMiddleware, configure_logging
+from routes.admin  import router as admin_router
 from routes.auth   import router as auth_router
 from routes.chat   import router as chat_router
 from routes.upload import router as upload_router
+from services import metrics
+from services.chat_history import start_history_writer, stop_history_writer
+from services.clients import close_registry
+from services.document_processor import shutdown_executor
+from services.ingestion_queue import close_ingestion_queue
+from services.ingestion_worker import WorkerPool
+from services.session_gc import start_session_gc, stop_session_gc
+from services.session_registry import close_session_registry
+from services.sparse_index import close_sparse_index
+from services.warmup import readiness, start_warmup, stop_warmup
 
 # ── Config guard ───────────────────────────────────────────────────────────────
 validate_config()
+configure_logging()
+
+# ── Lifespan ───────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Import the SDKs and build the pooled Chroma / Gemini / Firebase clients
+    # in the background; /ready turns 200 once they are all up
+    start_warmup()
+    start_cert_refresher()
+    await start_history_writer()
+    # Evicts idle sessions' vectors after SESSION_TTL_SECONDS
+    start_session_gc()
+    # Background ingestion workers (0 when `python worker.py` runs separately)
+    workers = WorkerPool(INGEST_WORKER_PROCESSES)
+    workers.start()
+    try:
+        yield
+    finally:
+        await stop_warmup()
+        await asyncio.to_thread(workers.stop)
+        await stop_session_gc()
+        await stop_history_writer()
+        stop_cert_refresher()
+        shutdown_executor()
+        close_ingestion_queue()
+        close_sparse_index()
+        close_session_registry()
+        close_registry()
+
 
 # ── App ────────────────────────────────────────────────────────────────────────
 app = FastAPI(
@@ -31,12 +76,15 @@ app = FastAPI(
         "Responses are grounded in the uploaded content via RAG."
     ),
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # ── CORS ───────────────────────────────────────────────────────────────────────
 _raw_origins = os.environ.get("ALLOWED_ORIGINS", "http://localhost:5173")
 allowed_origins = [o.strip() for o in _raw_origins.split(",")]
 
+# Inside CORS, so 429 / 503 rejections still carry CORS headers
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -44,12 +92,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Retry-After"],
 )
+# Outermost, so the request ID and timing cover everything below
+app.add_middleware(RequestContextMiddleware)
 
 # ── Routers ────────────────────────────────────────────────────────────────────
 app.include_router(auth_router)
 app.include_router(upload_router)
 app.include_router(chat_router)
+app.include_router(admin_router)
 
 
 # ── Utility routes ─────────────────────────────────────────────────────────────
@@ -65,5 +117,19 @@ async def favicon():
 
 @app.get("/health", tags=["System"])
 async def health():
-    """Simple liveness probe."""
-    return {"status": "ok"}
\ No newline at end of file
+    """Liveness probe: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@app.get("/ready", tags=["System"])
+async def ready():
+    """Readiness probe: 200 once every backend client is up, else 503."""
+    report = readiness()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────────
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of request / stage latency and cache stats."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
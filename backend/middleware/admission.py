@@ -0,0 +1,311 @@
+"""
+Admission Control Middleware
+----------------------------
+Limits how much of the chat and upload workloads one caller – and everyone
+together – can put on the process, before any Gemini call or file write:
+
+  rate        token bucket per caller and workload: the Firebase UID when the
+              bearer token has already been verified, else the client IP –
+              an unverified token is not an identity, so minting tokens
+              buys no extra buckets or priority
+              → 429 + Retry-After when empty
+  per caller  at most ADMISSION_PER_CALLER running + queued requests per
+              workload → 429
+  pools       separate concurrency pools for chat and uploads, so a burst of
+              uploads never starves chat (and vice versa). When a pool is
+              full, requests wait in a priority queue – admins, then signed-in
+              users, then anonymous callers, FIFO within each class
+              → 503 + Retry-After when the queue is full or the wait exceeds
+              ADMISSION_QUEUE_TIMEOUT (load shedding)
+
+Slots are held until the last response byte is sent, so streamed answers
+count for their full duration. Everything else (history, status polling,
+health, metrics) passes straight through.
+
+Token buckets are pluggable: subclass BucketBackend, register it in
+_BACKENDS and select it with ADMISSION_BACKEND. "memory" (default) works out
+of the box, "none" disables rate limits but keeps the pools. Pools are always
+per process.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Type
+
+from core.config import (
+    ADMIN_UIDS, ADMISSION_BACKEND, ADMISSION_CHAT_BURST, ADMISSION_CHAT_CONCURRENCY,
+    ADMISSION_CHAT_RATE, ADMISSION_ENABLED, ADMISSION_MAX_CALLERS, ADMISSION_PER_CALLER,
+    ADMISSION_QUEUE_MAX, ADMISSION_QUEUE_TIMEOUT, ADMISSION_TRUST_PROXY,
+    ADMISSION_UPLOAD_BURST, ADMISSION_UPLOAD_CONCURRENCY, ADMISSION_UPLOAD_RATE,
+)
+from middleware.auth import cached_claims
+from services.metrics import register_collector, span
+
+# Priority classes, lower is served first
+ADMIN, USER, ANONYMOUS = 0, 1, 2
+
+# (method, path prefix) → workload
+_WORKLOADS: List[Tuple[str, str, str]] = [
+    ("POST", "/api/chat", "chat"),
+    ("POST", "/api/upload", "upload"),
+]
+
+# Live instances, read by the /metrics collector
+_middlewares: List["AdmissionControlMiddleware"] = []
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+# ── Token buckets ──────────────────────────────────────────────────────────────
+class BucketBackend:
+    """Rate-limit storage. Called on the event loop, so take() must be fast."""
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Consume one token; 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class NullBuckets(BucketBackend):
+    def take(self, key, rate, burst):
+        return 0.0
+
+
+class InMemoryBuckets(BucketBackend):
+    """Buckets in process memory, LRU-bounded to ADMISSION_MAX_CALLERS keys."""
+
+    def __init__(self, max_keys: int = ADMISSION_MAX_CALLERS) -> None:
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        # key → (tokens, updated_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key, rate, burst):
+        if rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            if tokens >= 1.0:
+                self._buckets[key] = (tokens - 1.0, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1.0 - tokens) / rate
+            self._buckets.move_to_end(key)
+            # A dropped caller just starts again with a full bucket
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+_BACKENDS: Dict[str, Type[BucketBackend]] = {
+    "memory": InMemoryBuckets,
+    "none":   NullBuckets,
+}
+
+
+# ── Concurrency pools ──────────────────────────────────────────────────────────
+class PriorityPool:
+    """
+    `capacity` slots handed out in (priority, arrival) order, with a bounded
+    waiting room. Event-loop only, no locking.
+    """
+
+    def __init__(self, name: str, capacity: int, queue_max: int, timeout: float) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.queue_max = queue_max
+        self.timeout = timeout
+        self.in_use = 0
+        self.queued = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for Retry-After
+        self._hold = 1.0
+        self.events = {"admitted": 0, "queued": 0, "shed": 0}
+
+    def retry_after(self) -> float:
+        return min(60.0, self._hold * (self.queued + 1) / max(1, self.capacity))
+
+    async def acquire(self, priority: int) -> None:
+        if self.in_use < self.capacity and not self.queued:
+            self.in_use += 1
+            self.events["admitted"] += 1
+            return
+        if self.queued >= self.queue_max:
+            self.events["shed"] += 1
+            raise Rejected(503, "Server is busy, please retry shortly.", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), waiter])
+        self.queued += 1
+        self.events["queued"] += 1
+        try:
+            with span(f"admission.{self.name}_wait"):
+                await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as we gave up – pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self.queued -= 1
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.events["shed"] += 1
+            raise Rejected(503, "Server is busy, please retry shortly.", self.retry_after())
+        self.events["admitted"] += 1
+
+    def release(self, held: Optional[float] = None) -> None:
+        if held is not None:
+            self._hold = 0.9 * self._hold + 0.1 * held
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # The slot moves straight to the waiter; in_use is unchanged
+                self.queued -= 1
+                waiter.set_result(None)
+                return
+        self.in_use -= 1
+
+
+class _Workload:
+    def __init__(self, name: str, rate: float, burst: int, concurrency: int) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.pool = PriorityPool(name, concurrency, ADMISSION_QUEUE_MAX, ADMISSION_QUEUE_TIMEOUT)
+        # caller → running + queued requests
+        self.active: Dict[str, int] = {}
+        self.rate_limited = 0
+
+
+# ── Callers ────────────────────────────────────────────────────────────────────
+def _headers(scope) -> Dict[str, str]:
+    return {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+
+def identify(scope) -> Tuple[str, int]:
+    """(caller key, priority class) for a request."""
+    headers = _headers(scope)
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        claims = cached_claims(token)
+        if claims is not None:
+            uid = claims.get("uid") or claims.get("user_id") or claims.get("sub", "")
+            return f"uid:{uid}", ADMIN if uid in ADMIN_UIDS else USER
+    # No token, or one not verified yet (the route verifies it): by address
+    forwarded = headers.get("x-forwarded-for", "")
+    if ADMISSION_TRUST_PROXY and forwarded:
+        ip = forwarded.split(",")[0].strip()
+    else:
+        ip = (scope.get("client") or ("unknown", 0))[0]
+    return f"ip:{ip}", ANONYMOUS
+
+
+# ── Middleware ─────────────────────────────────────────────────────────────────
+class AdmissionControlMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+        backend_cls = _BACKENDS.get(ADMISSION_BACKEND)
+        if backend_cls is None:
+            raise ValueError(
+                f"Unknown ADMISSION_BACKEND '{ADMISSION_BACKEND}'. "
+                f"Choose one of: {', '.join(_BACKENDS)}"
+            )
+        self.buckets = backend_cls()
+        self.workloads = {
+            "chat":   _Workload("chat", ADMISSION_CHAT_RATE, ADMISSION_CHAT_BURST,
+                                ADMISSION_CHAT_CONCURRENCY),
+            "upload": _Workload("upload", ADMISSION_UPLOAD_RATE, ADMISSION_UPLOAD_BURST,
+                                ADMISSION_UPLOAD_CONCURRENCY),
+        }
+        _middlewares.append(self)
+
+    def _workload(self, scope) -> Optional[_Workload]:
+        path = scope["path"].rstrip("/")
+        for method, prefix, name in _WORKLOADS:
+            if scope["method"] == method and (path == prefix or path.startswith(prefix + "/")):
+                return self.workloads[name]
+        return None
+
+    async def __call__(self, scope, receive, send):
+        workload = self._workload(scope) if scope["type"] == "http" and ADMISSION_ENABLED else None
+        if workload is None:
+            return await self.app(scope, receive, send)
+
+        caller, priority = identify(scope)
+        active = workload.active
+        try:
+            wait = self.buckets.take(f"{workload.name}:{caller}", workload.rate, workload.burst)
+            if wait > 0:
+                workload.rate_limited += 1
+                raise Rejected(429, "Too many requests, please slow down.", wait)
+            if active.get(caller, 0) >= ADMISSION_PER_CALLER:
+                workload.rate_limited += 1
+                raise Rejected(429, "Too many requests in progress.", 1)
+        except Rejected as exc:
+            return await _reject(send, exc)
+
+        active[caller] = active.get(caller, 0) + 1
+        try:
+            try:
+                await workload.pool.acquire(priority)
+            except Rejected as exc:
+                return await _reject(send, exc)
+            start = time.monotonic()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                workload.pool.release(time.monotonic() - start)
+        finally:
+            active[caller] -= 1
+            if not active[caller]:
+                del active[caller]
+
+
+async def _reject(send, exc: Rejected) -> None:
+    body = json.dumps({"detail": exc.detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": exc.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(exc.retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────────
+def _admission_stats() -> Dict[str, float]:
+    stats: Dict[str, float] = {}
+    for middleware in _middlewares:
+        for name, workload in middleware.workloads.items():
+            pool = workload.pool
+            stats[f"{name}_in_use"] = pool.in_use
+            stats[f"{name}_waiting"] = pool.queued
+            stats[f"{name}_rate_limited"] = workload.rate_limited
+            for event, count in pool.events.items():
+                stats[f"{name}_{event}"] = count
+    return stats
+
+
+register_collector(
+    "admission", "Admission control: pool occupancy and admitted / queued / shed / "
+    "rate-limited requests since start.", _admission_stats,
+)
@@ -3,53 +3,34 @@ Firebase Authentication Middleware
 ------------------------------------
 get_current_user          → requires valid token, raises 401 if missing/invalid
 get_current_user_optional → returns user dict if token present, None if not
+
+Decoded claims are cached per token (keyed by its SHA-256) until the token's
+`exp`, so a chatty client pays for RSA verification once per token instead of
+once per request. A background thread keeps the Google signing-cert set warm
+in firebase_admin's own HTTP cache (see _cert_source for the fallback) and
+drops cached tokens signed with keys that have been rotated out.
+
+firebase_admin is not imported here at module load; the Firebase app is
+initialised on the first verification, or earlier by the startup warm-up.
 """
 
+import base64
+import hashlib
 import json
-import os
-from typing import Optional
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Set, Tuple
 
-import firebase_admin
-from firebase_admin import auth, credentials
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from core.config import FIREBASE_CREDENTIALS_PATH, FIREBASE_PROJECT_ID
-
-
-# ── Init Firebase Admin SDK once ──────────────────────────────────────────────
-def _init_firebase() -> None:
-    if firebase_admin._apps:
-        return
-
-    # 1. Railway / production: read credentials from env var (JSON string)
-    cred_json = os.environ.get("FIREBASE_CREDENTIALS_JSON")
-    if cred_json:
-        try:
-            cred = credentials.Certificate(json.loads(cred_json))
-            firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
-            return
-        except Exception as e:
-            raise RuntimeError(f"Failed to load Firebase credentials from FIREBASE_CREDENTIALS_JSON: {e}")
-
-    # 2. Local dev: read credentials from file path in .env
-    if FIREBASE_CREDENTIALS_PATH:
-        try:
-            cred = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
-            firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
-            return
-        except Exception as e:
-            raise RuntimeError(f"Failed to load Firebase credentials from file path: {e}")
-
-    # 3. Last resort: GCP Application Default Credentials
-    try:
-        cred = credentials.ApplicationDefault()
-        firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
-    except Exception as e:
-        raise RuntimeError(f"No Firebase credentials found. Set FIREBASE_CREDENTIALS_JSON or FIREBASE_CREDENTIALS_PATH. Error: {e}")
-
+from core.config import AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_MAX_TTL, AUTH_CERTS_REFRESH_SECONDS
+from services.clients import init_firebase
+from services.metrics import register_collector, span
 
-_init_firebase()
+logger = logging.getLogger(__name__)
 
 _bearer_required = HTTPBearer(auto_error=True)
 _bearer_optional = HTTPBearer(auto_error=False)
@@ -76,10 +57,196 @@ def get_current_user_optional(
         return None
 
 
+# ── Verified-token cache ───────────────────────────────────────────────────────
+def _token_kid(token: str) -> Optional[str]:
+    """Key ID from the (unverified) JWT header."""
+    try:
+        header = token.split(".", 1)[0]
+        header += "=" * (-len(header) % 4)
+        return json.loads(base64.urlsafe_b64decode(header)).get("kid")
+    except Exception:
+        return None
+
+
+class _TokenCache:
+    """Bounded LRU of decoded claims, keyed by token hash, honouring `exp`."""
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES,
+                 max_ttl: float = AUTH_CACHE_MAX_TTL) -> None:
+        self._max_entries = max_entries
+        self._max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[dict, float, Optional[str]]]" = OrderedDict()
+        self._valid_kids: Optional[Set[str]] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at, kid = entry
+                if time.time() < expires_at and (
+                    self._valid_kids is None or kid in self._valid_kids
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def peek(self, token: str) -> Optional[dict]:
+        """Claims if cached and unexpired; no LRU or hit/miss bookkeeping."""
+        with self._lock:
+            entry = self._entries.get(self._key(token))
+        if entry is None or time.time() >= entry[1]:
+            return None
+        return entry[0]
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = min(float(claims.get("exp", 0)), time.time() + self._max_ttl)
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at, _token_kid(token))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def set_valid_kids(self, kids: Set[str]) -> None:
+        """Called on every cert refresh; evicts tokens signed with retired keys."""
+        with self._lock:
+            self._valid_kids = kids
+            retired = [k for k, (_, _, kid) in self._entries.items() if kid not in kids]
+            for k in retired:
+                del self._entries[k]
+        if retired:
+            logger.info("Signing keys rotated; evicted %d cached token(s)", len(retired))
+
+
+_token_cache = _TokenCache()
+register_collector(
+    "auth_token_cache_events", "Verified-token cache lookups since start.",
+    lambda: {"hits": _token_cache.hits, "misses": _token_cache.misses},
+)
+
+
+# ── Signing-cert prefetch ──────────────────────────────────────────────────────
+# Public endpoint Firebase ID tokens are signed against
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+_fallback_request: Optional[Callable] = None
+
+
+def _cert_source() -> Tuple[Callable, str]:
+    """
+    firebase_admin's own cert-fetch transport (a CacheControl session) and
+    the URL verify_id_token() reads the Google signing certs from, so a
+    prefetch fills the HTTP cache verification uses.
+
+    Those are firebase_admin internals. If they are not where expected, the
+    public cert URL is fetched with a plain google-auth transport instead:
+    rotated keys are still detected, but the first verification fetches
+    the certs itself.
+    """
+    global _fallback_request
+    init_firebase()
+    from firebase_admin import auth
+
+    try:
+        verifier = auth._get_client(None)._token_verifier
+        return verifier.request, verifier.id_token_verifier.cert_url
+    except AttributeError as exc:
+        if _fallback_request is None:
+            from google.auth.transport.requests import Request
+
+            logger.warning(
+                "firebase_admin's cert transport not found (%s); prefetch will not "
+                "warm verification, which fetches signing certs on first use", exc,
+            )
+            _fallback_request = Request()
+        return _fallback_request, GOOGLE_CERTS_URL
+
+
+class _CertRefresher(threading.Thread):
+    """Fetches the Google signing-cert set now and then on its max-age."""
+
+    def __init__(self) -> None:
+        super().__init__(name="firebase-certs", daemon=True)
+        self._stop_event = threading.Event()
+
+    def refresh(self) -> float:
+        """Fetch the cert set; returns seconds until the next refresh."""
+        request, url = _cert_source()
+        resp = request(url)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status} from {url}")
+        _token_cache.set_valid_kids(set(json.loads(resp.data)))
+        max_age = AUTH_CERTS_REFRESH_SECONDS
+        for part in resp.headers.get("Cache-Control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name == "max-age" and value.isdigit():
+                max_age = min(max_age, int(value))
+        return max(60.0, max_age)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                delay = self.refresh()
+            except Exception as exc:
+                logger.warning("Signing-cert refresh failed: %s", exc)
+                delay = 60.0
+            self._stop_event.wait(delay)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_refresher: Optional[_CertRefresher] = None
+
+
+def start_cert_refresher() -> None:
+    """Start background cert prefetching (lifespan startup)."""
+    global _refresher
+    if _refresher is None:
+        _refresher = _CertRefresher()
+        _refresher.start()
+
+
+def stop_cert_refresher() -> None:
+    global _refresher
+    if _refresher is not None:
+        _refresher.stop()
+        _refresher = None
+
+
+def cached_claims(token: str) -> Optional[dict]:
+    """Claims of an already verified token, without verifying (admission control)."""
+    return _token_cache.peek(token)
+
+
 # ── Shared verification logic ─────────────────────────────────────────────────
 def _verify_token(token: str) -> dict:
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+    # firebase_admin is imported (and the app initialised) on first use
+    init_firebase()
+    from firebase_admin import auth
+
     try:
-        return auth.verify_id_token(token)
+        with span("auth.verify"):
+            claims = auth.verify_id_token(token)
+        _token_cache.put(token, claims)
+        return claims
     except auth.ExpiredIdTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,146 @@
+"""
+Request Context Middleware
+--------------------------
+For every HTTP request:
+  • assigns a request ID (a sane incoming X-Request-ID is kept) and returns
+    it in the X-Request-ID response header
+  • makes the ID available to every log record as %(request_id)s
+  • records http_request_duration_seconds, measured until the last body
+    byte so streamed (SSE) responses count their full duration
+  • logs one structured line with status, duration and the request's spans
+  • with PROFILING_ENABLED, runs requests carrying `X-Profile: 1` under a
+    profiler and writes the report to PROFILE_DIR/<request_id>.(html|prof)
+
+Pure ASGI rather than BaseHTTPMiddleware, so streaming responses are not
+buffered and contextvars set here are visible to the endpoint.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+from core.config import LOG_LEVEL, PROFILING_ENABLED, PROFILE_HEADER, PROFILE_DIR
+from services.metrics import HTTP_DURATION, begin_spans
+
+logger = logging.getLogger(__name__)
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_VALID_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def configure_logging() -> None:
+    """Attach the current request ID to every log record."""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "_with_request_id", False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.request_id = request_id_var.get()
+        return record
+
+    record_factory._with_request_id = True
+    logging.setLogRecordFactory(record_factory)
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format="%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s",
+    )
+
+
+# ── Profiling ──────────────────────────────────────────────────────────────────
+class _Profiler:
+    """pyinstrument (sampling, async-aware) when installed, cProfile otherwise."""
+
+    def __init__(self) -> None:
+        try:
+            from pyinstrument import Profiler
+            self._impl, self._kind = Profiler(async_mode="enabled"), "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._impl, self._kind = cProfile.Profile(), "cprofile"
+
+    def start(self) -> None:
+        if self._kind == "pyinstrument":
+            self._impl.start()
+        else:
+            self._impl.enable()
+
+    def stop(self, request_id: str) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self._kind == "pyinstrument":
+            self._impl.stop()
+            path = os.path.join(PROFILE_DIR, f"{request_id}.html")
+            with open(path, "w") as fh:
+                fh.write(self._impl.output_html())
+        else:
+            self._impl.disable()
+            path = os.path.join(PROFILE_DIR, f"{request_id}.prof")
+            self._impl.dump_stats(path)
+        return path
+
+
+def _header(scope, name: str) -> str:
+    key = name.lower().encode("latin-1")
+    for k, v in scope.get("headers", []):
+        if k == key:
+            return v.decode("latin-1")
+    return ""
+
+
+# ── Middleware ─────────────────────────────────────────────────────────────────
+class RequestContextMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = _header(scope, "x-request-id")
+        request_id = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        spans = begin_spans()
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        profiler = None
+        if PROFILING_ENABLED and _header(scope, PROFILE_HEADER) in ("1", "true"):
+            profiler = _Profiler()
+            profiler.start()
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Route template, not the raw path, to keep label cardinality bounded
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_DURATION.observe(elapsed, scope["method"], route_path, str(status_code))
+            profile_path = profiler.stop(request_id) if profiler else None
+            logger.info(
+                "request %s",
+                json.dumps({
+                    "method":      scope["method"],
+                    "path":        scope["path"],
+                    "status":      status_code,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "spans":       spans,
+                    **({"profile": profile_path} if profile_path else {}),
+                }),
+            )
+            request_id_var.reset(token)
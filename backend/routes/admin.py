@@ -0,0 +1,88 @@
+"""
+Admin Routes
+------------
+Restricted to the Firebase UIDs listed in ADMIN_UIDS.
+
+  GET  /api/admin/collections   – vector counts per collection + session totals
+  POST /api/admin/sessions/gc   – evict idle sessions now (?ttl_seconds=)
+"""
+
+import asyncio
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from core.config import (
+    ADMIN_UIDS, COLLECTION_SHARDING, SESSION_TTL_SECONDS, VECTOR_BACKEND,
+)
+from middleware.auth import get_current_user
+from services.session_gc import collect_idle_sessions
+from services.session_registry import get_session_registry
+from services.vectorstore import collection_sizes
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    if current_user.get("uid") not in ADMIN_UIDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required.")
+    return current_user
+
+
+class CollectionInfo(BaseModel):
+    name: str
+    vectors: int
+    sessions: int = 0
+    chunks: int = 0
+    oldest_access: float | None = None
+    newest_access: float | None = None
+
+
+class CollectionsResponse(BaseModel):
+    backend: str
+    sharding: str
+    session_ttl_seconds: float
+    total_vectors: int
+    total_sessions: int
+    collections: List[CollectionInfo]
+
+
+class GCResponse(BaseModel):
+    evicted: int
+
+
+@router.get("/collections", response_model=CollectionsResponse)
+async def list_collections(_: dict = Depends(require_admin)):
+    sizes, tracked = await asyncio.gather(
+        asyncio.to_thread(collection_sizes),
+        asyncio.to_thread(get_session_registry().collections),
+    )
+    by_name = {row["collection"]: row for row in tracked}
+    collections = []
+    for size in sizes:
+        row = by_name.get(size["name"], {})
+        collections.append(CollectionInfo(
+            name=size["name"],
+            vectors=size["vectors"],
+            sessions=row.get("sessions", 0),
+            chunks=row.get("chunks") or 0,
+            oldest_access=row.get("oldest_access"),
+            newest_access=row.get("newest_access"),
+        ))
+    return CollectionsResponse(
+        backend=VECTOR_BACKEND,
+        sharding="session" if VECTOR_BACKEND == "numpy" else COLLECTION_SHARDING,
+        session_ttl_seconds=SESSION_TTL_SECONDS,
+        total_vectors=sum(c.vectors for c in collections),
+        total_sessions=sum(row["sessions"] for row in tracked),
+        collections=collections,
+    )
+
+
+@router.post("/sessions/gc", response_model=GCResponse)
+async def run_session_gc(
+    ttl_seconds: float = Query(SESSION_TTL_SECONDS, ge=0),
+    _: dict = Depends(require_admin),
+):
+    return GCResponse(evicted=await collect_idle_sessions(ttl_seconds))
@@ -1,11 +1,20 @@
-from typing import List, Optional
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from core.config import CHAT_BATCH_MAX_QUERIES, HISTORY_TURNS
 from middleware.auth import get_current_user_optional
-from services.chat_service import answer_query
-from services.chat_history import clear_history, get_history, save_message
+from services.chat_service import answer_batch, answer_query, stream_answer
+from services.chat_history import (
+    clear_history, get_clear_job, get_history, get_history_page, save_message,
+    start_clear_job,
+)
+from services.metrics import span
 
 router = APIRouter(prefix="/api/chat", tags=["Chat"])
 
@@ -15,9 +24,36 @@ class ChatRequest(BaseModel):
     session_id: str
 
 
+class ChatStats(BaseModel):
+    prompt_tokens: int
+    context_chunks: int
+    cached: bool
+    timings_ms: Dict[str, float]
+
+
 class ChatResponse(BaseModel):
     answer: str
     sources: List[str]
+    stats: ChatStats | None = None
+
+
+class BatchChatRequest(BaseModel):
+    queries: List[str]
+    session_id: str
+    stream: bool = False   # NDJSON, one result per line as it completes
+
+
+class BatchChatResult(BaseModel):
+    index: int             # position in `queries`
+    query: str
+    answer: str | None = None
+    sources: List[str] = []
+    stats: ChatStats | None = None
+    error: str | None = None
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult]
 
 
 class HistoryMessage(BaseModel):
@@ -30,11 +66,25 @@ class HistoryMessage(BaseModel):
 
 class HistoryResponse(BaseModel):
     messages: List[HistoryMessage]
+    has_more: bool = False
+    oldest_id: str | None = None   # pass as ?before= to page backwards
+    newest_id: str | None = None   # pass as ?after= for incremental sync
 
 
 class ClearHistoryResponse(BaseModel):
     message: str
     deleted_count: int
+    job_id: str | None = None
+    status: str = "done"
+
+
+async def _session_history(uid: Optional[str], session_id: str) -> List[dict]:
+    """The last HISTORY_TURNS turns of this chat session (served from cache)."""
+    if not uid or HISTORY_TURNS <= 0:
+        return []
+    with span("history.load"):
+        recent = await get_history(uid, limit=HISTORY_TURNS * 4)
+    return [m for m in recent if m.get("session_id") == session_id][-HISTORY_TURNS * 2:]
 
 
 @router.post("", response_model=ChatResponse)
@@ -44,17 +94,27 @@ async def chat(
 ):
     try:
         uid = current_user.get("uid") if current_user else None
+        history = await _session_history(uid, request.session_id)
 
         if uid:
-            save_message(uid, role="user", content=request.query)
+            with span("history.save_user"):
+                await save_message(
+                    uid, role="user", content=request.query, session_id=request.session_id
+                )
 
         # Pass session_id so only this session's docs are used
-        answer, sources = answer_query(request.query, request.session_id)
+        answer, sources, stats = await answer_query(
+            request.query, request.session_id, history=history
+        )
 
         if uid:
-            save_message(uid, role="assistant", content=answer, sources=sources)
+            with span("history.save_assistant"):
+                await save_message(
+                    uid, role="assistant", content=answer, sources=sources,
+                    session_id=request.session_id,
+                )
 
-        return ChatResponse(answer=answer, sources=sources)
+        return ChatResponse(answer=answer, sources=sources, stats=ChatStats(**stats))
 
     except HTTPException:
         raise
@@ -62,15 +122,159 @@ async def chat(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+):
+    """
+    Server-Sent Events variant of POST /api/chat.
+
+    Event stream:
+      event: sources  data: {"sources": [...]}   (sent as soon as retrieval is done)
+      event: token    data: {"text": "..."}      (one per LLM chunk)
+      event: done     data: {"answer": "...", "sources": [...], "stats": {...}}
+      event: error    data: {"detail": "..."}
+
+    The full answer is persisted to chat history once the stream finishes.
+    """
+    uid = current_user.get("uid") if current_user else None
+
+    async def save_user_turn() -> None:
+        with span("history.save_user"):
+            await save_message(
+                uid, role="user", content=request.query, session_id=request.session_id
+            )
+
+    async def events() -> AsyncIterator[str]:
+        history = await _session_history(uid, request.session_id)
+        # Persist the user turn concurrently with retrieval instead of
+        # holding the first byte back for a Firestore round trip.
+        user_saved = asyncio.create_task(save_user_turn()) if uid else None
+        parts: List[str] = []
+        sources: List[str] = []
+        stats: dict = {}
+        try:
+            async for kind, payload in stream_answer(
+                request.query, request.session_id, history=history
+            ):
+                if kind == "sources":
+                    sources = payload
+                    yield _sse("sources", {"sources": sources})
+                elif kind == "stats":
+                    stats = payload
+                else:
+                    parts.append(payload)
+                    yield _sse("token", {"text": payload})
+        except Exception as exc:
+            if user_saved:
+                await asyncio.gather(user_saved, return_exceptions=True)
+            yield _sse("error", {"detail": str(exc)})
+            return
+
+        answer = "".join(parts)
+        if uid:
+            try:
+                await user_saved
+                with span("history.save_assistant"):
+                    await save_message(
+                        uid, role="assistant", content=answer, sources=sources,
+                        session_id=request.session_id,
+                    )
+            except Exception as exc:
+                yield _sse("error", {"detail": f"Failed to save chat history: {exc}"})
+                return
+        yield _sse("done", {"answer": answer, "sources": sources, "stats": stats})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch", response_model=BatchChatResponse)
+async def chat_batch(
+    request: BatchChatRequest,
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+):
+    """
+    Answer many standalone questions about one session in a single request
+    (evaluation runs, FAQ generation). Questions share one embedding call and
+    one grouped vector search; answers are generated CHAT_BATCH_CONCURRENCY
+    at a time. Nothing is written to chat history.
+
+    With "stream": true the response is NDJSON: one BatchChatResult per line,
+    in completion order. Otherwise all results come back at once, in input
+    order. A failed question sets `error` on its own result only.
+
+    Login required: one admitted request fans out into many Gemini calls, so
+    batches are limited to verified users (keyed by UID in admission control).
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Login required for batch questions.")
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries given.")
+    if len(request.queries) > CHAT_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CHAT_BATCH_MAX_QUERIES} queries per batch.",
+        )
+    if not all(q.strip() for q in request.queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty.")
+
+    async def results() -> AsyncIterator[BatchChatResult]:
+        async for indices, outcome in answer_batch(request.queries, request.session_id):
+            for index in indices:
+                if isinstance(outcome, Exception):
+                    yield BatchChatResult(index=index, query=request.queries[index], error=str(outcome))
+                else:
+                    answer, sources, stats = outcome
+                    yield BatchChatResult(
+                        index=index, query=request.queries[index], answer=answer,
+                        sources=sources, stats=ChatStats(**stats),
+                    )
+
+    if request.stream:
+        async def lines() -> AsyncIterator[str]:
+            async for result in results():
+                yield result.model_dump_json() + "\n"
+
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    with span("chat.batch"):
+        collected = [result async for result in results()]
+    return BatchChatResponse(results=sorted(collected, key=lambda r: r.index))
+
+
 @router.get("/history", response_model=HistoryResponse)
 async def fetch_history(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
     current_user: Optional[dict] = Depends(get_current_user_optional),
 ):
+    """
+    Cursor-paginated history.
+      ?before=<id>  older page,   ?after=<id> or ?since=<ISO time>  only new messages
+    """
     if not current_user:
         return HistoryResponse(messages=[])
+    if before and (after or since):
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after'/'since'.")
     uid = current_user["uid"]
-    messages = get_history(uid, limit=limit)
+    messages, has_more = await get_history_page(
+        uid, limit=limit, before=before, after=after, since=since
+    )
     return HistoryResponse(
         messages=[
             HistoryMessage(
@@ -81,14 +285,51 @@ async def fetch_history(
                 timestamp=str(m["timestamp"]) if m.get("timestamp") else None,
             )
             for m in messages
-        ]
+        ],
+        has_more=has_more,
+        oldest_id=messages[0]["id"] if messages else None,
+        newest_id=messages[-1]["id"] if messages else None,
     )
 
 
 @router.delete("/history", response_model=ClearHistoryResponse)
-async def delete_history(current_user: Optional[dict] = Depends(get_current_user_optional)):
+async def delete_history(
+    background: bool = False,
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+):
+    """
+    Clear the user's chat history.
+    With ?background=true the delete runs as a job; poll
+    GET /api/chat/history/clear/{job_id} for the running count.
+    """
     if not current_user:
         raise HTTPException(status_code=401, detail="Login required to clear history.")
     uid = current_user["uid"]
-    count = clear_history(uid)
-    return ClearHistoryResponse(message="Chat history cleared.", deleted_count=count)
\ No newline at end of file
+    if background:
+        job = await start_clear_job(uid)
+        return ClearHistoryResponse(
+            message="Clearing chat history.", deleted_count=0,
+            job_id=job["id"], status=job["status"],
+        )
+    count = await clear_history(uid)
+    return ClearHistoryResponse(message="Chat history cleared.", deleted_count=count)
+
+
+@router.get("/history/clear/{job_id}", response_model=ClearHistoryResponse)
+async def clear_history_status(
+    job_id: str,
+    current_user: Optional[dict] = Depends(get_current_user_optional),
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Login required.")
+    job = await get_clear_job(job_id)
+    if job is None or job["user_uid"] != current_user["uid"]:
+        raise HTTPException(status_code=404, detail="Clear job not found.")
+    message = {
+        "running": "Clearing chat history.",
+        "done":    "Chat history cleared.",
+        "failed":  f"Clearing chat history failed: {job['error']}",
+    }[job["status"]]
+    return ClearHistoryResponse(
+        message=message, deleted_count=job["deleted"], job_id=job["id"], status=job["status"],
+    )
@@ -1,43 +1,197 @@
+import asyncio
+import time
+import uuid
+from typing import List
+
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from pydantic import BaseModel
 
-from services.document_processor import process_upload
-from services.vectorstore import get_vectorstore
+from services.document_processor import save_bulk_upload, save_upload
+from services.ingestion_queue import get_ingestion_queue
+from services.metrics import span
 
 router = APIRouter(prefix="/api/upload", tags=["Upload"])
 
 
-class UploadResponse(BaseModel):
+class UploadJobResponse(BaseModel):
     message: str
+    job_id: str
+    status: str
+    filename: str
+
+
+class UploadStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    session_id: str
+    pages_parsed: int
+    chunks_total: int
+    chunks_embedded: int
     chunks_added: int
+    chunks_reused: int
+    attempts: int
+    error: str | None = None
+
+
+class SkippedFile(BaseModel):
     filename: str
+    reason: str
+
+
+class BulkUploadResponse(BaseModel):
+    message: str
+    batch_id: str
+    jobs: List[UploadJobResponse]
+    skipped: List[SkippedFile]
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str            # "queued" | "running" | "done" | "partial" | "failed"
+    files_total: int
+    files_done: int
+    files_failed: int
+    pages_parsed: int
+    chunks_total: int
+    chunks_added: int
+    chunks_reused: int
+    elapsed_seconds: float
+    files: List[UploadStatusResponse]
+
+
+def _job_status(job: dict) -> UploadStatusResponse:
+    return UploadStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        filename=job["filename"],
+        session_id=job["session_id"],
+        pages_parsed=job["pages_parsed"],
+        chunks_total=job["chunks_total"],
+        chunks_embedded=job["chunks_embedded"],
+        chunks_added=job["chunks_added"],
+        chunks_reused=job["chunks_reused"],
+        attempts=job["attempts"],
+        error=job["error"],
+    )
+
+
+def _batch_status(jobs: List[dict]) -> str:
+    states = {job["status"] for job in jobs}
+    if states <= {"done"}:
+        return "done"
+    if states <= {"failed"}:
+        return "failed"
+    if states <= {"done", "failed"}:
+        return "partial"
+    return "running" if states & {"running", "done", "failed"} else "queued"
 
 
-@router.post("", response_model=UploadResponse)
+@router.post("", response_model=UploadJobResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     session_id: str = Form(...),
 ):
     """
-    Upload a PDF document tagged with a session_id.
+    Upload a document (PDF, TXT/MD, HTML, DOCX, CSV/TSV, XLSX, JSON/JSONL)
+    tagged with a session_id.
     Only chunks from this session will be used in chat.
+
+    The file is queued for background ingestion; poll
+    GET /api/upload/{job_id} for progress.
     """
     try:
-        chunks = await process_upload(file)
+        with span("upload.save"):
+            path = await save_upload(file)
+        with span("upload.enqueue"):
+            job = await asyncio.to_thread(
+                get_ingestion_queue().enqueue, session_id, file.filename, path
+            )
+        return UploadJobResponse(
+            message="Document queued for indexing.",
+            job_id=job["id"],
+            status=job["status"],
+            filename=file.filename,
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
 
-        # Tag every chunk with the session_id
-        for chunk in chunks:
-            chunk.metadata["session_id"] = session_id
 
-        vectorstore = get_vectorstore()
-        vectorstore.add_documents(documents=chunks)
+@router.get("/{job_id}", response_model=UploadStatusResponse)
+async def upload_status(job_id: str):
+    """Report parse / embed progress and errors for an ingestion job."""
+    with span("upload.status"):
+        job = await asyncio.to_thread(get_ingestion_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found.")
+    return _job_status(job)
 
-        return UploadResponse(
-            message="Document uploaded and indexed successfully.",
-            chunks_added=len(chunks),
-            filename=file.filename,
+
+@router.post("/bulk", response_model=BulkUploadResponse, status_code=202)
+async def upload_bulk(
+    files: List[UploadFile] = File(...),
+    session_id: str = Form(...),
+):
+    """
+    Upload many documents – individual files and/or ZIP archives – in one
+    request. Archives are unpacked member by member; unsupported files are
+    reported under `skipped`. Every stored file becomes an ingestion job of
+    one batch; poll GET /api/upload/batch/{batch_id} for the aggregate report.
+    """
+    try:
+        with span("upload.save_bulk"):
+            stored, skipped = await save_bulk_upload(files)
+        if not stored:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": "No supported files in upload.",
+                        "skipped": [{"filename": f, "reason": r} for f, r in skipped]},
+            )
+        batch_id = uuid.uuid4().hex
+        with span("upload.enqueue"):
+            jobs = await asyncio.to_thread(
+                get_ingestion_queue().enqueue_many, session_id, stored, batch_id
+            )
+        return BulkUploadResponse(
+            message=f"{len(jobs)} document(s) queued for indexing.",
+            batch_id=batch_id,
+            jobs=[
+                UploadJobResponse(
+                    message="Document queued for indexing.",
+                    job_id=job["id"], status=job["status"], filename=job["filename"],
+                )
+                for job in jobs
+            ],
+            skipped=[SkippedFile(filename=f, reason=r) for f, r in skipped],
         )
     except HTTPException:
         raise
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def batch_status(batch_id: str):
+    """Aggregate and per-file progress of a bulk upload."""
+    with span("upload.status"):
+        jobs = await asyncio.to_thread(get_ingestion_queue().get_batch, batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Upload batch not found.")
+
+    status = _batch_status(jobs)
+    finished = max(job["updated_at"] for job in jobs) if status in ("done", "partial", "failed") else time.time()
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        status=status,
+        files_total=len(jobs),
+        files_done=sum(job["status"] == "done" for job in jobs),
+        files_failed=sum(job["status"] == "failed" for job in jobs),
+        pages_parsed=sum(job["pages_parsed"] for job in jobs),
+        chunks_total=sum(job["chunks_total"] for job in jobs),
+        chunks_added=sum(job["chunks_added"] for job in jobs),
+        chunks_reused=sum(job["chunks_reused"] for job in jobs),
+        elapsed_seconds=round(finished - min(job["created_at"] for job in jobs), 1),
+        files=[_job_status(job) for job in jobs],
+    )
@@ -0,0 +1,221 @@
+"""
+Answer Cache
+------------
+Sits in front of the Gemini call in answer_query / stream_answer.
+
+  key         → (session_id, normalized query)
+  validation  → an entry is only served if the retriever returned the same
+                set of chunk IDs it was generated from
+  eviction    → LRU, bounded by ANSWER_CACHE_MAX_ENTRIES, plus a TTL
+  invalidate  → entries carry the session's indexed_at stamp (session
+                registry); the ingestion worker moves it when it adds chunks,
+                so answers cached before are dropped in every API process.
+                invalidate_session(session_id) drops them in this one.
+
+Backends are pluggable: subclass AnswerCacheBackend, register it in
+_BACKENDS and select it with ANSWER_CACHE_BACKEND. "memory" (default) works
+out of the box, "none" disables caching.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Type
+
+from langchain_core.documents import Document
+
+from core.config import (
+    ANSWER_CACHE_BACKEND, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+)
+from services.metrics import register_collector
+
+CacheKey = Tuple[str, str]
+
+# Words that do not change what is being asked
+_FILLER = {"please", "pls", "hi", "hello", "hey", "thanks", "thank", "you", "kindly"}
+
+
+# ── Keys ───────────────────────────────────────────────────────────────────────
+def normalize_query(query: str) -> str:
+    """Case-fold, strip punctuation and filler words, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    # Keep SKU / policy-code characters (A-12, 3.5, x/y) intact
+    text = re.sub(r"[^\w\s\-./]", " ", text)
+    words = [w.strip(".-/") for w in text.split()]
+    return " ".join(w for w in words if w and w not in _FILLER)
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable identifier for a retrieved chunk."""
+    if getattr(doc, "id", None):
+        return doc.id
+    raw = f"{doc.metadata.get('source')}|{doc.metadata.get('page')}|{doc.page_content}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(docs: Iterable[Document]) -> FrozenSet[str]:
+    return frozenset(chunk_id(d) for d in docs)
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[str]
+    chunk_ids: FrozenSet[str]
+    indexed_at: float = 0.0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+class AnswerCacheBackend:
+    """Storage interface. Implementations must be safe to call from any thread."""
+
+    def get(self, key: CacheKey) -> Optional[CachedAnswer]:
+        raise NotImplementedError
+
+    def set(self, key: CacheKey, entry: CachedAnswer) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: CacheKey) -> None:
+        raise NotImplementedError
+
+    def invalidate_session(self, session_id: str) -> int:
+        raise NotImplementedError
+
+
+class NullBackend(AnswerCacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, entry):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def invalidate_session(self, session_id):
+        return 0
+
+
+class InMemoryBackend(AnswerCacheBackend):
+    """LRU + TTL cache in process memory."""
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, CachedAnswer]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created_at > self._ttl:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_session(self, session_id):
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == session_id]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+
+_BACKENDS: Dict[str, Type[AnswerCacheBackend]] = {
+    "memory": InMemoryBackend,
+    "none":   NullBackend,
+}
+
+
+# ── Cache front-end ────────────────────────────────────────────────────────────
+class AnswerCache:
+    """Normalizes keys, validates chunk IDs and keeps hit/miss counters."""
+
+    def __init__(self, backend: AnswerCacheBackend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def lookup(
+        self, session_id: str, query: str, docs: List[Document], indexed_at: float = 0.0,
+    ) -> Optional[CachedAnswer]:
+        key = (session_id, normalize_query(query))
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.chunk_ids != chunk_ids(docs) or entry.indexed_at != indexed_at:
+            # Retrieval or the session's documents changed under the answer
+            self.backend.delete(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(
+        self, session_id: str, query: str, docs: List[Document],
+        answer: str, sources: List[str], indexed_at: float = 0.0,
+    ) -> None:
+        key = (session_id, normalize_query(query))
+        self.backend.set(key, CachedAnswer(answer, sources, chunk_ids(docs), indexed_at))
+
+    def invalidate_session(self, session_id: str) -> int:
+        return self.backend.invalidate_session(session_id)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits":    self.hits,
+            "misses":  self.misses,
+            "stale":   self.stale,
+        }
+
+
+_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _cache
+    if _cache is None:
+        backend_cls = _BACKENDS.get(ANSWER_CACHE_BACKEND)
+        if backend_cls is None:
+            raise ValueError(
+                f"Unknown ANSWER_CACHE_BACKEND '{ANSWER_CACHE_BACKEND}'. "
+                f"Choose one of: {', '.join(_BACKENDS)}"
+            )
+        _cache = AnswerCache(backend_cls())
+    return _cache
+
+
+register_collector(
+    "answer_cache_events", "Answer cache lookups since start.",
+    lambda: {k: v for k, v in get_answer_cache().stats().items() if k != "backend"},
+)
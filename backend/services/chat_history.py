@@ -7,97 +7,684 @@ Firestore schema:
     ├── role:       "user" | "assistant"
     ├── content:    str
     ├── sources:    list[str]   (only on assistant messages)
-    └── timestamp:  server timestamp
+    ├── session_id: str         (chat session the turn belongs to, if known)
+    └── timestamp:  time the message was saved (UTC)
 
 Each user gets their own sub-collection, so history is isolated per account.
+All helpers are coroutines backed by the async Firestore client, so they never
+block the event loop.
+
+Writes are write-behind: save_message assigns the document ID client-side,
+queues the message and returns. A background flusher coalesces queued
+messages from all requests into Firestore batch writes, flushing every
+HISTORY_FLUSH_INTERVAL seconds or once HISTORY_BATCH_SIZE messages are
+waiting, and once more on shutdown. get_history merges a user's unflushed
+messages into what Firestore returns.
+
+A batch failing with a transient error (unavailable, deadline, aborted,
+quota) is retried with capped backoff until it commits. Meanwhile the
+bounded queue fills and save_message falls back to direct writes, so an
+outage surfaces on the request path. Whatever is still unflushed when the
+process stops is spilled to HISTORY_SPILL_DIR and re-sent by the next
+process to start (set() by document ID, so a double send is harmless).
+A batch rejected for good (e.g. an oversized message) is split until the
+offending messages are isolated; those are logged and written to
+HISTORY_SPILL_DIR/dead_letter instead of blocking the messages behind them.
+
+Reads are served from a per-user cache of recent messages that save_message
+keeps up to date; only pages older than the cached window go to Firestore.
+
+Background clears are tracked in Firestore, so any API process can report
+on them:
+
+  history_clear_jobs/{job_id}
+    ├── user_uid, status ("running" | "done" | "failed"), deleted, error
+    └── created_at, updated_at   (updated_at is a heartbeat while running)
 """
 
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timezone
-from typing import List
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import (
+    HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_QUEUE_MAX,
+    HISTORY_BACKPRESSURE, HISTORY_ENQUEUE_TIMEOUT, HISTORY_SPILL_DIR,
+    HISTORY_CACHE_SIZE, HISTORY_CACHE_USERS, HISTORY_CACHE_TTL, HISTORY_CLEAR_PARALLEL,
+)
+from services.clients import init_firebase
+
+logger = logging.getLogger(__name__)
 
-from firebase_admin import firestore
-from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+# Firestore rejects batches with more than 500 writes
+_FIRESTORE_BATCH_LIMIT = 500
+# Commit attempts per batch during shutdown, before spilling to disk
+_STOP_ATTEMPTS = 3
+# Messages Firestore rejected for good; not re-sent on start
+_DEAD_LETTER_DIR = "dead_letter"
 
-from core.config import FIREBASE_PROJECT_ID
+Item = Tuple[str, str, dict]
 
 
-# ── Firestore client (reused across requests) ─────────────────────────────────
+# ── Firestore client (reused across requests) ──────────────────────────────────
 def _db():
-    return firestore.client()
+    # Imported on first use; the Firestore SDK (gRPC) is slow to import
+    from firebase_admin import firestore_async
+
+    init_firebase()
+    return firestore_async.client()
+
+
+async def ping() -> None:
+    """One cheap Firestore round trip (a point read), used by the warm-up."""
+    await _db().collection("chat_sessions").document("_ping").get()
+
+
+def _messages(user_uid: str):
+    return _db().collection("chat_sessions").document(user_uid).collection("messages")
+
+
+def _to_message(doc_id: str, data: dict) -> dict:
+    return {
+        "id":         doc_id,
+        "role":       data.get("role"),
+        "content":    data.get("content"),
+        "sources":    data.get("sources", []),
+        "session_id": data.get("session_id"),
+        "timestamp":  data.get("timestamp"),
+    }
+
+
+def _transient(exc: BaseException) -> bool:
+    """Whether a failed write is worth retrying as is."""
+    from google.api_core import exceptions
+
+    return isinstance(exc, (
+        exceptions.ServiceUnavailable, exceptions.DeadlineExceeded, exceptions.Aborted,
+        exceptions.ResourceExhausted, asyncio.TimeoutError, ConnectionError,
+    ))
+
+
+def _backoff(attempt: int) -> float:
+    return min(2 ** attempt, 10)
+
+
+# ── Spill files ────────────────────────────────────────────────────────────────
+def _spill(items: List[Item], subdir: str = "") -> str:
+    """Write messages to a new file in HISTORY_SPILL_DIR (or a subdirectory)."""
+    directory = os.path.join(HISTORY_SPILL_DIR, subdir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex}.jsonl")
+    with open(path + ".tmp", "w") as fh:
+        for user_uid, doc_id, payload in items:
+            fh.write(json.dumps({
+                "uid": user_uid, "id": doc_id,
+                "payload": {**payload, "timestamp": payload["timestamp"].isoformat()},
+            }) + "\n")
+    # Complete files only, so a starting process never reads a partial one
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _read_spilled() -> Tuple[List[str], List[Item]]:
+    paths = sorted(glob.glob(os.path.join(HISTORY_SPILL_DIR, "*.jsonl")))
+    items = []
+    for path in paths:
+        with open(path) as fh:
+            for line in fh:
+                row = json.loads(line)
+                payload = row["payload"]
+                payload["timestamp"] = datetime.fromisoformat(payload["timestamp"])
+                items.append((row["uid"], row["id"], payload))
+    return paths, items
+
+
+# ── Write-behind buffer ────────────────────────────────────────────────────────
+class _WriteBehindBuffer:
+    def __init__(self) -> None:
+        self._queue: "asyncio.Queue[Item]" = asyncio.Queue(HISTORY_QUEUE_MAX)
+        # uid → {doc_id: payload} not yet committed, for read-your-writes
+        self._pending: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self._inflight: List[Item] = []
+        # Held while a batch commit is on the wire; see discard_user
+        self._committing = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        paths, spilled = await asyncio.to_thread(_read_spilled)
+        for user_uid, doc_id, payload in spilled:
+            self._pending[user_uid][doc_id] = payload
+        if spilled:
+            logger.info("Re-sending %d chat message(s) spilled at last shutdown", len(spilled))
+        self._task = asyncio.create_task(self._run(paths, spilled))
+
+    async def stop(self) -> None:
+        """Flush everything still queued, spill what cannot be, stop the flusher."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Re-send a batch interrupted mid-commit; set() is idempotent
+        unsent = await self._flush(self._inflight, attempts=_STOP_ATTEMPTS)
+        while not self._queue.empty():
+            items = self._drain(_FIRESTORE_BATCH_LIMIT)
+            if unsent:
+                # Firestore is down: spill the rest without waiting on it again
+                unsent += items
+            else:
+                unsent += await self._flush(items, attempts=_STOP_ATTEMPTS)
+        unsent = self._live(unsent)
+        if unsent:
+            path = await asyncio.to_thread(_spill, unsent)
+            logger.error("Spilled %d unflushed chat message(s) to %s", len(unsent), path)
+
+    async def put(self, user_uid: str, doc_id: str, payload: dict) -> None:
+        self._pending[user_uid][doc_id] = payload
+        item = (user_uid, doc_id, payload)
+        try:
+            if HISTORY_BACKPRESSURE == "block":
+                await asyncio.wait_for(self._queue.put(item), HISTORY_ENQUEUE_TIMEOUT)
+            else:
+                self._queue.put_nowait(item)
+            return
+        except (asyncio.TimeoutError, asyncio.QueueFull):
+            pass
+        # Buffer saturated: fall back to a direct write on the request path
+        try:
+            await _messages(user_uid).document(doc_id).set(payload)
+        finally:
+            self._forget(user_uid, doc_id)
+
+    def pending(self, user_uid: str) -> List[dict]:
+        return [_to_message(i, p) for i, p in self._pending.get(user_uid, {}).items()]
+
+    async def discard_user(self, user_uid: str) -> None:
+        """
+        Drop a user's unflushed messages (history is being cleared). Queued
+        and retrying batches skip them from now on; a commit already on the
+        wire is waited for, so whatever it writes is there for the clear to
+        delete.
+        """
+        self._pending.pop(user_uid, None)
+        if any(it[0] == user_uid for it in self._inflight):
+            async with self._committing:
+                pass
+
+    def _live(self, items: List[Item]) -> List[Item]:
+        """`items` still pending, i.e. not committed or discarded since queued."""
+        return [it for it in items if it[1] in self._pending.get(it[0], {})]
+
+    def _forget(self, user_uid: str, doc_id: str) -> None:
+        user_pending = self._pending.get(user_uid)
+        if user_pending is not None:
+            user_pending.pop(doc_id, None)
+            if not user_pending:
+                del self._pending[user_uid]
+
+    def _drain(self, limit: int) -> List[Item]:
+        items = []
+        while len(items) < limit and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _run(self, spill_paths: List[str], spilled: List[Item]) -> None:
+        if spilled:
+            self._inflight = spilled
+            await self._flush(spilled)
+            self._inflight = []
+        for path in spill_paths:
+            # Another process starting at the same time may have re-sent it too
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + HISTORY_FLUSH_INTERVAL
+            while len(items) < HISTORY_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._inflight = items
+            await self._flush(items)
+            self._inflight = []
+
+    async def _flush(self, items: List[Item], attempts: Optional[int] = None) -> List[Item]:
+        """
+        Commit `items` in batches of at most 500, retrying transient failures
+        with capped backoff – until a batch commits, or `attempts` times if
+        given. Returns the items that were not committed.
+        """
+        unsent: List[Item] = []
+        for start in range(0, len(items), _FIRESTORE_BATCH_LIMIT):
+            unsent += await self._send(items[start:start + _FIRESTORE_BATCH_LIMIT], attempts)
+        return unsent
+
+    async def _send(self, part: List[Item], attempts: Optional[int]) -> List[Item]:
+        try:
+            if not await self._commit(part, attempts):
+                return self._live(part)
+        except Exception as exc:
+            # Rejected for good: halve the batch until the culprits are alone
+            part = self._live(part)
+            if len(part) > 1:
+                mid = len(part) // 2
+                return await self._send(part[:mid], attempts) + await self._send(part[mid:], attempts)
+            if part:
+                await self._dead_letter(part, exc)
+            return []
+        for user_uid, doc_id, _ in part:
+            self._forget(user_uid, doc_id)
+        return []
+
+    async def _commit(self, part: List[Item], attempts: Optional[int]) -> bool:
+        """
+        True once `part` is committed, False after `attempts` transient
+        failures. Messages discarded meanwhile are left out of every attempt;
+        permanent errors are raised.
+        """
+        attempt = 0
+        while True:
+            live = self._live(part)
+            if not live:
+                return True
+            try:
+                batch = _db().batch()
+                for user_uid, doc_id, payload in live:
+                    batch.set(_messages(user_uid).document(doc_id), payload)
+                async with self._committing:
+                    await batch.commit()
+                return True
+            except Exception as exc:
+                if not _transient(exc):
+                    raise
+                attempt += 1
+                logger.warning(
+                    "History flush of %d message(s) failed (attempt %d): %s", len(live), attempt, exc,
+                )
+                if attempts is not None and attempt >= attempts:
+                    return False
+                await asyncio.sleep(_backoff(attempt))
+
+    async def _dead_letter(self, items: List[Item], exc: Exception) -> None:
+        path = await asyncio.to_thread(_spill, items, _DEAD_LETTER_DIR)
+        for user_uid, doc_id, _ in items:
+            logger.error(
+                "Chat message %s of user %s rejected by Firestore (%s); written to %s",
+                doc_id, user_uid, exc, path,
+            )
+            self._forget(user_uid, doc_id)
+
+
+_buffer: Optional[_WriteBehindBuffer] = None
+
+
+async def start_history_writer() -> None:
+    """Start the write-behind flusher (lifespan startup)."""
+    global _buffer
+    if _buffer is None:
+        _buffer = _WriteBehindBuffer()
+        await _buffer.start()
+
+
+async def stop_history_writer() -> None:
+    """Flush queued messages and stop the flusher (lifespan shutdown)."""
+    global _buffer
+    if _buffer is not None:
+        await _buffer.stop()
+        _buffer = None
 
 
 # ── Public helpers ─────────────────────────────────────────────────────────────
 
-def save_message(
+async def save_message(
     user_uid: str,
     role: str,
     content: str,
     sources: List[str] | None = None,
+    session_id: str | None = None,
 ) -> str:
     """
-    Persist a single message to Firestore.
-    Returns the auto-generated document ID.
+    Persist a single message to Firestore (write-behind when the flusher is
+    running). Returns the auto-generated document ID.
     """
-    doc_ref = (
-        _db()
-        .collection("chat_sessions")
-        .document(user_uid)
-        .collection("messages")
-        .document()           # auto-ID
-    )
+    doc_ref = _messages(user_uid).document()   # auto-ID, assigned client-side
     payload = {
         "role":      role,
         "content":   content,
-        "timestamp": SERVER_TIMESTAMP,
+        # Client time keeps turn order even when turns share one batch commit
+        "timestamp": datetime.now(timezone.utc),
     }
     if sources is not None:
         payload["sources"] = sources
+    if session_id is not None:
+        payload["session_id"] = session_id
 
-    doc_ref.set(payload)
+    if _buffer is not None:
+        await _buffer.put(user_uid, doc_ref.id, payload)
+    else:
+        await doc_ref.set(payload)
+    _history_cache.append(user_uid, _to_message(doc_ref.id, payload))
     return doc_ref.id
 
 
-def get_history(user_uid: str, limit: int = 50) -> List[dict]:
+def _sort(messages) -> List[dict]:
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(messages, key=lambda m: m["timestamp"] or epoch)
+
+
+def _with_pending(user_uid: str, messages: List[dict]) -> List[dict]:
+    if _buffer is None:
+        return messages
+    merged = {m["id"]: m for m in messages}
+    for m in _buffer.pending(user_uid):
+        merged.setdefault(m["id"], m)
+    return _sort(merged.values())
+
+
+def _page(messages: List[dict], limit: int, before: Optional[str], after: Optional[str],
+          since: Optional[datetime], complete: bool) -> Optional[Tuple[List[dict], bool]]:
     """
-    Fetch the most recent `limit` messages for a user, ordered oldest-first.
+    Slice an oldest-first window of a user's most recent messages.
+    Returns None when the window cannot answer the request on its own.
+    """
+    ids = [m["id"] for m in messages]
+    if before is not None:
+        if before not in ids:
+            return None
+        older = messages[:ids.index(before)]
+        if len(older) < limit and not complete:
+            return None
+        return older[-limit:], len(older) > limit or not complete
+    if after is not None:
+        if after not in ids:
+            return None
+        newer = messages[ids.index(after) + 1:]
+    elif since is not None:
+        # The window holds everything after `since` only if it reaches back past it
+        oldest = messages[0]["timestamp"] if messages else None
+        if not complete and (oldest is None or oldest > since):
+            return None
+        newer = [m for m in messages if m["timestamp"] and m["timestamp"] > since]
+    else:
+        return messages[-limit:], len(messages) > limit or not complete
+    return newer[:limit], len(newer) > limit
+
+
+# ── Recent-history cache ───────────────────────────────────────────────────────
+class _HistoryCache:
     """
-    docs = (
-        _db()
-        .collection("chat_sessions")
-        .document(user_uid)
-        .collection("messages")
+    Per-user window of the HISTORY_CACHE_SIZE most recent messages, kept
+    warm by save_message so hot history reads never touch Firestore.
+    Bounded by HISTORY_CACHE_USERS (LRU); entries are reloaded after
+    HISTORY_CACHE_TTL to pick up writes made by other processes.
+    """
+
+    def __init__(self) -> None:
+        # uid → (messages oldest-first, complete, loaded_at)
+        self._users: "OrderedDict[str, Tuple[List[dict], bool, float]]" = OrderedDict()
+
+    def get(self, user_uid: str) -> Optional[Tuple[List[dict], bool]]:
+        entry = self._users.get(user_uid)
+        if entry is None or time.monotonic() - entry[2] > HISTORY_CACHE_TTL:
+            self._users.pop(user_uid, None)
+            return None
+        self._users.move_to_end(user_uid)
+        return entry[0], entry[1]
+
+    def load(self, user_uid: str, messages: List[dict], complete: bool) -> None:
+        self._users[user_uid] = (messages[-HISTORY_CACHE_SIZE:], complete, time.monotonic())
+        self._users.move_to_end(user_uid)
+        while len(self._users) > HISTORY_CACHE_USERS:
+            self._users.popitem(last=False)
+
+    def append(self, user_uid: str, message: dict) -> None:
+        entry = self._users.get(user_uid)
+        if entry is None:
+            return
+        messages, complete, loaded_at = entry
+        messages.append(message)
+        if len(messages) > HISTORY_CACHE_SIZE:
+            del messages[0]
+            complete = False
+        self._users[user_uid] = (messages, complete, loaded_at)
+
+    def reset(self, user_uid: str) -> None:
+        self.load(user_uid, [], complete=True)
+
+    def drop(self, user_uid: str) -> None:
+        self._users.pop(user_uid, None)
+
+
+_history_cache = _HistoryCache()
+
+
+async def _load_window(user_uid: str) -> Tuple[List[dict], bool]:
+    cached = _history_cache.get(user_uid)
+    if cached is not None:
+        return cached
+    docs = await (
+        _messages(user_uid)
         .order_by("timestamp")
-        .limit_to_last(limit)   # newest N, then reversed to oldest-first
+        .limit_to_last(HISTORY_CACHE_SIZE)
         .get()
     )
-    return [
-        {
-            "id":        doc.id,
-            "role":      doc.get("role"),
-            "content":   doc.get("content"),
-            "sources":   doc.get("sources", []),
-            "timestamp": doc.get("timestamp"),
-        }
-        for doc in docs
-    ]
-
-
-def clear_history(user_uid: str) -> int:
+    messages = _with_pending(user_uid, [_to_message(d.id, d.to_dict()) for d in docs])
+    complete = len(docs) < HISTORY_CACHE_SIZE
+    _history_cache.load(user_uid, messages, complete)
+    return messages, complete
+
+
+async def _query_page(user_uid: str, limit: int, before: Optional[str], after: Optional[str],
+                      since: Optional[datetime]) -> Tuple[List[dict], bool]:
+    """Cursor query straight against Firestore for pages outside the cache window."""
+    query = _messages(user_uid).order_by("timestamp")
+    if before is not None or after is not None:
+        cursor = await _messages(user_uid).document(before or after).get()
+        if not cursor.exists:
+            return [], False
+        if before is not None:
+            docs = await query.end_before(cursor).limit_to_last(limit + 1).get()
+            page = [_to_message(d.id, d.to_dict()) for d in docs]
+            return page[-limit:], len(page) > limit
+        query = query.start_after(cursor)
+    elif since is not None:
+        from google.cloud.firestore_v1 import FieldFilter
+
+        query = query.where(filter=FieldFilter("timestamp", ">", since))
+    docs = await query.limit(limit + 1).get()
+    page = [_to_message(d.id, d.to_dict()) for d in docs]
+    return page[:limit], len(page) > limit
+
+
+async def get_history_page(
+    user_uid: str,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> Tuple[List[dict], bool]:
+    """
+    Page through a user's history, oldest-first within the page.
+
+      before=<message id> → the `limit` messages preceding that message
+      after=<message id>  → up to `limit` messages following it
+      since=<datetime>    → up to `limit` messages saved after that time
+      (none)              → the most recent `limit` messages
+
+    Returns (messages, has_more). Served from the per-user cache whenever
+    the requested page lies inside the cached window.
+    """
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    messages, complete = await _load_window(user_uid)
+    page = _page(messages, limit, before, after, since, complete)
+    if page is not None:
+        return page
+    return await _query_page(user_uid, limit, before, after, since)
+
+
+async def get_history(user_uid: str, limit: int = 50) -> List[dict]:
+    """
+    Fetch the most recent `limit` messages for a user, ordered oldest-first.
+    Includes messages still waiting in the write-behind buffer.
+    """
+    messages, _ = await get_history_page(user_uid, limit=limit)
+    return messages
+
+
+async def clear_history(
+    user_uid: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
     """
     Delete all messages for a user.
     Returns the number of messages deleted.
+
+    Streams through the collection in pages of document references (no
+    fields are read) and deletes each page in its own batch of at most 500
+    writes, with up to HISTORY_CLEAR_PARALLEL batches committing while the
+    next page is fetched. Memory stays flat however large the history is.
+    The cached window is emptied once every delete has committed; if one
+    fails it is dropped instead, so the next read goes to Firestore.
     """
-    col_ref = (
-        _db()
-        .collection("chat_sessions")
-        .document(user_uid)
-        .collection("messages")
+    if _buffer is not None:
+        await _buffer.discard_user(user_uid)
+
+    # Projecting on __name__ returns document references without field data
+    query = (
+        _messages(user_uid)
+        .order_by("__name__")
+        .select(["__name__"])
+        .limit(_FIRESTORE_BATCH_LIMIT)
     )
-    docs  = col_ref.list_documents()
-    batch = _db().batch()
-    count = 0
-    for doc in docs:
-        batch.delete(doc)
-        count += 1
-    batch.commit()
-    return count
\ No newline at end of file
+    slots = asyncio.Semaphore(HISTORY_CLEAR_PARALLEL)
+    commits: List[asyncio.Task] = []
+    deleted = 0
+
+    async def commit(refs) -> None:
+        nonlocal deleted
+        try:
+            batch = _db().batch()
+            for ref in refs:
+                batch.delete(ref)
+            await batch.commit()
+            deleted += len(refs)
+            if on_progress:
+                on_progress(deleted)
+        finally:
+            slots.release()
+
+    last = None
+    try:
+        while True:
+            page = await (query.start_after(last) if last else query).get()
+            if not page:
+                break
+            await slots.acquire()
+            commits.append(asyncio.create_task(commit([doc.reference for doc in page])))
+            if len(page) < _FIRESTORE_BATCH_LIMIT:
+                break
+            last = page[-1]
+    except BaseException:
+        await asyncio.gather(*commits, return_exceptions=True)
+        _history_cache.drop(user_uid)
+        raise
+    results = await asyncio.gather(*commits, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        _history_cache.drop(user_uid)
+        raise errors[0]
+    _history_cache.reset(user_uid)
+    return deleted
+
+
+# ── Background clears ──────────────────────────────────────────────────────────
+# Seconds between progress writes of a running clear; a job silent for
+# _CLEAR_JOB_STALE seconds lost its process and is reported as failed
+_CLEAR_JOB_HEARTBEAT = 1.0
+_CLEAR_JOB_STALE = 30.0
+# Keeps running clears referenced until they finish
+_clear_tasks: Set[asyncio.Task] = set()
+
+
+def _clear_job_doc(job_id: str):
+    return _db().collection("history_clear_jobs").document(job_id)
+
+
+async def start_clear_job(user_uid: str) -> dict:
+    """Run clear_history in the background; poll get_clear_job for progress."""
+    now = datetime.now(timezone.utc)
+    job = {
+        "user_uid":   user_uid,
+        "status":     "running",
+        "deleted":    0,
+        "error":      None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    doc = _clear_job_doc(uuid.uuid4().hex)
+    await doc.set(job)
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(_CLEAR_JOB_HEARTBEAT)
+            try:
+                await doc.set(
+                    {"deleted": job["deleted"], "updated_at": datetime.now(timezone.utc)}, merge=True,
+                )
+            except Exception as exc:
+                logger.warning("Recording progress of history clear %s failed: %s", doc.id, exc)
+
+    async def run() -> None:
+        beat = asyncio.create_task(heartbeat())
+        try:
+            job["deleted"] = await clear_history(
+                user_uid, on_progress=lambda n: job.update(deleted=n)
+            )
+            job["status"] = "done"
+        except Exception as exc:
+            logger.exception("Background history clear for %s failed", user_uid)
+            job["status"] = "failed"
+            job["error"]  = str(exc)
+        finally:
+            beat.cancel()
+            await asyncio.gather(beat, return_exceptions=True)
+        # Until this lands the job reads as running, then as stale
+        for attempt in range(_STOP_ATTEMPTS):
+            job["updated_at"] = datetime.now(timezone.utc)
+            try:
+                await doc.set(job)
+                return
+            except Exception as exc:
+                logger.warning("Recording the end of history clear %s failed: %s", doc.id, exc)
+                await asyncio.sleep(min(2 ** attempt, 10))
+
+    task = asyncio.create_task(run())
+    _clear_tasks.add(task)
+    task.add_done_callback(_clear_tasks.discard)
+    return {"id": doc.id, **job}
+
+
+async def get_clear_job(job_id: str) -> Optional[dict]:
+    snapshot = await _clear_job_doc(job_id).get()
+    if not snapshot.exists:
+        return None
+    job = {"id": job_id, **snapshot.to_dict()}
+    age = (datetime.now(timezone.utc) - job["updated_at"]).total_seconds()
+    if job["status"] == "running" and age > _CLEAR_JOB_STALE:
+        job["status"] = "failed"
+        job["error"]  = "The server running this clear stopped; clear the history again."
+    return job
@@ -1,9 +1,23 @@
-from typing import List, Tuple
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
 
-from core.config import GOOGLE_API_KEY, CHAT_MODEL
-from services.vectorstore import get_session_retriever
+from core.config import (
+    MAX_PROMPT_TOKENS, MIN_CHUNK_TOKENS, CONDENSE_HISTORY_TOKENS, CHAT_BATCH_CONCURRENCY,
+)
+from services.answer_cache import get_answer_cache
+from services.clients import get_registry
+from services.metrics import span
+from services.session_registry import get_session_registry
+from services.tokens import count_tokens, truncate_tokens
+from services.vectorstore import get_session_retriever, retrieve_many
+
+logger = logging.getLogger(__name__)
 
 RAG_PROMPT_TEMPLATE = """\
 You are a helpful retail document assistant.
@@ -18,30 +32,288 @@ Question: {question}
 
 Answer:"""
 
+CONDENSE_PROMPT_TEMPLATE = """\
+Given the conversation below and a follow-up question, rewrite the follow-up \
+as a single standalone question that can be understood without the conversation. \
+Keep product names, SKUs and codes exactly as written. \
+Reply with the standalone question only.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+
+Standalone question:"""
+
+
+def _build_llm() -> BaseChatModel:
+    return get_registry().llm
+
+
+NO_DOCS_ANSWER = (
+    "I couldn't find any relevant documents for this session. Please upload a PDF first."
+)
+
+
+class _Stats:
+    """Prompt size and per-stage latency for one query."""
+
+    def __init__(self) -> None:
+        self.timings_ms: Dict[str, float] = {}
+        self.prompt_tokens = 0
+        self.context_chunks = 0
+        self.cached = False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            with span(f"chat.{name}"):
+                yield
+        finally:
+            self.timings_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "prompt_tokens":  self.prompt_tokens,
+            "context_chunks": self.context_chunks,
+            "cached":         self.cached,
+            "timings_ms":     self.timings_ms,
+        }
+
+
+# ── Conversation condensation ──────────────────────────────────────────────────
+def _format_history(history: List[dict]) -> str:
+    """Most recent turns that fit CONDENSE_HISTORY_TOKENS, oldest-first."""
+    lines: List[str] = []
+    budget = CONDENSE_HISTORY_TOKENS
+    for message in reversed(history):
+        line = f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+        cost = count_tokens(line)
+        if cost > budget:
+            break
+        lines.append(line)
+        budget -= cost
+    return "\n".join(reversed(lines))
+
+
+async def _condense(query: str, history: Optional[List[dict]]) -> str:
+    """Rewrite a follow-up into a standalone question using recent turns."""
+    if not history:
+        return query
+    transcript = _format_history(history)
+    if not transcript:
+        return query
+    response = await _build_llm().ainvoke(
+        CONDENSE_PROMPT_TEMPLATE.format(history=transcript, question=query)
+    )
+    return response.content.strip() or query
+
+
+# ── Prompt building ────────────────────────────────────────────────────────────
+def _build_prompt(query: str, docs: List[Document]) -> Tuple[str, int, int]:
+    """
+    Fill the RAG prompt with as many retrieved chunks as fit the budget,
+    in retrieval rank order; the last one is truncated if worthwhile.
+    Returns (prompt, prompt_tokens, chunks_used).
+    """
+    budget = MAX_PROMPT_TOKENS - count_tokens(
+        RAG_PROMPT_TEMPLATE.format(context="", question=query)
+    )
+    parts: List[str] = []
+    for doc in docs:
+        cost = count_tokens(doc.page_content) + 1  # + separator
+        if cost <= budget:
+            parts.append(doc.page_content)
+            budget -= cost
+            continue
+        if budget >= MIN_CHUNK_TOKENS:
+            truncated = truncate_tokens(doc.page_content, budget - 1)
+            if truncated:
+                parts.append(truncated)
+        break
+
+    prompt = RAG_PROMPT_TEMPLATE.format(context="\n\n".join(parts), question=query)
+    return prompt, count_tokens(prompt), len(parts)
+
+
+def _sources(docs: List[Document]) -> List[str]:
+    return list({d.metadata.get("source", "Unknown") for d in docs})
+
 
-def _build_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(model=CHAT_MODEL, google_api_key=GOOGLE_API_KEY)
+async def _indexed_at(session_id: str) -> float:
+    """The session's indexed_at stamp, which cached answers must match."""
+    return await asyncio.to_thread(get_session_registry().indexed_at, session_id)
 
 
-def answer_query(query: str, session_id: str) -> Tuple[str, List[str]]:
+async def _retrieve(
+    query: str, session_id: str, history: Optional[List[dict]], stats: _Stats
+) -> Tuple[str, List[Document], float]:
+    with stats.stage("condense"):
+        standalone = await _condense(query, history)
+    with stats.stage("retrieve"):
+        docs, indexed_at = await asyncio.gather(
+            get_session_retriever(session_id).ainvoke(standalone), _indexed_at(session_id),
+        )
+    return standalone, docs, indexed_at
+
+
+def _log(session_id: str, stats: _Stats) -> None:
+    logger.info("chat session=%s %s", session_id, stats.as_dict())
+
+
+async def answer_query(
+    query: str, session_id: str, history: Optional[List[dict]] = None,
+) -> Tuple[str, List[str], dict]:
     """
     Run the RAG pipeline for a specific session.
-    Only retrieves chunks uploaded in this session.
+    Only retrieves chunks uploaded in this session. `history` holds the
+    session's recent turns (oldest-first) used to resolve follow-ups.
+    Returns (answer, sources, stats).
     """
-    retriever = get_session_retriever(session_id)
-    docs = retriever.invoke(query)
+    stats = _Stats()
+    standalone, docs, indexed_at = await _retrieve(query, session_id, history, stats)
 
     if not docs:
-        return (
-            "I couldn't find any relevant documents for this session. Please upload a PDF first.",
-            [],
-        )
+        return NO_DOCS_ANSWER, [], stats.as_dict()
+
+    cache  = get_answer_cache()
+    cached = cache.lookup(session_id, standalone, docs, indexed_at)
+    if cached:
+        stats.cached = True
+        _log(session_id, stats)
+        return cached.answer, cached.sources, stats.as_dict()
+
+    with stats.stage("prompt"):
+        prompt, stats.prompt_tokens, stats.context_chunks = _build_prompt(standalone, docs)
+    with stats.stage("generate"):
+        response = await _build_llm().ainvoke(prompt)
+    sources = _sources(docs)
+
+    cache.store(session_id, standalone, docs, response.content, sources, indexed_at)
+    _log(session_id, stats)
+    return response.content, sources, stats.as_dict()
+
+
+async def stream_answer(
+    query: str, session_id: str, history: Optional[List[dict]] = None,
+) -> AsyncIterator[Tuple[str, Union[str, List[str], dict]]]:
+    """
+    Streaming variant of answer_query.
+    Yields ("sources", [...]) once retrieval is done, then ("token", text)
+    for every chunk the LLM produces, then ("stats", {...}).
+    """
+    started = time.perf_counter()
+    stats = _Stats()
+    standalone, docs, indexed_at = await _retrieve(query, session_id, history, stats)
+
+    if not docs:
+        yield "sources", []
+        yield "token", NO_DOCS_ANSWER
+        yield "stats", stats.as_dict()
+        return
+
+    cache  = get_answer_cache()
+    cached = cache.lookup(session_id, standalone, docs, indexed_at)
+    if cached:
+        stats.cached = True
+        yield "sources", cached.sources
+        yield "token", cached.answer
+        _log(session_id, stats)
+        yield "stats", stats.as_dict()
+        return
+
+    sources = _sources(docs)
+    yield "sources", sources
+
+    with stats.stage("prompt"):
+        prompt, stats.prompt_tokens, stats.context_chunks = _build_prompt(standalone, docs)
+    parts = []
+    with stats.stage("generate"):
+        async for chunk in _build_llm().astream(prompt):
+            if chunk.content:
+                if not parts:
+                    stats.timings_ms["first_token"] = round(
+                        (time.perf_counter() - started) * 1000, 1
+                    )
+                parts.append(chunk.content)
+                yield "token", chunk.content
+
+    cache.store(session_id, standalone, docs, "".join(parts), sources, indexed_at)
+    _log(session_id, stats)
+    yield "stats", stats.as_dict()
+
+
+# ── Batch ──────────────────────────────────────────────────────────────────────
+async def answer_batch(
+    queries: List[str], session_id: str, concurrency: int = CHAT_BATCH_CONCURRENCY,
+) -> AsyncIterator[Tuple[List[int], Union[Tuple[str, List[str], dict], Exception]]]:
+    """
+    answer_query for many standalone questions of one session (no history).
+    Retrieval is shared – see retrieve_many – and at most `concurrency` LLM
+    calls run at once. Repeated questions are answered once.
+    Yields (indices into `queries`, (answer, sources, stats) or the exception)
+    as each answer completes.
+    """
+    positions: Dict[str, List[int]] = {}
+    for i, query in enumerate(queries):
+        positions.setdefault(query, []).append(i)
+    unique = list(positions)
+
+    start = time.perf_counter()
+    try:
+        with span("chat.batch_retrieve"):
+            retrieved, indexed_at = await asyncio.gather(
+                retrieve_many(session_id, unique), _indexed_at(session_id),
+            )
+    except Exception as exc:
+        for query in unique:
+            yield positions[query], exc
+        return
+    retrieve_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    cache = get_answer_cache()
+    llm = _build_llm()
+    slots = asyncio.Semaphore(concurrency)
 
-    context = "\n\n".join(d.page_content for d in docs)
-    prompt  = RAG_PROMPT_TEMPLATE.format(context=context, question=query)
+    async def answer(query: str, docs: List[Document]) -> Tuple[str, List[str], dict]:
+        stats = _Stats()
+        stats.timings_ms["retrieve"] = retrieve_ms
+        if not docs:
+            return NO_DOCS_ANSWER, [], stats.as_dict()
+        cached = cache.lookup(session_id, query, docs, indexed_at)
+        if cached:
+            stats.cached = True
+            return cached.answer, cached.sources, stats.as_dict()
+        with stats.stage("prompt"):
+            prompt, stats.prompt_tokens, stats.context_chunks = _build_prompt(query, docs)
+        with stats.stage("queue"):
+            await slots.acquire()
+        try:
+            with stats.stage("generate"):
+                response = await llm.ainvoke(prompt)
+        finally:
+            slots.release()
+        sources = _sources(docs)
+        cache.store(session_id, query, docs, response.content, sources, indexed_at)
+        return response.content, sources, stats.as_dict()
 
-    llm      = _build_llm()
-    response = llm.invoke(prompt)
-    sources  = list({d.metadata.get("source", "Unknown") for d in docs})
+    async def run(query: str, docs: List[Document]):
+        try:
+            return query, await answer(query, docs)
+        except Exception as exc:
+            return query, exc
 
-    return response.content, sources
\ No newline at end of file
+    tasks = [asyncio.create_task(run(q, docs)) for q, docs in zip(unique, retrieved)]
+    try:
+        for done in asyncio.as_completed(tasks):
+            query, result = await done
+            yield positions[query], result
+    finally:
+        # The client went away mid-stream: stop generating
+        for task in tasks:
+            task.cancel()
+    logger.info(
+        "chat batch session=%s queries=%d unique=%d retrieve_ms=%s",
+        session_id, len(queries), len(unique), retrieve_ms,
+    )
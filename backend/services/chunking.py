@@ -0,0 +1,320 @@
+"""
+Chunking
+--------
+Token-measured, structure-aware chunking (sizes in TOKEN_ENCODING tokens, see
+services/tokens.py).
+
+Prose – PDF pages, text, HTML, DOCX paragraphs – is parsed into headings,
+paragraphs and tables, and blocks are packed greedily into chunks of up to
+CHUNK_TOKENS:
+
+  - a chunk never spans two pages, and a heading always starts a new chunk;
+    the current heading is repeated at the top of every chunk it covers
+  - tables are cut only between rows, with the header row repeated
+  - a paragraph larger than a chunk is cut between sentences (lines, then
+    words, as a last resort). Only those cuts overlap, by whole trailing
+    sentences up to CHUNK_OVERLAP_TOKENS; cuts on block boundaries need none
+  - a trailing fragment under CHUNK_MIN_TOKENS joins the previous chunk
+
+Tabular records go through pack_rows() instead: rows are packed on row
+boundaries and never cut.
+
+Both run inside the parser process pool (see services/extractors.py), so the
+pages of a large file are chunked in parallel across cores.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from core.config import CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS
+from services.tokens import count_tokens
+
+# (text, tokens)
+Piece = Tuple[str, int]
+
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*$")
+_NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[A-Z]\.)\s+[A-Z][^.!?;]{0,80}$")
+_SENTENCE_END     = re.compile(r"(?<=[.!?])\s+")
+
+
+# ── Block parsing ──────────────────────────────────────────────────────────────
+def _heading_of(line: str) -> Optional[str]:
+    """Heading text if the line is one on its own: markdown, numbered or ALL CAPS."""
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        return match.group(1)
+    if len(line) > 80 or line.endswith((".", ",", ";", ":")):
+        return None
+    if _NUMBERED_HEADING.match(line):
+        return line
+    letters = sum(c.isalpha() for c in line)
+    if letters >= 3 and line.isupper() and len(line.split()) <= 10:
+        return line
+    return None
+
+
+def _looks_like_title(lines: List[str]) -> bool:
+    """A short, unpunctuated, capitalised paragraph of one line, e.g. 'Exchanges'."""
+    if len(lines) != 1:
+        return False
+    line = lines[0]
+    return (
+        len(line.split()) <= 10 and line[:1].isupper()
+        and not line.endswith((".", ",", ";", ":", "!", "?"))
+    )
+
+
+def _is_table_row(line: str) -> bool:
+    return " | " in line or "\t" in line
+
+
+def blocks(text: str) -> Iterator[Tuple[str, object]]:
+    """
+    ("heading", str), ("paragraph", str) and ("table", [row, …]) blocks in
+    order. Paragraphs are separated by blank lines; table rows are lines
+    with ' | ' or tab separated cells (as the extractors render them).
+    """
+    paragraph: List[str] = []
+    table: List[str] = []
+
+    def flush() -> Iterator[Tuple[str, object]]:
+        if paragraph:
+            if _looks_like_title(paragraph):
+                yield "heading", paragraph[0]
+            else:
+                yield "paragraph", "\n".join(paragraph)
+            paragraph.clear()
+        if table:
+            yield "table", list(table)
+            table.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            yield from flush()
+            continue
+        if _is_table_row(line):
+            if paragraph:
+                yield from flush()
+            table.append(line)
+            continue
+        if table:
+            yield from flush()
+        heading = _heading_of(line)
+        if heading:
+            yield from flush()
+            yield "heading", heading
+            continue
+        paragraph.append(line)
+    yield from flush()
+
+
+# ── Oversized paragraphs ───────────────────────────────────────────────────────
+def _split_words(line: str, tokens: int, budget: int) -> List[Piece]:
+    words = line.split()
+    parts = -(-tokens * 11 // (budget * 10))  # ~10% headroom for uneven words
+    size = max(1, -(-len(words) // parts))
+    pieces = (" ".join(words[i:i + size]) for i in range(0, len(words), size))
+    return [(p, count_tokens(p)) for p in pieces]
+
+
+def _split_paragraph(text: str, budget: int) -> List[Piece]:
+    """Pieces within `budget`: sentences, else lines, else runs of words."""
+    pieces: List[Piece] = []
+    for sentence in _SENTENCE_END.split(text):
+        tokens = count_tokens(sentence)
+        if tokens <= budget:
+            pieces.append((sentence, tokens))
+            continue
+        for line in sentence.splitlines():
+            tokens = count_tokens(line)
+            if tokens <= budget:
+                pieces.append((line, tokens))
+            else:
+                pieces.extend(_split_words(line, tokens, budget))
+    return [p for p in pieces if p[0]]
+
+
+def _pack_pieces(pieces: List[Piece], budget: int) -> List[Piece]:
+    """
+    Greedy packing of one paragraph's pieces. Each new chunk starts with the
+    trailing pieces of the previous one, up to CHUNK_OVERLAP_TOKENS.
+    """
+    packed: List[Piece] = []
+    current: List[Piece] = []
+    size = 0
+    for text, tokens in pieces:
+        if current and size + tokens > budget:
+            packed.append((" ".join(t for t, _ in current), size))
+            carry: List[Piece] = []
+            carried = 0
+            for piece in reversed(current):
+                if carried + piece[1] > CHUNK_OVERLAP_TOKENS:
+                    break
+                carry.insert(0, piece)
+                carried += piece[1]
+            if carried + tokens > budget:
+                carry, carried = [], 0
+            current, size = carry, carried
+        current.append((text, tokens))
+        size += tokens
+    if current:
+        packed.append((" ".join(t for t, _ in current), size))
+    return packed
+
+
+# ── Packing ────────────────────────────────────────────────────────────────────
+class _Packer:
+    def __init__(self) -> None:
+        self.chunks: List[Document] = []
+        self.metadata: dict = {}
+        self.heading = ""
+        self.heading_tokens = 0
+        self.parts: List[str] = []
+        self.size = 0
+        # Whether any chunk has been emitted under the current heading
+        self.covered = False
+        # Tokens in the last chunk, while it can still absorb a small tail
+        self.last_tokens: Optional[int] = None
+
+    @property
+    def budget(self) -> int:
+        return max(CHUNK_MIN_TOKENS, CHUNK_TOKENS - self.heading_tokens)
+
+    def page(self, metadata: dict) -> None:
+        """Start a new page; the current heading carries over."""
+        self.flush()
+        self.metadata = metadata
+        self.last_tokens = None
+
+    def _emit(self, body: str, tokens: int) -> None:
+        metadata = dict(self.metadata)
+        if self.heading:
+            metadata["section"] = self.heading
+        self.chunks.append(Document(
+            page_content=f"{self.heading}\n{body}" if self.heading else body,
+            metadata=metadata,
+        ))
+        self.covered = True
+        self.last_tokens = tokens
+
+    def flush(self) -> None:
+        if not self.parts:
+            return
+        body = "\n\n".join(self.parts)
+        if (
+            self.size < CHUNK_MIN_TOKENS and self.last_tokens is not None
+            and self.last_tokens + self.size <= CHUNK_TOKENS + CHUNK_MIN_TOKENS
+        ):
+            last = self.chunks[-1]
+            last.page_content = f"{last.page_content}\n\n{body}"
+            self.last_tokens += self.size
+        else:
+            self._emit(body, self.size)
+        self.parts, self.size = [], 0
+
+    def add_heading(self, text: str) -> None:
+        # A heading with nothing under it (e.g. a table of contents entry) is
+        # kept as a line of the next section rather than dropped
+        orphan = self.heading if not (self.parts or self.covered) else ""
+        self.flush()
+        self.last_tokens = None
+        self.covered = False
+        self.heading = text
+        self.heading_tokens = count_tokens(text) + 1
+        if orphan:
+            self._add(orphan, count_tokens(orphan))
+
+    def _add(self, text: str, tokens: int) -> None:
+        if self.parts and self.size + tokens > self.budget:
+            self.flush()
+        self.parts.append(text)
+        self.size += tokens
+
+    def add_paragraph(self, text: str) -> None:
+        tokens = count_tokens(text)
+        if tokens <= self.budget:
+            self._add(text, tokens)
+            return
+        self.flush()
+        packed = _pack_pieces(_split_paragraph(text, self.budget), self.budget)
+        for body, size in packed[:-1]:
+            self._emit(body, size)
+        # The tail stays open so the next block can fill the chunk up
+        self.parts, self.size = [packed[-1][0]], packed[-1][1]
+
+    def add_table(self, rows: List[str]) -> None:
+        text = "\n".join(rows)
+        tokens = count_tokens(text)
+        if tokens <= self.budget:
+            self._add(text, tokens)
+            return
+        self.flush()
+        header, data = (rows[0], rows[1:]) if len(rows) > 1 else ("", rows)
+        header_tokens = count_tokens(header) + 1 if header else 0
+        lines = [header] if header else []
+        size = header_tokens
+        for row in data:
+            row_tokens = count_tokens(row) + 1
+            if len(lines) > bool(header) and size + row_tokens > self.budget:
+                self._emit("\n".join(lines), size)
+                lines, size = ([header] if header else []), header_tokens
+            lines.append(row)
+            size += row_tokens
+        self.parts, self.size = ["\n".join(lines)], size
+
+
+def chunk_documents(documents: Iterable[Document]) -> List[Document]:
+    """Chunk consecutive pages (or whole documents) of one file."""
+    packer = _Packer()
+    for doc in documents:
+        packer.page(doc.metadata)
+        for kind, value in blocks(doc.page_content):
+            if kind == "heading":
+                packer.add_heading(value)
+            elif kind == "table":
+                packer.add_table(value)
+            else:
+                packer.add_paragraph(value)
+    packer.flush()
+    return packer.chunks
+
+
+def pack_rows(
+    rows: Iterable[Tuple[int, str]], metadata: dict, heading: str = "",
+) -> List[Document]:
+    """
+    Pack (row_number, text) records into chunks of up to CHUNK_TOKENS on
+    row boundaries. A row larger than that becomes a chunk of its own rather
+    than being cut. `heading` (e.g. the sheet name) prefixes every chunk.
+    """
+    chunks: List[Document] = []
+    lines: List[str] = []
+    first = last = 0
+    base = count_tokens(heading) + 1 if heading else 0
+    size = base
+
+    def flush() -> None:
+        body = "\n".join(lines)
+        chunks.append(Document(
+            page_content=f"{heading}\n{body}" if heading else body,
+            metadata={**metadata, "row_start": first, "row_end": last},
+        ))
+
+    for row_number, text in rows:
+        if not text:
+            continue
+        tokens = count_tokens(text) + 1
+        if lines and size + tokens > CHUNK_TOKENS:
+            flush()
+            lines, size = [], base
+        if not lines:
+            first = row_number
+        lines.append(text)
+        size += tokens
+        last = row_number
+    if lines:
+        flush()
+    return chunks
@@ -0,0 +1,234 @@
+"""
+Client Registry
+---------------
+Process-wide holder for the expensive SDK clients used by the RAG pipeline:
+
+  chroma      → one Chroma client: HttpClient for VECTOR_BACKEND=chroma_cloud
+                (keep-alive HTTP session, auth set up once) or an embedded
+                PersistentClient for chroma_local
+  embeddings  → one GoogleGenerativeAIEmbeddings, behind the persistent
+                embedding cache (services/embedding_cache.py)
+  llm         → one ChatGoogleGenerativeAI
+  vectorstore → vector stores cached per collection name (collection handle
+                is looked up once, not on every request); NumpyVectorStore
+                for VECTOR_BACKEND=numpy
+  firebase    → the firebase_admin app (auth + Firestore), see init_firebase()
+
+The registry is created on first use via get_registry() – in the app, by the
+startup warm-up – and closed in the FastAPI lifespan hook in main.py on
+shutdown.
+
+The SDKs (chromadb, langchain_chroma, langchain_google_genai, firebase_admin)
+are imported inside the builders, not at module load: together they take
+seconds to import, and the API should start serving /health before that.
+The startup warm-up (services/warmup.py) builds them in the background.
+"""
+
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from langchain_core.vectorstores import VectorStore
+
+from core.config import (
+    GOOGLE_API_KEY, CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE,
+    CHROMA_PERSIST_DIR, NUMPY_STORE_DIR, VECTOR_BACKEND, CHAT_MODEL, EMBEDDING_MODEL,
+    FIREBASE_CREDENTIALS_PATH, FIREBASE_PROJECT_ID,
+)
+from services.embedding_cache import (
+    CachedEmbeddings, close_embedding_store, get_embedding_store,
+)
+from services.metrics import register_collector
+from services.numpy_store import NumpyVectorStore
+
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+class ClientRegistry:
+    """Lazily builds each client once and hands out the shared instance."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._chroma: Optional["ClientAPI"] = None
+        self._embeddings: Optional[CachedEmbeddings] = None
+        self._llm: Optional["ChatGoogleGenerativeAI"] = None
+        self._vectorstores: Dict[str, VectorStore] = {}
+
+    # ── Builders ───────────────────────────────────────────────────────────────
+    @property
+    def chroma(self) -> "ClientAPI":
+        if self._chroma is None:
+            with self._lock:
+                if self._chroma is None:
+                    import chromadb
+
+                    if VECTOR_BACKEND == "chroma_cloud":
+                        self._chroma = chromadb.HttpClient(
+                            host="https://api.trychroma.com",
+                            headers={
+                                "Authorization": f"Bearer {CHROMA_API_KEY}",
+                                "x-chroma-token": CHROMA_API_KEY,
+                            },
+                            tenant=CHROMA_TENANT,
+                            database=CHROMA_DATABASE,
+                        )
+                    elif VECTOR_BACKEND == "chroma_local":
+                        self._chroma = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+                    else:
+                        raise RuntimeError(
+                            f"VECTOR_BACKEND '{VECTOR_BACKEND}' does not use a Chroma client"
+                        )
+        return self._chroma
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+                    self._embeddings = CachedEmbeddings(
+                        GoogleGenerativeAIEmbeddings(
+                            model=EMBEDDING_MODEL,
+                            google_api_key=GOOGLE_API_KEY,
+                        ),
+                        store=get_embedding_store(),
+                        namespace=EMBEDDING_MODEL,
+                    )
+        return self._embeddings
+
+    @property
+    def llm(self) -> "ChatGoogleGenerativeAI":
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    self._llm = ChatGoogleGenerativeAI(
+                        model=CHAT_MODEL, google_api_key=GOOGLE_API_KEY
+                    )
+        return self._llm
+
+    def vectorstore(self, collection_name: str) -> VectorStore:
+        store = self._vectorstores.get(collection_name)
+        if store is None:
+            embeddings = self.embeddings
+            client = None if VECTOR_BACKEND == "numpy" else self.chroma
+            with self._lock:
+                store = self._vectorstores.get(collection_name)
+                if store is None:
+                    if client is None:
+                        store = NumpyVectorStore(
+                            os.path.join(NUMPY_STORE_DIR, collection_name), embeddings
+                        )
+                    else:
+                        from langchain_chroma import Chroma
+
+                        store = Chroma(
+                            client=client,
+                            collection_name=collection_name,
+                            embedding_function=embeddings,
+                        )
+                    self._vectorstores[collection_name] = store
+        return store
+
+    def drop_vectorstore(self, collection_name: str) -> None:
+        """Forget a cached handle (its collection is being deleted)."""
+        with self._lock:
+            self._vectorstores.pop(collection_name, None)
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+    def close(self) -> None:
+        """Drop cached handles and release the HTTP connection pool."""
+        with self._lock:
+            self._vectorstores.clear()
+            self._llm = None
+            self._embeddings = None
+            close_embedding_store()
+            if self._chroma is not None:
+                # Chroma clients have no public close(); clear_system_cache()
+                # stops the shared System (and with it the pooled HTTP session).
+                try:
+                    self._chroma.clear_system_cache()
+                except Exception:
+                    pass
+                self._chroma = None
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def _embedding_cache_stats() -> dict:
+    # Report only; never build the clients just to read counters
+    embeddings = _registry._embeddings if _registry is not None else None
+    return {"hits": embeddings.hits, "misses": embeddings.misses} if embeddings else {}
+
+
+register_collector(
+    "embedding_cache_events", "Embedding cache lookups since start.", _embedding_cache_stats,
+)
+
+
+def get_registry() -> ClientRegistry:
+    """Return the process-wide registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
+
+
+def close_registry() -> None:
+    """Close the registry (lifespan shutdown)."""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
+
+
+# ── Firebase ───────────────────────────────────────────────────────────────────
+_firebase_lock = threading.Lock()
+
+
+def init_firebase() -> None:
+    """Initialise the firebase_admin app once (first token check or warm-up)."""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return
+    with _firebase_lock:
+        if firebase_admin._apps:
+            return
+
+        # 1. Railway / production: read credentials from env var (JSON string)
+        cred_json = os.environ.get("FIREBASE_CREDENTIALS_JSON")
+        if cred_json:
+            try:
+                cred = credentials.Certificate(json.loads(cred_json))
+                firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
+                return
+            except Exception as e:
+                raise RuntimeError(f"Failed to load Firebase credentials from FIREBASE_CREDENTIALS_JSON: {e}")
+
+        # 2. Local dev: read credentials from file path in .env
+        if FIREBASE_CREDENTIALS_PATH:
+            try:
+                cred = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
+                firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
+                return
+            except Exception as e:
+                raise RuntimeError(f"Failed to load Firebase credentials from file path: {e}")
+
+        # 3. Last resort: GCP Application Default Credentials
+        try:
+            cred = credentials.ApplicationDefault()
+            firebase_admin.initialize_app(cred, {"projectId": FIREBASE_PROJECT_ID})
+        except Exception as e:
+            raise RuntimeError(f"No Firebase credentials found. Set FIREBASE_CREDENTIALS_JSON or FIREBASE_CREDENTIALS_PATH. Error: {e}")
@@ -1,65 +1,177 @@
+import asyncio
+import hashlib
+import multiprocessing
 import os
-import tempfile
-from typing import List
+import posixpath
+import shutil
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
 
 from fastapi import UploadFile, HTTPException
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from core.config import CHUNK_SIZE, CHUNK_OVERLAP
+from core.config import PDF_WORKERS, INGEST_UPLOAD_DIR, BULK_MAX_FILES, BULK_MAX_UNPACKED_BYTES
+from services.extractors import extension_of, extract_unit, get_extractor, supported_types
 
-SUPPORTED_TYPES = {".pdf"}
+SUPPORTED_TYPES = set(supported_types())
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Process pool for parsing / chunking, started on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
 
 
 def _validate_file(filename: str) -> None:
     """Raise 400 if the file extension is not supported."""
-    ext = os.path.splitext(filename)[-1].lower()
+    ext = extension_of(filename)
     if ext not in SUPPORTED_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type '{ext}'. Supported types: {SUPPORTED_TYPES}",
+            detail=f"Unsupported file type '{ext}'. Supported types: {', '.join(sorted(SUPPORTED_TYPES))}",
         )
 
 
-def _load_pdf(content: bytes, filename: str) -> List[Document]:
-    """Write bytes to a temp file, load with PyPDF, then clean up."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def stream_chunks(path: str, filename: str) -> AsyncIterator[Tuple[int, List[Document]]]:
+    """
+    Split a stored file into units with its extractor (page ranges, byte
+    ranges cut at record boundaries, sheet row ranges …), parse them across
+    the process pool and yield (units_parsed, chunks) as each one finishes, so
+    the caller can embed one unit while the next ones are still being parsed.
+    units_parsed counts pages, rows or records depending on the format.
+    At most 2 × PDF_WORKERS units are in flight to bound memory.
+    """
+    extractor = get_extractor(filename)
+    if extractor is None:
+        _validate_file(filename)
+    loop = asyncio.get_running_loop()
+    pool = _get_executor()
+    file_hash, units = await asyncio.gather(
+        asyncio.to_thread(_hash_file, path),
+        asyncio.to_thread(extractor.plan, path),
+    )
+
+    window = max(1, 2 * PDF_WORKERS)
+    pending = set()
+
+    def submit(unit) -> None:
+        pending.add(loop.run_in_executor(pool, extract_unit, path, filename, file_hash, unit))
+
+    queued = iter(units)
+    for unit in queued:
+        submit(unit)
+        if len(pending) >= window:
+            break
 
     try:
-        loader = PyPDFLoader(tmp_path)
-        docs = loader.load()
-        for doc in docs:
-            doc.metadata["source"] = filename
-        return docs
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                pending.discard(fut)
+                nxt = next(queued, None)
+                if nxt is not None:
+                    submit(nxt)
+                yield fut.result()
     finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        for fut in pending:
+            fut.cancel()
 
 
-def _chunk_documents(documents: List[Document]) -> List[Document]:
-    """Split documents into smaller, overlapping chunks."""
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-    )
-    return splitter.split_documents(documents)
+def _store(source: BinaryIO, ext: str) -> str:
+    """Copy a file object into INGEST_UPLOAD_DIR in 1 MiB blocks."""
+    os.makedirs(INGEST_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(INGEST_UPLOAD_DIR, f"{uuid.uuid4().hex}{ext}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(source, out, 1 << 20)
+    return path
 
 
-async def process_upload(file: UploadFile) -> List[Document]:
+async def save_upload(file: UploadFile) -> str:
     """
-    Validate, load, and chunk an uploaded file.
-    Returns a list of Document chunks ready for embedding.
+    Validate an upload and stream it from the spooled request body into
+    INGEST_UPLOAD_DIR. Returns the stored path.
     """
     _validate_file(file.filename)
-    content = await file.read()
+    return await asyncio.to_thread(_store, file.file, extension_of(file.filename))
+
+
+# (display name, stored path) and (display name, reason)
+Stored = List[Tuple[str, str]]
+Skipped = List[Tuple[str, str]]
+
+
+def _unpack_zip(archive_name: str, source: BinaryIO, budget: List[int],
+                stored: Stored, skipped: Skipped) -> None:
+    """
+    Stream every supported member of a ZIP into INGEST_UPLOAD_DIR, one
+    member at a time. `budget` is [files left, bytes left] shared across
+    the request.
+    """
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            name = f"{archive_name}/{info.filename}"
+            base = posixpath.basename(info.filename)
+            if info.is_dir() or not base or base.startswith(".") or "__MACOSX/" in info.filename:
+                continue
+            ext = extension_of(base)
+            if ext not in SUPPORTED_TYPES:
+                skipped.append((name, f"Unsupported file type '{ext}'"))
+            elif budget[0] <= 0:
+                skipped.append((name, f"More than {BULK_MAX_FILES} files in one upload"))
+            elif info.file_size > budget[1]:
+                skipped.append((name, "Unpacked size limit reached"))
+            else:
+                with archive.open(info) as member:
+                    stored.append((name, _store(member, ext)))
+                budget[0] -= 1
+                budget[1] -= info.file_size
+
+
+async def save_bulk_upload(files: List[UploadFile]) -> Tuple[Stored, Skipped]:
+    """
+    Store many uploads, unpacking ZIP archives member by member.
+    Returns the stored files and the ones skipped with a reason.
+    """
+    stored: Stored = []
+    skipped: Skipped = []
+    budget = [BULK_MAX_FILES, BULK_MAX_UNPACKED_BYTES]
+    for file in files:
+        ext = extension_of(file.filename or "")
+        if ext == ".zip":
+            try:
+                await asyncio.to_thread(_unpack_zip, file.filename, file.file, budget, stored, skipped)
+            except zipfile.BadZipFile:
+                skipped.append((file.filename, "Not a valid ZIP archive"))
+        elif ext not in SUPPORTED_TYPES:
+            skipped.append((file.filename, f"Unsupported file type '{ext}'"))
+        elif budget[0] <= 0:
+            skipped.append((file.filename, f"More than {BULK_MAX_FILES} files in one upload"))
+        else:
+            stored.append((file.filename, await asyncio.to_thread(_store, file.file, ext)))
+            budget[0] -= 1
+    return stored, skipped
 
-    ext = os.path.splitext(file.filename)[-1].lower()
-    if ext == ".pdf":
-        raw_docs = _load_pdf(content, file.filename)
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    return _chunk_documents(raw_docs)
\ No newline at end of file
+def shutdown_executor() -> None:
+    """Stop the parser processes (lifespan shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
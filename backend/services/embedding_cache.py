@@ -0,0 +1,217 @@
+"""
+Embedding Cache  (SQLite-backed)
+--------------------------------
+Persistent local cache of embedding vectors, keyed by a hash of
+(model, task, text). Identical chunks uploaded into many sessions – or
+re-uploaded into the same one – are embedded by Gemini only once.
+
+  embeddings(key TEXT PRIMARY KEY, vector BLOB)   vector = float32 array
+
+CachedEmbeddings wraps any LangChain Embeddings and only forwards the texts
+that are not in the cache. Only document (chunk) vectors are persisted;
+query vectors – one per distinct user question – stay in a bounded
+in-memory LRU (QUERY_EMBEDDING_CACHE_SIZE), so the file does not grow with
+chat traffic. embed_queries() / aembed_queries() embed many
+search queries at once (batch chat).
+"""
+
+import asyncio
+import hashlib
+import inspect
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from core.config import EMBEDDING_CACHE_PATH, QUERY_EMBEDDING_CACHE_SIZE
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Thread-safe key → vector store on a single SQLite file."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[key] = vec.tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, array("f", v).tobytes()) for k, v in items.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QueryVectorCache:
+    """In-memory LRU with the EmbeddingStore interface, for query vectors."""
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE) -> None:
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._vectors[key] = vector
+                self._vectors.move_to_end(key)
+            while len(self._vectors) > self._max_entries:
+                self._vectors.popitem(last=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingStore."""
+
+    def __init__(self, base: Embeddings, store: EmbeddingStore, namespace: str) -> None:
+        self.base = base
+        self.store = store
+        self.queries = QueryVectorCache()
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, task: str, text: str) -> str:
+        return content_hash(f"{self.namespace}\0{task}\0{text}")
+
+    def _cache(self, task: str):
+        return self.queries if task == "query" else self.store
+
+    def _split(self, texts: List[str], task: str):
+        keys = [self._key(task, t) for t in texts]
+        cached = self._cache(task).get_many(keys)
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in cached))
+        return keys, cached, missing
+
+    def _merge(self, texts, keys, cached, missing, vectors, task) -> List[List[float]]:
+        fresh = {self._key(task, t): v for t, v in zip(missing, vectors)}
+        self._cache(task).put_many(fresh)
+        cached.update(fresh)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return [cached[k] for k in keys]
+
+    # ── Sync ───────────────────────────────────────────────────────────────────
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split(texts, "doc")
+        vectors = self.base.embed_documents(missing) if missing else []
+        return self._merge(texts, keys, cached, missing, vectors, "doc")
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, missing = self._split([text], "query")
+        vectors = [self.base.embed_query(text)] if missing else []
+        return self._merge([text], keys, cached, missing, vectors, "query")[0]
+
+    def _batches_queries(self, method) -> bool:
+        # Gemini embeds queries with task_type=RETRIEVAL_QUERY; its
+        # embed_documents takes the task type, so many queries fit one call
+        return "task_type" in inspect.signature(method).parameters
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """embed_query for many texts, with one base call for the uncached ones."""
+        keys, cached, missing = self._split(texts, "query")
+        if not missing:
+            vectors = []
+        elif self._batches_queries(self.base.embed_documents):
+            vectors = self.base.embed_documents(missing, task_type="RETRIEVAL_QUERY")
+        else:
+            vectors = [self.base.embed_query(t) for t in missing]
+        return self._merge(texts, keys, cached, missing, vectors, "query")
+
+    # ── Async ──────────────────────────────────────────────────────────────────
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = await asyncio.to_thread(self._split, texts, "doc")
+        vectors = await self.base.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(
+            self._merge, texts, keys, cached, missing, vectors, "doc"
+        )
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, cached, missing = await asyncio.to_thread(self._split, [text], "query")
+        vectors = [await self.base.aembed_query(text)] if missing else []
+        merged = await asyncio.to_thread(
+            self._merge, [text], keys, cached, missing, vectors, "query"
+        )
+        return merged[0]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = await asyncio.to_thread(self._split, texts, "query")
+        if not missing:
+            vectors = []
+        elif self._batches_queries(self.base.aembed_documents):
+            vectors = await self.base.aembed_documents(missing, task_type="RETRIEVAL_QUERY")
+        else:
+            vectors = await asyncio.gather(*(self.base.aembed_query(t) for t in missing))
+        return await asyncio.to_thread(
+            self._merge, texts, keys, cached, missing, list(vectors), "query"
+        )
+
+
+_store: Optional[EmbeddingStore] = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EmbeddingStore()
+    return _store
+
+
+def close_embedding_store() -> None:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
@@ -0,0 +1,585 @@
+"""
+Extractor Registry
+------------------
+One extractor per file type, looked up by extension:
+
+  .pdf                  page ranges
+  .txt .md              text, byte ranges cut at line breaks
+  .html .htm            visible text, tables as "cell | cell" rows
+  .docx                 paragraphs in order; tables chunked on row boundaries
+  .csv .tsv             rows, byte ranges cut at record boundaries
+  .xlsx                 rows per sheet, in XLSX_ROWS_PER_TASK row ranges
+  .json                 records of the top-level (or largest nested) array
+  .jsonl .ndjson        records, byte ranges cut at line breaks
+
+An extractor splits a file into independent units with plan() (cheap, runs
+in the caller), and extract() turns one unit into chunks inside the parser
+process pool, so large files are parsed in parallel. Tabular records are
+rendered as "column: value; …" and packed into chunks without ever splitting
+a row; prose goes through the structure-aware chunker (services/chunking.py).
+HTML and DOCX headings are emitted as markdown headings so the chunker can
+start sections on them.
+
+New formats: subclass Extractor and decorate it with @register.
+"""
+
+import csv
+import io
+import json
+import mmap
+import os
+import zipfile
+from datetime import date, datetime
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+from langchain_core.documents import Document
+
+from core.config import PDF_PAGES_PER_TASK, INGEST_SPLIT_BYTES, XLSX_ROWS_PER_TASK
+from services.chunking import chunk_documents, pack_rows
+from services.embedding_cache import content_hash
+
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+Unit = Tuple[Any, ...]
+# (units parsed – pages, rows or records – and the unit's chunks)
+Extracted = Tuple[int, List[Document]]
+
+
+class Extractor:
+    extensions: Tuple[str, ...] = ()
+
+    def plan(self, path: str) -> List[Unit]:
+        """Independent units of work; the whole file by default."""
+        return [()]
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        raise NotImplementedError
+
+
+_EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register(cls):
+    extractor = cls()
+    for ext in cls.extensions:
+        _EXTRACTORS[ext] = extractor
+    return cls
+
+
+def extension_of(filename: str) -> str:
+    return os.path.splitext(filename)[-1].lower()
+
+
+def get_extractor(filename: str) -> Optional[Extractor]:
+    return _EXTRACTORS.get(extension_of(filename))
+
+
+def supported_types() -> List[str]:
+    return sorted(_EXTRACTORS)
+
+
+def extract_unit(path: str, filename: str, file_hash: str, unit: Unit) -> Extracted:
+    """Process-pool task: parse one unit and tag every chunk with its hashes."""
+    count, chunks = get_extractor(filename).extract(path, filename, unit)
+    for chunk in chunks:
+        chunk.metadata["file_hash"]  = file_hash
+        chunk.metadata["chunk_hash"] = content_hash(chunk.page_content)
+    return count, chunks
+
+
+# ── Shared helpers ─────────────────────────────────────────────────────────────
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def format_row(columns: Optional[Sequence[str]], values: Sequence[Any]) -> str:
+    """'column: value; …' for named columns (empty cells skipped), else 'a | b'."""
+    cells = [_cell_text(v) for v in values]
+    if not columns:
+        return " | ".join(c for c in cells if c)
+    named = []
+    for i, cell in enumerate(cells):
+        if not cell:
+            continue
+        name = columns[i] if i < len(columns) and columns[i] else f"column {i + 1}"
+        named.append(f"{name}: {cell}")
+    return "; ".join(named)
+
+
+def split_offsets(path: str, step: int, quoted: bool = False) -> List[Tuple[int, int]]:
+    """
+    Byte ranges of about `step` bytes, each starting right after a newline.
+    With `quoted`, newlines inside double-quoted CSV fields are skipped: a
+    newline ends a record only after an even number of quote characters.
+    """
+    size = os.path.getsize(path)
+    if size <= step:
+        return [(0, size)]
+    starts = [0]
+    target = step
+    pos = 0
+    odd = False
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            counted = 0
+
+            def advance(upto: int) -> None:
+                nonlocal odd, counted
+                if quoted and upto > counted:
+                    odd ^= bool(block.count(b'"', counted, upto) & 1)
+                counted = max(counted, upto)
+
+            while pos + len(block) > target:
+                k = max(counted, target - pos)
+                advance(k)
+                j = block.find(b"\n", k)
+                if j == -1:
+                    target = pos + len(block)
+                    break
+                advance(j + 1)
+                target = pos + j + 1
+                if not odd:
+                    starts.append(target)
+                    target += step
+            advance(len(block))
+            pos += len(block)
+    bounds = [s for s in starts if s < size] + [size]
+    return list(zip(bounds, bounds[1:]))
+
+
+def count_records(path: str, start: int, stop: int, quoted: bool = False) -> int:
+    """
+    Records in a byte range from split_offsets(): lines, plus an
+    unterminated last line. With `quoted`, newlines inside double-quoted
+    CSV fields do not end a record.
+    """
+    count, odd, last = 0, False, b"\n"
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            block = fh.read(min(1 << 20, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            if not quoted:
+                count += block.count(b"\n")
+            else:
+                # Text between quotes alternates outside / inside a quoted field
+                pieces = block.split(b'"')
+                count += sum(piece.count(b"\n") for piece in pieces[int(odd)::2])
+                odd ^= bool((len(pieces) - 1) & 1)
+            last = block[-1:]
+    return count + (last != b"\n")
+
+
+def _read_range(path: str, start: int, stop: int) -> str:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(stop - start)
+    if start == 0 and data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    return data.decode("utf-8", errors="replace")
+
+
+# ── PDF ────────────────────────────────────────────────────────────────────────
+def _open_pdf(fh) -> Tuple[mmap.mmap, "PdfReader"]:
+    """Memory-map a stored PDF so pages are read lazily, never copied whole."""
+    from pypdf import PdfReader
+
+    mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return mm, PdfReader(mm)
+
+
+@register
+class PdfExtractor(Extractor):
+    extensions = (".pdf",)
+
+    def plan(self, path: str) -> List[Unit]:
+        with open(path, "rb") as fh:
+            mm, reader = _open_pdf(fh)
+            try:
+                total = len(reader.pages)
+            finally:
+                mm.close()
+        return [
+            (s, min(s + PDF_PAGES_PER_TASK, total))
+            for s in range(0, total, PDF_PAGES_PER_TASK)
+        ]
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        start, stop = unit
+        with open(path, "rb") as fh:
+            mm, reader = _open_pdf(fh)
+            try:
+                total = len(reader.pages)
+                pages = [
+                    Document(
+                        page_content=reader.pages[i].extract_text() or "",
+                        metadata={"source": filename, "page": i, "total_pages": total},
+                    )
+                    for i in range(start, stop)
+                ]
+            finally:
+                mm.close()
+        return stop - start, chunk_documents(pages)
+
+
+# ── Plain text ─────────────────────────────────────────────────────────────────
+@register
+class TextExtractor(Extractor):
+    extensions = (".txt", ".md")
+
+    def plan(self, path: str) -> List[Unit]:
+        return [(i, start, stop) for i, (start, stop) in enumerate(split_offsets(path, INGEST_SPLIT_BYTES))]
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        part, start, stop = unit
+        doc = Document(
+            page_content=_read_range(path, start, stop),
+            metadata={"source": filename, "part": part},
+        )
+        return 1, chunk_documents([doc])
+
+
+# ── HTML ───────────────────────────────────────────────────────────────────────
+class _HTMLText(HTMLParser):
+    """Visible text with block structure kept as line breaks."""
+
+    SKIP = {"script", "style", "noscript", "template", "head", "svg"}
+    BLOCK = {
+        "p", "div", "section", "article", "br", "li", "ul", "ol", "table", "tr",
+        "h1", "h2", "h3", "h4", "h5", "h6", "header", "footer", "pre", "blockquote",
+    }
+
+    HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+        self._cells = 0
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in ("td", "th"):
+            if self._cells:
+                self.parts.append(" | ")
+            self._cells += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+            if tag == "tr":
+                self._cells = 0
+            elif tag in self.HEADINGS:
+                self.parts.append("#" * int(tag[1]) + " ")
+
+    def handle_endtag(self, tag) -> None:
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data) -> None:
+        if not self._skip:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        """One block per paragraph; table rows stay on consecutive lines."""
+        out: List[str] = []
+        for line in "".join(self.parts).splitlines():
+            line = " ".join(line.split())
+            if not line.strip("# "):
+                continue
+            if out and not (" | " in line and " | " in out[-1]):
+                out.append("")
+            out.append(line)
+        return "\n".join(out)
+
+
+@register
+class HtmlExtractor(Extractor):
+    extensions = (".html", ".htm")
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        parser = _HTMLText()
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            for block in iter(lambda: fh.read(1 << 20), ""):
+                parser.feed(block)
+        parser.close()
+        doc = Document(page_content=parser.text(), metadata={"source": filename})
+        return 1, chunk_documents([doc])
+
+
+# ── DOCX ───────────────────────────────────────────────────────────────────────
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _docx_text(element) -> str:
+    parts = []
+    for node in element.iter():
+        if node.tag == f"{_W}t" and node.text:
+            parts.append(node.text)
+        elif node.tag == f"{_W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def _docx_heading_level(paragraph) -> int:
+    """1–6 for paragraphs styled Title / Heading N, else 0."""
+    style = paragraph.find(f"{_W}pPr/{_W}pStyle")
+    name = (style.get(f"{_W}val") or "").lower().replace(" ", "") if style is not None else ""
+    if name == "title":
+        return 1
+    if name.startswith("heading") and name[7:].isdigit():
+        return min(6, int(name[7:]))
+    return 0
+
+
+@register
+class DocxExtractor(Extractor):
+    extensions = (".docx",)
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        with zipfile.ZipFile(path) as archive:
+            with archive.open("word/document.xml") as fh:
+                body = ElementTree.parse(fh).getroot().find(f"{_W}body")
+
+        chunks: List[Document] = []
+        paragraphs: List[str] = []
+        tables = 0
+
+        def flush_text() -> None:
+            if paragraphs:
+                doc = Document(
+                    page_content="\n\n".join(paragraphs), metadata={"source": filename}
+                )
+                chunks.extend(chunk_documents([doc]))
+                paragraphs.clear()
+
+        for block in (body if body is not None else []):
+            if block.tag == f"{_W}p":
+                text = _docx_text(block)
+                level = _docx_heading_level(block)
+                if text:
+                    paragraphs.append(f"{'#' * level} {text}" if level else text)
+            elif block.tag == f"{_W}tbl":
+                flush_text()
+                tables += 1
+                rows = [
+                    [_docx_text(cell) for cell in row.findall(f"{_W}tc")]
+                    for row in block.findall(f"{_W}tr")
+                ]
+                if not rows:
+                    continue
+                columns, data = (rows[0], rows[1:]) if len(rows) > 1 else (None, rows)
+                chunks.extend(pack_rows(
+                    ((i, format_row(columns, r)) for i, r in enumerate(data, start=1)),
+                    metadata={"source": filename, "table": tables},
+                ))
+        flush_text()
+        return 1, chunks
+
+
+# ── CSV / TSV ──────────────────────────────────────────────────────────────────
+@register
+class CsvExtractor(Extractor):
+    extensions = (".csv", ".tsv")
+
+    def _dialect(self, path: str) -> Tuple[str, List[str]]:
+        """Delimiter and header row."""
+        with open(path, encoding="utf-8-sig", errors="replace", newline="") as fh:
+            sample = fh.read(64 * 1024)
+        if path.lower().endswith(".tsv"):
+            delimiter = "\t"
+        else:
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+            except csv.Error:
+                delimiter = ","
+        header = next(csv.reader(io.StringIO(sample), delimiter=delimiter), [])
+        return delimiter, [h.strip() for h in header]
+
+    def plan(self, path: str) -> List[Unit]:
+        """Byte ranges, each with the file-wide number of its first data row."""
+        delimiter, header = self._dialect(path)
+        units, first = [], 1
+        ranges = split_offsets(path, INGEST_SPLIT_BYTES, quoted=True)
+        for i, (start, stop) in enumerate(ranges):
+            units.append((i, start, stop, delimiter, tuple(header), first))
+            if i + 1 < len(ranges):
+                first += count_records(path, start, stop, quoted=True) - (i == 0)
+        return units
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        part, start, stop, delimiter, header, first = unit
+        reader = csv.reader(io.StringIO(_read_range(path, start, stop), newline=""), delimiter=delimiter)
+        if part == 0:
+            next(reader, None)  # header row
+        count = 0
+
+        def rows() -> Iterator[Tuple[int, str]]:
+            nonlocal count
+            for values in reader:
+                count += 1
+                yield first + count - 1, format_row(header, values)
+
+        chunks = pack_rows(rows(), metadata={"source": filename, "part": part})
+        return count, chunks
+
+
+# ── XLSX ───────────────────────────────────────────────────────────────────────
+def _header_of(rows: Iterable[Sequence[Any]]) -> Tuple[int, List[str]]:
+    """First non-empty row: (its 1-based row number, column names)."""
+    for number, values in enumerate(rows, start=1):
+        if any(v is not None and str(v).strip() for v in values):
+            return number, [_cell_text(v) for v in values]
+    return 0, []
+
+
+@register
+class XlsxExtractor(Extractor):
+    extensions = (".xlsx",)
+
+    @staticmethod
+    def _open(path: str):
+        import openpyxl
+        return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+    def plan(self, path: str) -> List[Unit]:
+        units: List[Unit] = []
+        workbook = self._open(path)
+        try:
+            for sheet in workbook.worksheets:
+                header_row, header = _header_of(sheet.iter_rows(max_row=50, values_only=True))
+                if not header_row:
+                    continue
+                first = header_row + 1
+                last = sheet.max_row
+                if not last:
+                    units.append((sheet.title, first, None, tuple(header)))
+                    continue
+                for start in range(first, last + 1, XLSX_ROWS_PER_TASK):
+                    stop = min(start + XLSX_ROWS_PER_TASK - 1, last)
+                    units.append((sheet.title, start, stop, tuple(header)))
+        finally:
+            workbook.close()
+        return units
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        title, start, stop, header = unit
+        workbook = self._open(path)
+        count = 0
+        try:
+            rows = workbook[title].iter_rows(min_row=start, max_row=stop, values_only=True)
+
+            def numbered() -> Iterator[Tuple[int, str]]:
+                nonlocal count
+                for number, values in enumerate(rows, start=start):
+                    count += 1
+                    yield number, format_row(header, values)
+
+            chunks = pack_rows(
+                numbered(), metadata={"source": filename, "sheet": title},
+                heading=f"Sheet: {title}",
+            )
+        finally:
+            workbook.close()
+        return count, chunks
+
+
+# ── JSON ───────────────────────────────────────────────────────────────────────
+def _flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list) and any(isinstance(v, (dict, list)) for v in value):
+        for i, item in enumerate(value):
+            yield from _flatten(item, f"{prefix}[{i}]")
+    elif isinstance(value, list):
+        yield prefix, ", ".join(_cell_text(v) for v in value)
+    else:
+        yield prefix, value
+
+
+def format_record(record: Any) -> str:
+    if not isinstance(record, (dict, list)):
+        return _cell_text(record)
+    return "; ".join(f"{k}: {_cell_text(v)}" for k, v in _flatten(record) if _cell_text(v))
+
+
+def _records_of(data: Any) -> Tuple[str, List[Any]]:
+    """The record array in a feed: top level, else the largest nested list of objects."""
+    if isinstance(data, list):
+        return "", data
+    if isinstance(data, dict):
+        candidates = [
+            (key, value) for key, value in data.items()
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value)
+        ]
+        if candidates:
+            return max(candidates, key=lambda kv: len(kv[1]))
+    return "", [data]
+
+
+@register
+class JsonExtractor(Extractor):
+    extensions = (".json",)
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        with open(path, encoding="utf-8-sig", errors="replace") as fh:
+            data = json.load(fh)
+        key, records = _records_of(data)
+        metadata = {"source": filename, **({"records_key": key} if key else {})}
+        chunks = pack_rows(
+            ((i, format_record(r)) for i, r in enumerate(records, start=1)), metadata
+        )
+        return len(records), chunks
+
+
+@register
+class JsonLinesExtractor(Extractor):
+    extensions = (".jsonl", ".ndjson")
+
+    def plan(self, path: str) -> List[Unit]:
+        """Byte ranges, each with the file-wide line number it starts on."""
+        units, first = [], 1
+        ranges = split_offsets(path, INGEST_SPLIT_BYTES)
+        for i, (start, stop) in enumerate(ranges):
+            units.append((i, start, stop, first))
+            if i + 1 < len(ranges):
+                first += count_records(path, start, stop)
+        return units
+
+    def extract(self, path: str, filename: str, unit: Unit) -> Extracted:
+        part, start, stop, first = unit
+        count = 0
+
+        def records() -> Iterator[Tuple[int, str]]:
+            # Numbered by line in the file, so blank or broken lines keep
+            # later records' numbers stable
+            nonlocal count
+            for number, line in enumerate(_read_range(path, start, stop).split("\n"), start=first):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                count += 1
+                yield number, format_record(record)
+
+        chunks = pack_rows(records(), metadata={"source": filename, "part": part})
+        return count, chunks
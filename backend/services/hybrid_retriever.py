@@ -0,0 +1,71 @@
+"""
+Hybrid Retriever
+----------------
+Runs the session's dense Chroma search and the local BM25 sparse search
+side by side and fuses both rankings with reciprocal rank fusion:
+
+    score(d) = Σ 1 / (RRF_K + rank_i(d))
+
+Dense and sparse hits share chunk IDs (the vector-store ID), so the same
+chunk found by both searches is counted once with both contributions.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from core.config import HYBRID_CANDIDATES, RRF_K
+from services.answer_cache import chunk_id
+from services.metrics import span
+from services.sparse_index import get_sparse_index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = RRF_K) -> List[Document]:
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = chunk_id(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)[:k]
+    for key in ordered:
+        docs[key].metadata["rrf_score"] = scores[key]
+    return [docs[key] for key in ordered]
+
+
+class HybridRetriever(BaseRetriever):
+    dense: BaseRetriever
+    session_id: str
+    k: int = 3
+    candidates: int = HYBRID_CANDIDATES
+
+    def _sparse(self, query: str) -> List[Document]:
+        with span("retrieve.sparse"):
+            hits = get_sparse_index().search(self.session_id, query, self.candidates)
+        return [doc for doc, _ in hits]
+
+    async def _adense(self, query: str, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        with span("retrieve.dense"):
+            return await self.dense.ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with span("retrieve.dense"):
+            dense = self.dense.invoke(query, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([dense, self._sparse(query)], self.k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense, sparse = await asyncio.gather(
+            self._adense(query, run_manager),
+            asyncio.to_thread(self._sparse, query),
+        )
+        return reciprocal_rank_fusion([dense, sparse], self.k)
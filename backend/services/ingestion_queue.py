@@ -0,0 +1,226 @@
+"""
+Ingestion Queue  (SQLite-backed)
+--------------------------------
+Local persistent job queue for document ingestion, no external broker needed.
+/api/upload stores the file under INGEST_UPLOAD_DIR and enqueues a job; the
+ingestion workers (services/ingestion_worker.py) claim jobs and report
+progress back here.
+
+  jobs
+    ├── id, session_id, filename, path
+    ├── batch_id:         set for files of one bulk upload
+    ├── status:           "queued" | "running" | "done" | "failed"
+    ├── pages_parsed, chunks_total, chunks_embedded   (pages_parsed counts rows /
+    │                                                    records for tabular files)
+    ├── chunks_added, chunks_reused
+    ├── error, attempts
+    └── available_at, created_at, updated_at   (unix seconds)
+
+SQLite in WAL mode lets the API process and any number of worker processes
+share the same file.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from core.config import INGEST_DB_PATH, INGEST_STALE_SECONDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              TEXT PRIMARY KEY,
+    session_id      TEXT NOT NULL,
+    filename        TEXT NOT NULL,
+    path            TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'queued',
+    pages_parsed    INTEGER NOT NULL DEFAULT 0,
+    chunks_total    INTEGER NOT NULL DEFAULT 0,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    chunks_added    INTEGER NOT NULL DEFAULT 0,
+    chunks_reused   INTEGER NOT NULL DEFAULT 0,
+    error           TEXT,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    available_at    REAL NOT NULL,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL,
+    batch_id        TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at, created_at);
+"""
+
+# Columns added after the first release, for existing databases
+_MIGRATIONS = {
+    "batch_id": "ALTER TABLE jobs ADD COLUMN batch_id TEXT",
+}
+
+PROGRESS_FIELDS = {
+    "pages_parsed", "chunks_total", "chunks_embedded", "chunks_added", "chunks_reused",
+}
+
+
+class IngestionQueue:
+    def __init__(self, path: str = INGEST_DB_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch_id)")
+
+    # ── Producer side ──────────────────────────────────────────────────────────
+    def enqueue(self, session_id: str, filename: str, path: str,
+                batch_id: Optional[str] = None) -> dict:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, session_id, filename, path, batch_id,"
+                " available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, session_id, filename, path, batch_id, now, now, now),
+            )
+        return self.get(job_id)
+
+    def enqueue_many(self, session_id: str, files: List[Tuple[str, str]], batch_id: str) -> List[dict]:
+        """Enqueue (filename, path) pairs as one batch, in a single transaction."""
+        now = time.time()
+        ids = [uuid.uuid4().hex for _ in files]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO jobs (id, session_id, filename, path, batch_id,"
+                    " available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        # Stagger created_at so claim order follows upload order
+                        (job_id, session_id, name, path, batch_id, now, now + i * 1e-6, now)
+                        for i, (job_id, (name, path)) in enumerate(zip(ids, files))
+                    ],
+                )
+        return self.get_many(ids)
+
+    def get_batch(self, batch_id: str) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE batch_id = ? ORDER BY created_at", (batch_id,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_many(self, job_ids: List[str]) -> List[dict]:
+        if not job_ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({','.join('?' * len(job_ids))})", job_ids
+            ).fetchall()
+        by_id = {row["id"]: dict(row) for row in rows}
+        return [by_id[j] for j in job_ids if j in by_id]
+
+    # ── Worker side ────────────────────────────────────────────────────────────
+    def claim(self) -> Optional[dict]:
+        """Atomically move the oldest runnable job to 'running' and return it."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?"
+                    " ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                    " error = NULL, updated_at = ? WHERE id = ?",
+                    (now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def update(self, job_id: str, **progress: int) -> None:
+        """Record progress counters; also acts as the job's heartbeat."""
+        unknown = set(progress) - PROGRESS_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown progress fields: {', '.join(sorted(unknown))}")
+        assignments = "".join(f", {name} = ?" for name in progress)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET updated_at = ?{assignments} WHERE id = ?",
+                (time.time(), *progress.values(), job_id),
+            )
+
+    def complete(self, job_id: str, **progress: int) -> None:
+        self.update(job_id, **progress)
+        self._set_status(job_id, "done")
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._set_status(job_id, "failed", error=error)
+
+    def retry(self, job_id: str, error: str, delay: float) -> None:
+        """Put a job back on the queue after `delay` seconds."""
+        self._set_status(job_id, "queued", error=error, available_at=time.time() + delay)
+
+    def requeue_stale(self, older_than: float = INGEST_STALE_SECONDS) -> int:
+        """Re-queue 'running' jobs whose worker stopped sending heartbeats."""
+        cutoff = time.time() - older_than
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND updated_at < ?",
+                (cutoff,),
+            )
+        return cur.rowcount
+
+    def _set_status(self, job_id: str, status: str, error: Optional[str] = None,
+                    available_at: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = COALESCE(?, available_at),"
+                " updated_at = ? WHERE id = ?",
+                (status, error, available_at, now, job_id),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_queue: Optional[IngestionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = IngestionQueue()
+    return _queue
+
+
+def close_ingestion_queue() -> None:
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.close()
+            _queue = None
@@ -0,0 +1,203 @@
+"""
+Ingestion Worker
+----------------
+Claims jobs from the ingestion queue and runs parse → chunk → embed → index,
+writing progress back to the queue as it goes – from a worker thread, at most
+once per INGEST_PROGRESS_INTERVAL. Every INGEST_REQUEUE_INTERVAL it also
+hands jobs of dead workers back to the queue.
+
+Runs either as its own service (`python worker.py`) or as
+INGEST_WORKER_PROCESSES child processes spawned from the API lifespan hook.
+Each worker process handles up to INGEST_JOB_CONCURRENCY jobs at once.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+
+from core.config import (
+    INGEST_JOB_CONCURRENCY, INGEST_MAX_ATTEMPTS, INGEST_POLL_INTERVAL,
+    INGEST_PROGRESS_INTERVAL, INGEST_REQUEUE_INTERVAL,
+)
+from services.clients import close_registry
+from services.document_processor import shutdown_executor, stream_chunks
+from services.ingestion_queue import IngestionQueue, close_ingestion_queue, get_ingestion_queue
+from services.session_registry import close_session_registry
+from services.sparse_index import close_sparse_index
+from services.vectorstore import EmbeddingRetriesExhausted, index_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def _discard(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class _Progress:
+    """
+    A job's latest progress counters. Callbacks only record them; a
+    background task writes them to the queue every INGEST_PROGRESS_INTERVAL,
+    which doubles as the job's heartbeat while a long batch is embedding.
+    """
+
+    def __init__(self, queue: IngestionQueue, job_id: str) -> None:
+        self._queue = queue
+        self._job_id = job_id
+        self._counters: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def set(self, **counters: int) -> None:
+        self._counters.update(counters)
+
+    async def _write(self) -> None:
+        while True:
+            await asyncio.sleep(INGEST_PROGRESS_INTERVAL)
+            try:
+                await asyncio.to_thread(self._queue.update, self._job_id, **self._counters)
+            except Exception:
+                logger.exception("Writing progress of ingestion job %s failed", self._job_id)
+
+    async def __aenter__(self) -> "_Progress":
+        self._task = asyncio.create_task(self._write())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def process_job(queue: IngestionQueue, job: dict) -> None:
+    """
+    Embed each unit (page range, row range …) as soon as the process pool
+    has parsed it, so embedding of one unit overlaps with parsing of the next.
+    """
+    job_id = job["id"]
+    pages = total = added = reused = 0
+
+    async with _Progress(queue, job_id) as progress:
+        async for units, chunks in stream_chunks(job["path"], job["filename"]):
+            pages += units
+            total += len(chunks)
+            progress.set(pages_parsed=pages, chunks_total=total)
+
+            base = added
+            batch_added, batch_reused = await index_chunks(
+                job["session_id"],
+                chunks,
+                on_progress=lambda n: progress.set(chunks_embedded=base + n),
+            )
+            added += batch_added
+            reused += batch_reused
+
+    # index_chunks has moved the session's indexed_at, so answers cached
+    # before this job are no longer served
+    await asyncio.to_thread(
+        queue.complete, job_id, pages_parsed=pages, chunks_total=total,
+        chunks_embedded=added, chunks_added=added, chunks_reused=reused,
+    )
+    await asyncio.to_thread(_discard, job["path"])
+
+
+async def _run_job(queue: IngestionQueue, job: dict) -> None:
+    try:
+        await process_job(queue, job)
+        logger.info("Ingestion job %s done (%s)", job["id"], job["filename"])
+    except EmbeddingRetriesExhausted as exc:
+        # Finished batches are already indexed, the next attempt resumes
+        if job["attempts"] < INGEST_MAX_ATTEMPTS:
+            await asyncio.to_thread(queue.retry, job["id"], str(exc), delay=30 * job["attempts"])
+        else:
+            await _fail(queue, job, str(exc))
+    except HTTPException as exc:
+        await _fail(queue, job, str(exc.detail))
+    except Exception as exc:
+        logger.exception("Ingestion job %s failed", job["id"])
+        await _fail(queue, job, str(exc))
+
+
+async def _fail(queue: IngestionQueue, job: dict, error: str) -> None:
+    await asyncio.to_thread(queue.fail, job["id"], error)
+    await asyncio.to_thread(_discard, job["path"])
+
+
+async def _requeue_stale(queue: IngestionQueue) -> None:
+    """Re-queue jobs of dead workers now and every INGEST_REQUEUE_INTERVAL."""
+    while True:
+        try:
+            requeued = await asyncio.to_thread(queue.requeue_stale)
+            if requeued:
+                logger.info("Re-queued %d stale ingestion job(s)", requeued)
+        except Exception:
+            logger.exception("Re-queueing stale ingestion jobs failed")
+        await asyncio.sleep(INGEST_REQUEUE_INTERVAL)
+
+
+async def run_worker(should_stop: Callable[[], bool]) -> None:
+    """Poll the queue until should_stop() returns True, then drain running jobs."""
+    queue = get_ingestion_queue()
+    requeuer = asyncio.create_task(_requeue_stale(queue))
+
+    slots = asyncio.Semaphore(INGEST_JOB_CONCURRENCY)
+    running: Set[asyncio.Task] = set()
+
+    while not should_stop():
+        await slots.acquire()
+        job = await asyncio.to_thread(queue.claim)
+        if job is None:
+            slots.release()
+            await asyncio.sleep(INGEST_POLL_INTERVAL)
+            continue
+        task = asyncio.create_task(_run_job(queue, job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    requeuer.cancel()
+    await asyncio.gather(requeuer, return_exceptions=True)
+
+
+def run_forever(stop_event=None) -> None:
+    """Blocking worker entry point (standalone service or child process)."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    should_stop = stop_event.is_set if stop_event is not None else (lambda: False)
+    try:
+        asyncio.run(run_worker(should_stop))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_executor()
+        close_ingestion_queue()
+        close_sparse_index()
+        close_session_registry()
+        close_registry()
+
+
+# ── Child processes spawned by the API ─────────────────────────────────────────
+class WorkerPool:
+    def __init__(self, processes: int) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self._stop = ctx.Event()
+        # Not daemonic: workers start their own PDF parser process pool
+        self._procs: List[multiprocessing.Process] = [
+            ctx.Process(target=run_forever, args=(self._stop,), name=f"ingest-{i}")
+            for i in range(processes)
+        ]
+
+    def start(self) -> None:
+        for proc in self._procs:
+            proc.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Ask workers to finish their current jobs, then terminate stragglers."""
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,129 @@
+"""
+Metrics & Timing Spans
+----------------------
+Minimal in-process Prometheus instrumentation, rendered in the text
+exposition format at GET /metrics:
+
+  http_request_duration_seconds{method,route,status}   histogram
+  rag_stage_duration_seconds{stage}                    histogram
+  + gauges from registered collectors (cache hit counts, queue depth …)
+
+span(name) times one stage of a request: the duration lands in the stage
+histogram and in the current request's span list, which the request-context
+middleware logs as one structured line when the request finishes.
+
+Metrics are per process; ingestion worker processes are not included.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values → (bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for values, counts, total, count in sorted(snapshot):
+            for bound, n in zip(self.buckets, counts):
+                le = _labels(self.labels, values, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {n}")
+            le = _labels(self.labels, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body byte.",
+    labels=("method", "route", "status"),
+)
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds", "Latency of individual request stages.",
+    labels=("stage",),
+)
+
+# name → (help, fn returning {label value: number}); the label is "kind"
+_collectors: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+
+
+def register_collector(name: str, help: str, fn: Callable[[], Dict[str, float]]) -> None:
+    """Expose `fn()` as a gauge family `name{kind=...}` at /metrics."""
+    _collectors[name] = (help, fn)
+
+
+def render() -> str:
+    lines = HTTP_DURATION.render() + STAGE_DURATION.render()
+    for name, (help, fn) in sorted(_collectors.items()):
+        try:
+            values = fn()
+        except Exception:
+            continue
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{kind="{_escape(k)}"}} {v}' for k, v in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+# ── Spans ──────────────────────────────────────────────────────────────────────
+# Shared (mutable) span list of the current request; child tasks and
+# to_thread calls inherit the same list through the copied context.
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("spans", default=None)
+
+
+def begin_spans() -> List[Tuple[str, float]]:
+    spans: List[Tuple[str, float]] = []
+    _spans.set(spans)
+    return spans
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, name)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((name, round(elapsed * 1000, 1)))
@@ -0,0 +1,287 @@
+"""
+NumPy Vector Store  (embedded, sharded per session)
+---------------------------------------------------
+In-process exact nearest-neighbour search, selected with VECTOR_BACKEND=numpy.
+Retrieval never leaves the process, and because every query is scoped to one
+session, each session gets its own shard:
+
+  {NUMPY_STORE_DIR}/{sha1(session_id)[:20]}/
+    ├── meta.json      {"dim": int}
+    ├── docs.jsonl     one {"id", "content", "metadata"} line per row
+    └── vectors.f32    row-major float32, L2-normalized, memory-mapped on read
+
+Shards are append-only. Writers append docs.jsonl before vectors.f32 under an
+exclusive flock, so a reader that sees N vector rows always finds N complete
+doc lines – the API process and ingestion workers can share a shard directory.
+A loaded shard whose files were deleted (session GC in another process) or
+replaced is reset on its next refresh. At most NUMPY_MAX_OPEN_SHARDS shards
+stay loaded per process.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from core.config import NUMPY_MAX_OPEN_SHARDS
+
+
+class _Shard:
+    """One session's rows, refreshed from disk whenever the files grow."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, inode: int = 0) -> None:
+        self.dim = 0
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.docs: List[Tuple[str, dict]] = []
+        self._docs_offset = 0
+        self._vectors_size = -1
+        self._inode = inode
+
+    def refresh(self) -> None:
+        vec_path = os.path.join(self.path, "vectors.f32")
+        try:
+            stat = os.stat(vec_path)
+        except FileNotFoundError:
+            with self._lock:
+                if self.ids:
+                    self._reset()
+            return
+        size = stat.st_size
+        with self._lock:
+            if stat.st_ino != self._inode or size < self._vectors_size:
+                # Deleted and written again since it was loaded
+                self._reset(stat.st_ino)
+            if size == self._vectors_size:
+                return
+            if not self.dim:
+                with open(os.path.join(self.path, "meta.json")) as fh:
+                    self.dim = json.load(fh)["dim"]
+            n_rows = size // (4 * self.dim)
+            with open(os.path.join(self.path, "docs.jsonl"), "rb") as fh:
+                fh.seek(self._docs_offset)
+                while len(self.ids) < n_rows:
+                    line = fh.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    self._docs_offset += len(line)
+                    row = json.loads(line)
+                    self.rows[row["id"]] = len(self.ids)
+                    self.ids.append(row["id"])
+                    self.docs.append((row["content"], row["metadata"]))
+            n_rows = min(n_rows, len(self.ids))
+            self.vectors = (
+                np.memmap(vec_path, dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+                if n_rows else np.zeros((0, self.dim), dtype=np.float32)
+            )
+            self._vectors_size = n_rows * 4 * self.dim
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(self, root_dir: str, embedding: Embeddings,
+                 max_open_shards: int = NUMPY_MAX_OPEN_SHARDS) -> None:
+        self.root_dir = root_dir
+        self._embedding = embedding
+        self._max_open_shards = max(1, max_open_shards)
+        self._shards: "OrderedDict[str, _Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # ── Shards ─────────────────────────────────────────────────────────────────
+    def _shard_path(self, session_id: str) -> str:
+        name = hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.root_dir, name)
+
+    def _shard(self, session_id: str) -> _Shard:
+        with self._lock:
+            shard = self._shards.get(session_id)
+            if shard is None:
+                shard = self._shards[session_id] = _Shard(self._shard_path(session_id))
+                while len(self._shards) > self._max_open_shards:
+                    # Searches still holding an evicted shard finish on it
+                    self._shards.popitem(last=False)
+            else:
+                self._shards.move_to_end(session_id)
+        shard.refresh()
+        return shard
+
+    @staticmethod
+    def _session_of(filter: Optional[dict]) -> str:
+        session_id = (filter or {}).get("session_id")
+        if not isinstance(session_id, str):
+            raise ValueError("NumpyVectorStore queries must filter on a single session_id")
+        return session_id
+
+    def _append(self, session_id: str, ids: List[str], texts: List[str],
+                metadatas: List[dict], vectors: np.ndarray) -> None:
+        path = self._shard_path(session_id)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            meta_path = os.path.join(path, "meta.json")
+            if not os.path.exists(meta_path):
+                with open(meta_path, "w") as fh:
+                    json.dump({"dim": int(vectors.shape[1])}, fh)
+            known = self._shard(session_id).rows
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in known]
+            if not keep:
+                return
+            with open(os.path.join(path, "docs.jsonl"), "a") as fh:
+                for i in keep:
+                    fh.write(json.dumps(
+                        {"id": ids[i], "content": texts[i], "metadata": metadatas[i]}
+                    ) + "\n")
+            with open(os.path.join(path, "vectors.f32"), "ab") as fh:
+                fh.write(np.ascontiguousarray(vectors[keep], dtype=np.float32).tobytes())
+
+    # ── VectorStore API ────────────────────────────────────────────────────────
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+        by_session: Dict[str, List[int]] = defaultdict(list)
+        for i, meta in enumerate(metadatas):
+            by_session[self._session_of(meta)].append(i)
+        for session_id, rows in by_session.items():
+            self._append(
+                session_id,
+                [ids[i] for i in rows],
+                [texts[i] for i in rows],
+                [metadatas[i] for i in rows],
+                vectors[rows],
+            )
+        return ids
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[dict] = None,
+    ) -> List[Tuple[Document, float]]:
+        shard = self._shard(self._session_of(filter))
+        if not shard.ids:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = shard.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (
+                Document(id=shard.ids[i], page_content=shard.docs[i][0], metadata=dict(shard.docs[i][1])),
+                float(scores[i]),
+            )
+            for i in top
+        ]
+
+    def similarity_search_by_vectors(
+        self, embeddings: Sequence[Sequence[float]], k: int = 4, filter: Optional[dict] = None,
+    ) -> List[List[Document]]:
+        """Top-k rows for many queries of one session, with one matrix product."""
+        shard = self._shard(self._session_of(filter))
+        if not shard.ids or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = np.asarray(embeddings, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True).clip(min=1e-12)
+        scores = shard.vectors @ queries.T
+        k = min(k, len(shard.ids))
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            results.append([
+                Document(id=shard.ids[i], page_content=shard.docs[i][0], metadata=dict(shard.docs[i][1]))
+                for i in top
+            ])
+        return results
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [d for d, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] → relevance in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def existing_ids(self, session_id: str, ids: Sequence[str]) -> Set[str]:
+        rows = self._shard(session_id).rows
+        return {i for i in ids if i in rows}
+
+    def count(self, session_id: str) -> int:
+        return len(self._shard(session_id).ids)
+
+    def total_count(self) -> int:
+        """Rows across all session shards, from file sizes (no shard is loaded)."""
+        total = 0
+        for name in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, name)
+            try:
+                with open(os.path.join(path, "meta.json")) as fh:
+                    dim = json.load(fh)["dim"]
+                total += os.stat(os.path.join(path, "vectors.f32")).st_size // (4 * dim)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return total
+
+    def delete_session(self, session_id: str) -> int:
+        count = self.count(session_id)
+        with self._lock:
+            self._shards.pop(session_id, None)
+        shutil.rmtree(self._shard_path(session_id), ignore_errors=True)
+        return count
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        root_dir: str = "data/vectors",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(root_dir, embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,127 @@
+"""
+Reranking Retriever
+-------------------
+Second retrieval stage on top of the session retriever:
+
+  1. over-fetch RETRIEVER_FETCH_K candidates
+  2. drop near-duplicates – chunks cut mid-paragraph overlap by up to
+     CHUNK_OVERLAP_TOKENS, and re-uploads repeat the same text
+  3. rerank with maximal marginal relevance (relevance vs. redundancy)
+  4. choose k adaptively: keep chunks scoring within RERANK_SCORE_MARGIN of
+     the best one, between RETRIEVER_MIN_K and RETRIEVER_K
+
+Relevance is cosine similarity between the query and chunk embeddings. Chunk
+vectors come through the embedding cache, so reranking indexed chunks does
+not call the embedding API again.
+"""
+
+import re
+from typing import List, Set
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from core.config import (
+    RETRIEVER_K, RETRIEVER_MIN_K, RERANK_MMR_LAMBDA, RERANK_DEDUP_THRESHOLD,
+    RERANK_SCORE_MARGIN,
+)
+from services.metrics import span
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = 5) -> Set[tuple]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def dedupe(docs: List[Document], threshold: float = RERANK_DEDUP_THRESHOLD) -> List[Document]:
+    """Keep the first of any chunks whose word shingles mostly overlap."""
+    kept: List[Document] = []
+    kept_shingles: List[Set[tuple]] = []
+    for doc in docs:
+        sh = _shingles(doc.page_content)
+        duplicate = any(
+            len(sh & other) / max(1, min(len(sh), len(other))) >= threshold
+            for other in kept_shingles
+        )
+        if not duplicate:
+            kept.append(doc)
+            kept_shingles.append(sh)
+    return kept
+
+
+def _normalize(vectors) -> np.ndarray:
+    arr = np.asarray(vectors, dtype=np.float32)
+    return arr / np.linalg.norm(arr, axis=-1, keepdims=True).clip(min=1e-12)
+
+
+def mmr_select(query_vec, doc_vecs, k_max: int, k_min: int = RETRIEVER_MIN_K,
+               lambda_mult: float = RERANK_MMR_LAMBDA,
+               margin: float = RERANK_SCORE_MARGIN) -> List[int]:
+    """
+    Greedy MMR over candidate indices, stopping early once the remaining
+    candidates fall more than `margin` below the best relevance score.
+    """
+    q = _normalize(query_vec)
+    d = _normalize(doc_vecs)
+    relevance = d @ q
+    similarity = d @ d.T
+    cutoff = float(relevance.max()) - margin
+
+    selected: List[int] = []
+    remaining = list(range(len(d)))
+    while remaining and len(selected) < k_max:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        if len(selected) >= k_min and relevance[best] < cutoff:
+            break
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+class RerankingRetriever(BaseRetriever):
+    base: BaseRetriever
+    embeddings: Embeddings
+    k: int = RETRIEVER_K
+
+    def _select(self, docs: List[Document], query_vec, doc_vecs) -> List[Document]:
+        with span("retrieve.mmr"):
+            picked = mmr_select(query_vec, doc_vecs, self.k)
+        return [docs[i] for i in picked]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = dedupe(self.base.invoke(query, config={"callbacks": run_manager.get_child()}))
+        if len(docs) <= RETRIEVER_MIN_K:
+            return docs
+        with span("retrieve.rerank_embed"):
+            query_vec = self.embeddings.embed_query(query)
+            doc_vecs = self.embeddings.embed_documents([d.page_content for d in docs])
+        return self._select(docs, query_vec, doc_vecs)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = dedupe(
+            await self.base.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        )
+        if len(docs) <= RETRIEVER_MIN_K:
+            return docs
+        with span("retrieve.rerank_embed"):
+            query_vec = await self.embeddings.aembed_query(query)
+            doc_vecs = await self.embeddings.aembed_documents([d.page_content for d in docs])
+        return self._select(docs, query_vec, doc_vecs)
@@ -0,0 +1,90 @@
+"""
+Session Garbage Collector
+-------------------------
+Background task started in the FastAPI lifespan. Every SESSION_GC_INTERVAL
+seconds it evicts sessions not used for SESSION_TTL_SECONDS:
+
+  1. the session is skipped if it was touched since it was found idle
+  2. its vectors are deleted (Chroma `where` delete, per-session collection
+     drop, or numpy shard removal) together with its sparse index entries
+  3. cached answers for the session are dropped
+  4. the session row is removed from the session registry
+
+The row goes last, so a failed delete leaves the session registered and
+the next pass retries it instead of orphaning its vectors.
+
+The embedding cache is content-addressed and shared between sessions, so it
+is left alone.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from core.config import SESSION_GC_INTERVAL, SESSION_TTL_SECONDS
+from services.answer_cache import get_answer_cache
+from services.session_registry import get_session_registry
+from services.vectorstore import delete_session_vectors
+
+logger = logging.getLogger(__name__)
+
+
+async def evict_session(session_id: str, last_access: Optional[float] = None) -> bool:
+    """Delete a session's indexed data. Returns False if it was in use again."""
+    registry = get_session_registry()
+    if last_access is not None:
+        session = await asyncio.to_thread(registry.get, session_id)
+        if session is None or session["last_access"] > last_access:
+            return False
+    await asyncio.to_thread(delete_session_vectors, session_id)
+    get_answer_cache().invalidate_session(session_id)
+    # The vectors are gone, so the row goes even if a query touched it meanwhile
+    await asyncio.to_thread(registry.remove, session_id)
+    return True
+
+
+async def collect_idle_sessions(ttl: float = SESSION_TTL_SECONDS) -> int:
+    """Evict every session idle for longer than `ttl`. Returns the count."""
+    evicted = 0
+    while True:
+        idle = await asyncio.to_thread(get_session_registry().idle, ttl)
+        if not idle:
+            return evicted
+        progressed = False
+        for session in idle:
+            try:
+                if await evict_session(session["session_id"], session["last_access"]):
+                    evicted += 1
+                    progressed = True
+            except Exception:
+                logger.exception("Evicting session %s failed", session["session_id"])
+        if not progressed:
+            return evicted
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(SESSION_GC_INTERVAL)
+        try:
+            evicted = await collect_idle_sessions()
+            if evicted:
+                logger.info("Session GC evicted %d idle session(s)", evicted)
+        except Exception:
+            logger.exception("Session GC pass failed")
+
+
+def start_session_gc() -> None:
+    global _task
+    if _task is None and SESSION_GC_INTERVAL > 0:
+        _task = asyncio.create_task(_run())
+
+
+async def stop_session_gc() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
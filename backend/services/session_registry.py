@@ -0,0 +1,171 @@
+"""
+Session Registry  (SQLite-backed)
+---------------------------------
+Which chat sessions have indexed documents, where their vectors live and
+when they were last used. Drives the idle-session garbage collector and the
+admin collection report.
+
+  sessions
+    ├── session_id, collection
+    ├── chunks                  chunks indexed for the session
+    ├── indexed_at              when chunks were last added; cached answers
+    │                           from before it are not served
+    └── created_at, last_access (unix seconds)
+
+Shared by the API process (queries touch last_access) and the ingestion
+workers (indexing registers sessions and counts chunks). Touches are
+throttled in memory to one write per SESSION_TOUCH_INTERVAL per session.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.config import SESSION_DB_PATH, SESSION_TOUCH_INTERVAL
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    collection  TEXT NOT NULL,
+    chunks      INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL,
+    indexed_at  REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_idle ON sessions (last_access);
+"""
+
+# Columns added after the first release, for existing databases
+_MIGRATIONS = {
+    "indexed_at": "ALTER TABLE sessions ADD COLUMN indexed_at REAL NOT NULL DEFAULT 0",
+}
+
+
+class SessionRegistry:
+    def __init__(self, path: str = SESSION_DB_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+        self._touched: Dict[str, float] = {}
+
+    def record_chunks(self, session_id: str, collection: str, added: int) -> None:
+        """
+        Register a session (if new) and add to its chunk count. Adding chunks
+        moves indexed_at, which retires the session's cached answers in every
+        process.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, collection, chunks, created_at, last_access, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET"
+                " chunks = chunks + excluded.chunks, last_access = excluded.last_access,"
+                " indexed_at = CASE WHEN excluded.chunks > 0 THEN excluded.indexed_at ELSE indexed_at END",
+                (session_id, collection, added, now, now, now),
+            )
+            self._touched[session_id] = now
+
+    def touch_due(self, session_id: str, now: Optional[float] = None) -> bool:
+        """Whether touch() would write, i.e. the in-memory throttle has expired."""
+        now = time.time() if now is None else now
+        return now - self._touched.get(session_id, 0.0) >= SESSION_TOUCH_INTERVAL
+
+    def touch(self, session_id: str) -> None:
+        """Mark a session as used; cheap no-op if touched recently."""
+        now = time.time()
+        if not self.touch_due(session_id, now):
+            return
+        with self._lock:
+            self._touched[session_id] = now
+            self._conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+            )
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def indexed_at(self, session_id: str) -> float:
+        """When chunks were last added to the session (0.0 if unknown)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT indexed_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row["indexed_at"] if row else 0.0
+
+    def idle(self, older_than: float, limit: int = 100) -> List[dict]:
+        """Sessions not accessed for `older_than` seconds, least recent first."""
+        cutoff = time.time() - older_than
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM sessions WHERE last_access < ? ORDER BY last_access LIMIT ?",
+                (cutoff, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def remove(self, session_id: str, last_access: Optional[float] = None) -> bool:
+        """
+        Forget a session. With `last_access`, only if it was not touched since
+        (so a session that came back to life during eviction is kept).
+        """
+        with self._lock:
+            self._touched.pop(session_id, None)
+            if last_access is None:
+                cur = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            else:
+                cur = self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id = ? AND last_access <= ?",
+                    (session_id, last_access),
+                )
+        return cur.rowcount > 0
+
+    def collections(self) -> List[dict]:
+        """Per-collection session and chunk totals."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT collection, COUNT(*) AS sessions, SUM(chunks) AS chunks,"
+                " MIN(last_access) AS oldest_access, MAX(last_access) AS newest_access"
+                " FROM sessions GROUP BY collection ORDER BY collection"
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_registry: Optional[SessionRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_session_registry() -> SessionRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SessionRegistry()
+    return _registry
+
+
+def close_session_registry() -> None:
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
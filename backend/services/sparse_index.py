@@ -0,0 +1,193 @@
+"""
+Sparse Index  (SQLite-backed BM25)
+----------------------------------
+Compact inverted index per session, built incrementally at upload time and
+persisted locally next to the other backend data. Complements the dense
+Chroma search for SKUs, part numbers and policy codes that embeddings
+retrieve poorly.
+
+  sessions(session_id, doc_count, total_length)
+  docs(session_id, chunk_id, length, content, metadata)
+  postings(session_id, term, chunk_id, tf)
+
+chunk_id is the same ID the chunk has in the vector store, so dense and
+sparse results can be fused by identity.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from core.config import SPARSE_INDEX_PATH, BM25_K1, BM25_B
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id   TEXT PRIMARY KEY,
+    doc_count    INTEGER NOT NULL DEFAULT 0,
+    total_length INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS docs (
+    session_id TEXT NOT NULL,
+    chunk_id   TEXT NOT NULL,
+    length     INTEGER NOT NULL,
+    content    TEXT NOT NULL,
+    metadata   TEXT NOT NULL,
+    PRIMARY KEY (session_id, chunk_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    session_id TEXT NOT NULL,
+    term       TEXT NOT NULL,
+    chunk_id   TEXT NOT NULL,
+    tf         INTEGER NOT NULL,
+    PRIMARY KEY (session_id, term, chunk_id)
+) WITHOUT ROWID;
+"""
+
+# Codes like "SKU-4471-B", "A12/34" or "3.5" stay one token; their parts are
+# indexed too so partial codes still match.
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "of", "on", "or", "the", "to", "was",
+    "what", "when", "where", "which", "who", "why", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in _STOPWORDS)
+    return tokens
+
+
+class SparseIndex:
+    def __init__(self, path: str = SPARSE_INDEX_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add(self, session_id: str, chunks: Iterable[Tuple[str, Document]]) -> int:
+        """Index (chunk_id, Document) pairs; chunks already present are skipped."""
+        added = 0
+        with self._lock:
+            cur = self._conn.cursor()
+            self._conn.execute("INSERT OR IGNORE INTO sessions (session_id) VALUES (?)", (session_id,))
+            total_length = 0
+            for chunk_id, doc in chunks:
+                terms = Counter(tokenize(doc.page_content))
+                length = sum(terms.values())
+                cur.execute(
+                    "INSERT OR IGNORE INTO docs (session_id, chunk_id, length, content, metadata)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (session_id, chunk_id, length, doc.page_content, json.dumps(doc.metadata)),
+                )
+                if cur.rowcount == 0:
+                    continue
+                cur.executemany(
+                    "INSERT INTO postings (session_id, term, chunk_id, tf) VALUES (?, ?, ?, ?)",
+                    [(session_id, term, chunk_id, tf) for term, tf in terms.items()],
+                )
+                added += 1
+                total_length += length
+            self._conn.execute(
+                "UPDATE sessions SET doc_count = doc_count + ?, total_length = total_length + ?"
+                " WHERE session_id = ?",
+                (added, total_length, session_id),
+            )
+            self._conn.commit()
+        return added
+
+    def search(self, session_id: str, query: str, k: int) -> List[Tuple[Document, float]]:
+        """Top-k chunks of a session by BM25 score."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        marks = ",".join("?" * len(terms))
+        with self._lock:
+            stats = self._conn.execute(
+                "SELECT doc_count, total_length FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if not stats or not stats[0]:
+                return []
+            n_docs, total_length = stats
+            rows = self._conn.execute(
+                f"SELECT p.term, p.chunk_id, p.tf, d.length FROM postings p"
+                f" JOIN docs d ON d.session_id = p.session_id AND d.chunk_id = p.chunk_id"
+                f" WHERE p.session_id = ? AND p.term IN ({marks})",
+                (session_id, *terms),
+            ).fetchall()
+
+        avgdl = total_length / n_docs
+        df = Counter(term for term, _, _, _ in rows)
+        scores: Counter = Counter()
+        for term, chunk_id, tf, length in rows:
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+            scores[chunk_id] += idf * tf * (BM25_K1 + 1) / norm
+
+        top = scores.most_common(k)
+        if not top:
+            return []
+        ids = [chunk_id for chunk_id, _ in top]
+        with self._lock:
+            docs = self._conn.execute(
+                f"SELECT chunk_id, content, metadata FROM docs"
+                f" WHERE session_id = ? AND chunk_id IN ({','.join('?' * len(ids))})",
+                (session_id, *ids),
+            ).fetchall()
+        by_id = {
+            chunk_id: Document(id=chunk_id, page_content=content, metadata=json.loads(meta))
+            for chunk_id, content, meta in docs
+        }
+        return [(by_id[chunk_id], score) for chunk_id, score in top if chunk_id in by_id]
+
+    def delete_session(self, session_id: str) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM docs WHERE session_id = ?", (session_id,))
+            count = cur.rowcount
+            self._conn.execute("DELETE FROM postings WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_index: Optional[SparseIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_sparse_index() -> SparseIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SparseIndex()
+    return _index
+
+
+def close_sparse_index() -> None:
+    global _index
+    with _index_lock:
+        if _index is not None:
+            _index.close()
+            _index = None
@@ -0,0 +1,44 @@
+"""
+Token Counting
+--------------
+tiktoken-based token counts used for prompt budgeting. Gemini does not ship
+a local tokenizer, so cl100k_base serves as a close, conservative estimate.
+If the encoding cannot be loaded (e.g. no network on first use), counts fall
+back to ~4 characters per token.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from core.config import TOKEN_ENCODING
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        # Imported here: loading tiktoken's native extension slows startup
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> Optional[str]:
+    """First `max_tokens` tokens of text, or None if nothing fits."""
+    if max_tokens <= 0:
+        return None
+    enc = _encoding()
+    if enc is None:
+        return text[: max_tokens * 4] or None
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens]) or None
@@ -1,47 +1,403 @@
-import chromadb
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from core.config import (
-    GOOGLE_API_KEY, CHROMA_API_KEY, CHROMA_TENANT,
-    CHROMA_DATABASE, EMBEDDING_MODEL, COLLECTION_NAME,
+    COLLECTION_NAME, COLLECTION_SHARDING, COLLECTION_BUCKETS, VECTOR_BACKEND,
+    HYBRID_RETRIEVAL, HYBRID_CANDIDATES, RETRIEVER_K, RETRIEVER_MIN_K, RETRIEVER_FETCH_K,
+    RERANK_ENABLED,
+    EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EMBED_RATE_LIMIT,
+    EMBED_MAX_RETRIES, EMBED_BACKOFF_BASE, EMBED_BACKOFF_MAX,
 )
+from services.clients import get_registry
+from services.embedding_cache import content_hash
+from services.hybrid_retriever import HybridRetriever, reciprocal_rank_fusion
+from services.metrics import span
+from services.numpy_store import NumpyVectorStore
+from services.reranker import RerankingRetriever, dedupe, mmr_select
+from services.session_registry import get_session_registry
+from services.sparse_index import get_sparse_index
 
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
 
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
-    return GoogleGenerativeAIEmbeddings(
-        model=EMBEDDING_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-    )
+logger = logging.getLogger(__name__)
 
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_TEXT = re.compile(
+    r"\b(429|50[0234])\b|ResourceExhausted|RESOURCE_EXHAUSTED|quota|UNAVAILABLE|ServiceUnavailable",
+    re.IGNORECASE,
+)
 
-def get_chroma_client() -> chromadb.HttpClient:
-    return chromadb.HttpClient(
-        host="https://api.trychroma.com",
-        headers={
-            "Authorization": f"Bearer {CHROMA_API_KEY}",
-            "x-chroma-token": CHROMA_API_KEY,
-        },
-        tenant=CHROMA_TENANT,
-        database=CHROMA_DATABASE,
-    )
 
+def get_embeddings() -> Embeddings:
+    return get_registry().embeddings
 
-def get_vectorstore() -> Chroma:
-    return Chroma(
-        client=get_chroma_client(),
-        collection_name=COLLECTION_NAME,
-        embedding_function=get_embeddings(),
-    )
+
+def get_chroma_client() -> "ClientAPI":
+    return get_registry().chroma
+
+
+def collection_for(session_id: Optional[str]) -> str:
+    """Collection holding a session's vectors under COLLECTION_SHARDING."""
+    if session_id is None or VECTOR_BACKEND == "numpy" or COLLECTION_SHARDING == "single":
+        return COLLECTION_NAME
+    digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+    if COLLECTION_SHARDING == "session":
+        return f"{COLLECTION_NAME}_s{digest[:20]}"
+    return f"{COLLECTION_NAME}_b{int(digest[:8], 16) % COLLECTION_BUCKETS:03d}"
 
 
-def get_session_retriever(session_id: str, k: int = 3):
+def get_vectorstore(session_id: Optional[str] = None) -> VectorStore:
+    return get_registry().vectorstore(collection_for(session_id))
+
+
+def _touch(session_id: str) -> None:
+    """Mark a session as in use; the SQLite write runs off the event loop."""
+    registry = get_session_registry()
+    if not registry.touch_due(session_id):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        registry.touch(session_id)
+        return
+    loop.run_in_executor(None, registry.touch, session_id).add_done_callback(_touch_done)
+
+
+def _touch_done(future: "asyncio.Future") -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Recording session use failed: %s", future.exception())
+
+
+def get_session_retriever(session_id: str, k: int = RETRIEVER_K):
     """
     Returns a retriever that only searches chunks tagged with the given session_id.
+    With HYBRID_RETRIEVAL on, dense results are fused with the session's
+    BM25 sparse index. With RERANK_ENABLED, RETRIEVER_FETCH_K candidates are
+    fetched and reranked down to at most k. Marks the session as in use.
     """
-    vectorstore = get_vectorstore()
-    return vectorstore.as_retriever(
+    _touch(session_id)
+    vectorstore = get_vectorstore(session_id)
+    fetch_k = max(k, RETRIEVER_FETCH_K) if RERANK_ENABLED else k
+    candidates = max(HYBRID_CANDIDATES, fetch_k)
+    dense = vectorstore.as_retriever(
         search_kwargs={
-            "k": k,
+            "k": candidates if HYBRID_RETRIEVAL else fetch_k,
             "filter": {"session_id": session_id},
         }
-    )
\ No newline at end of file
+    )
+    retriever = dense
+    if HYBRID_RETRIEVAL:
+        retriever = HybridRetriever(
+            dense=dense, session_id=session_id, k=fetch_k, candidates=candidates
+        )
+    if not RERANK_ENABLED:
+        return retriever
+    return RerankingRetriever(base=retriever, embeddings=get_embeddings(), k=k)
+
+
+def _search_by_vectors(
+    vectorstore: VectorStore, vectors: List[List[float]], k: int, filter: dict,
+) -> List[List[Document]]:
+    if isinstance(vectorstore, NumpyVectorStore):
+        return vectorstore.similarity_search_by_vectors(vectors, k, filter)
+    # One Chroma query carries every query vector
+    found = vectorstore._collection.query(
+        query_embeddings=vectors, n_results=k, where=filter, include=["documents", "metadatas"],
+    )
+    return [
+        [
+            Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        for ids, texts, metadatas in zip(found["ids"], found["documents"], found["metadatas"])
+    ]
+
+
+async def retrieve_many(session_id: str, queries: List[str], k: int = RETRIEVER_K) -> List[List[Document]]:
+    """
+    The session retriever's results for many queries at once: one embedding
+    call for all queries, one grouped vector search, the sparse searches in
+    one worker thread and the rerank embeddings in one call. Same pipeline
+    (and same results) as get_session_retriever(session_id, k) per query.
+    """
+    if not queries:
+        return []
+    _touch(session_id)
+    vectorstore = get_vectorstore(session_id)
+    embeddings = get_registry().embeddings
+    fetch_k = max(k, RETRIEVER_FETCH_K) if RERANK_ENABLED else k
+    candidates = max(HYBRID_CANDIDATES, fetch_k)
+    session_filter = {"session_id": session_id}
+
+    with span("retrieve.batch_embed"):
+        query_vecs = await embeddings.aembed_queries(queries)
+    with span("retrieve.batch_dense"):
+        results = await asyncio.to_thread(
+            _search_by_vectors, vectorstore, query_vecs,
+            candidates if HYBRID_RETRIEVAL else fetch_k, session_filter,
+        )
+    if HYBRID_RETRIEVAL:
+        index = get_sparse_index()
+        with span("retrieve.batch_sparse"):
+            sparse = await asyncio.to_thread(
+                lambda: [[d for d, _ in index.search(session_id, q, candidates)] for q in queries]
+            )
+        results = [reciprocal_rank_fusion([d, s], fetch_k) for d, s in zip(results, sparse)]
+    if not RERANK_ENABLED:
+        return results
+
+    results = [dedupe(docs) for docs in results]
+    texts = list(dict.fromkeys(
+        d.page_content for docs in results if len(docs) > RETRIEVER_MIN_K for d in docs
+    ))
+    with span("retrieve.rerank_embed"):
+        vectors = dict(zip(texts, await embeddings.aembed_documents(texts))) if texts else {}
+    with span("retrieve.mmr"):
+        return [
+            docs if len(docs) <= RETRIEVER_MIN_K else [
+                docs[i] for i in mmr_select(query_vec, [vectors[d.page_content] for d in docs], k)
+            ]
+            for query_vec, docs in zip(query_vecs, results)
+        ]
+
+
+def chunk_vector_id(session_id: str, chunk: Document) -> str:
+    """Deterministic vector ID: the same chunk in the same session maps to one ID."""
+    return content_hash(f"{session_id}\0{chunk.metadata['chunk_hash']}")
+
+
+async def _existing_ids(vectorstore: VectorStore, session_id: str, ids: List[str]) -> Set[str]:
+    if isinstance(vectorstore, NumpyVectorStore):
+        return await asyncio.to_thread(vectorstore.existing_ids, session_id, ids)
+    existing: Set[str] = set()
+    for i in range(0, len(ids), 500):
+        found = await asyncio.to_thread(vectorstore.get, ids=ids[i:i + 500], include=[])
+        existing.update(found["ids"])
+    return existing
+
+
+async def index_chunks(
+    session_id: str,
+    chunks: List[Document],
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[int, int]:
+    """
+    Add a session's chunks to the vector store, skipping any already indexed.
+    `on_progress` receives the running count of newly embedded chunks.
+    Returns (chunks_added, chunks_reused).
+    """
+    unique = {}
+    for chunk in chunks:
+        chunk.metadata["session_id"] = session_id
+        unique.setdefault(chunk_vector_id(session_id, chunk), chunk)
+
+    vectorstore = get_vectorstore(session_id)
+    ids = list(unique)
+    with span("vectorstore.existing_ids"):
+        existing = await _existing_ids(vectorstore, session_id, ids)
+
+    new_ids = [i for i in ids if i not in existing]
+    if new_ids:
+        await get_embedding_scheduler().run(
+            vectorstore, [unique[i] for i in new_ids], new_ids, on_progress
+        )
+    if HYBRID_RETRIEVAL:
+        # Keyword index for the same chunks; already-indexed ones are skipped
+        with span("vectorstore.sparse_add"):
+            await asyncio.to_thread(get_sparse_index().add, session_id, list(unique.items()))
+    await asyncio.to_thread(
+        get_session_registry().record_chunks, session_id, collection_for(session_id), len(new_ids)
+    )
+    return len(new_ids), len(chunks) - len(new_ids)
+
+
+def delete_session_vectors(session_id: str) -> None:
+    """Remove every vector (and sparse index entry) of a session."""
+    name = collection_for(session_id)
+    registry = get_registry()
+    if VECTOR_BACKEND == "numpy":
+        registry.vectorstore(name).delete_session(session_id)
+    elif COLLECTION_SHARDING == "session":
+        registry.drop_vectorstore(name)
+        try:
+            registry.chroma.delete_collection(name)
+        except Exception:
+            pass  # already gone
+    else:
+        registry.vectorstore(name)._collection.delete(where={"session_id": session_id})
+    if HYBRID_RETRIEVAL:
+        get_sparse_index().delete_session(session_id)
+
+
+def collection_sizes() -> List[dict]:
+    """Vector counts per collection: Chroma collections or numpy session shards."""
+    registry = get_registry()
+    if VECTOR_BACKEND == "numpy":
+        return [{"name": COLLECTION_NAME, "vectors": registry.vectorstore(COLLECTION_NAME).total_count()}]
+    sizes = []
+    for collection in registry.chroma.list_collections():
+        # chromadb 0.6 lists names, other versions Collection objects
+        name = getattr(collection, "name", collection)
+        if name.startswith(COLLECTION_NAME):
+            sizes.append({"name": name, "vectors": registry.chroma.get_collection(name).count()})
+    return sizes
+
+
+# ── Embedding scheduler ────────────────────────────────────────────────────────
+class EmbeddingRetriesExhausted(Exception):
+    """A batch kept failing with 429/5xx. Batches that finished stay indexed."""
+
+    def __init__(self, done: int, total: int, cause: BaseException) -> None:
+        super().__init__(
+            f"Embedding rate-limited or unavailable after retries "
+            f"({done}/{total} chunks indexed): {cause}"
+        )
+        self.done = done
+        self.total = total
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429 / 5xx from Gemini or Chroma, however the SDK chose to wrap it."""
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return bool(_RETRYABLE_TEXT.search(str(exc)))
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        # A request larger than the bucket would never fit – cap it
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds and indexes documents in fixed-size batches with bounded
+    concurrency, a token-bucket rate limit (in chunks per second) and
+    exponential backoff on 429/5xx.
+
+    Each batch is written to the vector store as soon as it is embedded, and
+    vector IDs are deterministic, so a failed upload that is retried resumes:
+    index_chunks() skips the batches that already landed, and the embedding
+    cache holds every vector computed so far.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        rate_limit: float = EMBED_RATE_LIMIT,
+        max_retries: int = EMBED_MAX_RETRIES,
+        backoff_base: float = EMBED_BACKOFF_BASE,
+        backoff_max: float = EMBED_BACKOFF_MAX,
+    ) -> None:
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate_limit, capacity=max(rate_limit, batch_size))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    async def _add_batch(self, vectorstore: VectorStore, docs: List[Document], ids: List[str]) -> None:
+        attempt = 0
+        while True:
+            with span("vectorstore.rate_limit_wait"):
+                await self.bucket.acquire(len(docs))
+            try:
+                with span("vectorstore.embed_batch"):
+                    await vectorstore.aadd_documents(documents=docs, ids=ids)
+                return
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)  # jitter
+                logger.warning(
+                    "Embedding batch of %d failed (%s); retry %d in %.1fs",
+                    len(docs), exc, attempt + 1, delay,
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def run(
+        self,
+        vectorstore: VectorStore,
+        docs: Sequence[Document],
+        ids: Sequence[str],
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Index `docs` under `ids`. Returns the number of chunks indexed."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def worker(start: int) -> None:
+            nonlocal done
+            batch_docs = list(docs[start:start + self.batch_size])
+            batch_ids  = list(ids[start:start + self.batch_size])
+            async with semaphore:
+                await self._add_batch(vectorstore, batch_docs, batch_ids)
+            done += len(batch_docs)
+            if on_progress:
+                on_progress(done)
+
+        results = await asyncio.gather(
+            *(worker(i) for i in range(0, len(docs), self.batch_size)),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            if is_retryable(errors[0]):
+                raise EmbeddingRetriesExhausted(done, len(docs), errors[0]) from errors[0]
+            raise errors[0]
+        return done
+
+
+_scheduler: Optional[EmbeddingScheduler] = None
+
+
+def get_embedding_scheduler() -> EmbeddingScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = EmbeddingScheduler()
+    return _scheduler
@@ -0,0 +1,202 @@
+"""
+Startup Warm-up & Readiness
+---------------------------
+The app starts serving (and /health answers) as soon as its own modules are
+imported. The slow part of startup – importing the SDKs, building the
+clients, opening the local stores – runs here afterwards, in the
+background, with every dependency checked concurrently:
+
+  firebase    app initialised, auth module loaded, one Firestore point read
+  vectorstore Chroma client built (+ heartbeat for chroma_cloud); nothing
+              remote for VECTOR_BACKEND=numpy
+  embeddings  Gemini embeddings client + persistent embedding cache
+  llm         Gemini chat client
+  tokenizer   tiktoken encoding loaded (falls back to ~4 chars / token)
+  local       sparse index, ingestion queue and session registry opened
+
+Each check runs at most WARMUP_TIMEOUT seconds; failed ones are retried
+every WARMUP_RETRY_INTERVAL seconds until they pass. readiness() is what
+GET /ready reports: ready only when every check has passed, so a load
+balancer can hold traffic until then. Requests that arrive earlier still
+work – they build whatever they need on first use, just slower.
+
+Remote pings can be turned off with WARMUP_PING=false.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import VECTOR_BACKEND, WARMUP_PING, WARMUP_RETRY_INTERVAL, WARMUP_TIMEOUT
+from services.metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+PENDING, OK, FAILED = "pending", "ok", "failed"
+
+
+# ── Checks ─────────────────────────────────────────────────────────────────────
+# Blocking work runs in a thread; only the Firestore read needs the loop
+def _firebase_sync() -> None:
+    from services.clients import init_firebase
+
+    init_firebase()
+    # Loaded here rather than on the first token check
+    from firebase_admin import auth  # noqa: F401
+
+
+async def _firebase() -> None:
+    await asyncio.to_thread(_firebase_sync)
+    if WARMUP_PING:
+        from services.chat_history import ping
+
+        await ping()
+
+
+def _vectorstore() -> None:
+    if VECTOR_BACKEND == "numpy":
+        return
+    from services.clients import get_registry
+
+    client = get_registry().chroma
+    # Imported by the first vectorstore() call otherwise
+    import langchain_chroma  # noqa: F401
+
+    if WARMUP_PING and VECTOR_BACKEND == "chroma_cloud":
+        client.heartbeat()
+
+
+def _embeddings() -> None:
+    from services.clients import get_registry
+
+    get_registry().embeddings
+
+
+def _llm() -> None:
+    from services.clients import get_registry
+
+    get_registry().llm
+
+
+def _tokenizer() -> Optional[str]:
+    from services.tokens import _encoding
+
+    if _encoding() is None:
+        return "encoding unavailable, estimating ~4 characters per token"
+    return None
+
+
+def _local() -> None:
+    from services.ingestion_queue import get_ingestion_queue
+    from services.session_registry import get_session_registry
+    from services.sparse_index import get_sparse_index
+
+    get_sparse_index()
+    get_ingestion_queue()
+    get_session_registry()
+
+
+# name → check; sync checks return an optional note for the readiness report
+_CHECKS: Dict[str, Callable[[], object]] = {
+    "firebase":    _firebase,
+    "vectorstore": _vectorstore,
+    "embeddings":  _embeddings,
+    "llm":         _llm,
+    "tokenizer":   _tokenizer,
+    "local":       _local,
+}
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+def _pending() -> Dict[str, dict]:
+    return {name: {"status": PENDING, "seconds": None, "attempts": 0} for name in _CHECKS}
+
+
+_status: Dict[str, dict] = _pending()
+_started_at: Optional[float] = None
+_ready_at: Optional[float] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def _run_check(name: str) -> None:
+    check = _CHECKS[name]
+    entry = _status[name]
+    entry["attempts"] += 1
+    start = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(check):
+            call: Awaitable = check()
+        else:
+            call = asyncio.to_thread(check)
+        note = await asyncio.wait_for(call, WARMUP_TIMEOUT)
+    except Exception as exc:
+        if isinstance(exc, asyncio.TimeoutError):
+            exc = TimeoutError(f"no answer after {WARMUP_TIMEOUT:g}s")
+        entry.update(status=FAILED, error=f"{type(exc).__name__}: {exc}")
+        logger.warning("Warm-up check '%s' failed: %s", name, entry["error"])
+    else:
+        entry.update(status=OK)
+        entry.pop("error", None)
+        if note:
+            entry["note"] = note
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+
+
+async def _run() -> None:
+    global _ready_at
+    names = list(_CHECKS)
+    while names:
+        await asyncio.gather(*(_run_check(name) for name in names))
+        names = [name for name in _CHECKS if _status[name]["status"] != OK]
+        if names:
+            await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+    _ready_at = time.monotonic()
+    logger.info("Warm-up complete in %.2fs", _ready_at - _started_at)
+
+
+def start_warmup() -> None:
+    """Start the background warm-up (lifespan startup); returns immediately."""
+    global _task, _started_at, _ready_at, _status
+    if _task is None:
+        _status = _pending()
+        _started_at, _ready_at = time.monotonic(), None
+        _task = asyncio.create_task(_run(), name="warmup")
+
+
+async def stop_warmup() -> None:
+    """Cancel checks still running (lifespan shutdown)."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def readiness() -> dict:
+    """Per-dependency status for GET /ready."""
+    ready = all(entry["status"] == OK for entry in _status.values())
+    report = {"ready": ready, "dependencies": {name: dict(entry) for name, entry in _status.items()}}
+    if _started_at is not None:
+        end = _ready_at if _ready_at is not None else time.monotonic()
+        report["warmup_seconds"] = round(end - _started_at, 3)
+    return report
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────────
+def _warmup_stats() -> Dict[str, float]:
+    stats: Dict[str, float] = {}
+    for name, entry in _status.items():
+        stats[f"{name}_ready"] = int(entry["status"] == OK)
+        if entry["seconds"] is not None:
+            stats[f"{name}_seconds"] = entry["seconds"]
+    return stats
+
+
+register_collector(
+    "warmup", "Startup warm-up: dependency readiness (1 = ok) and seconds taken by "
+    "the last check.", _warmup_stats,
+)
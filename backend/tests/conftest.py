@@ -0,0 +1,42 @@
+"""
+Shared fixtures: services.chat_history wired to the InMemoryFirestore
+stand-in (benchmarks/standins.py), with spill files in a temp directory and
+no waiting between retries.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.standins import InMemoryFirestore
+from services import chat_history
+
+
+@pytest.fixture
+def firestore(monkeypatch, tmp_path):
+    db = InMemoryFirestore(latency=0.0)
+    monkeypatch.setattr(chat_history, "_db", lambda: db)
+    monkeypatch.setattr(chat_history, "HISTORY_SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setattr(chat_history, "HISTORY_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(chat_history, "_backoff", lambda attempt: 0.01)
+    monkeypatch.setattr(chat_history, "_history_cache", chat_history._HistoryCache())
+    monkeypatch.setattr(chat_history, "_buffer", None)
+    return db
+
+
+def stored(db: InMemoryFirestore, user_uid: str) -> dict:
+    """doc_id → data of a user's messages in the stand-in."""
+    return {
+        path[-1]: data for path, data in db.docs.items()
+        if path[:-1] == ("chat_sessions", user_uid, "messages")
+    }
+
+
+async def drained(timeout: float = 5.0) -> None:
+    """Wait until the write-behind buffer has nothing left to send."""
+    buffer = chat_history._buffer
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while buffer._pending or not buffer._queue.empty():
+        assert loop.time() < deadline, "history buffer did not drain"
+        await asyncio.sleep(0.01)
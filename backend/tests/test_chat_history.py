@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+
+from benchmarks.standins import MAX_DOCUMENT_BYTES
+from services import chat_history
+from tests.conftest import drained, stored
+
+
+def test_messages_flush_in_save_order(firestore):
+    async def run():
+        await chat_history.start_history_writer()
+        ids = [await chat_history.save_message("alice", "user", f"turn {i}") for i in range(300)]
+        await drained()
+        chat_history._history_cache.drop("alice")
+        history = await chat_history.get_history("alice", limit=300)
+        await chat_history.stop_history_writer()
+        return ids, history
+
+    ids, history = asyncio.run(run())
+    assert [m["id"] for m in history] == ids
+    assert [m["content"] for m in history] == [f"turn {i}" for i in range(300)]
+    assert len(stored(firestore, "alice")) == 300
+
+
+def test_unflushed_messages_spill_at_shutdown_and_are_resent(firestore):
+    async def run():
+        await chat_history.start_history_writer()
+        firestore.outage(3600)
+        ids = [await chat_history.save_message("bob", "user", f"turn {i}") for i in range(20)]
+        await chat_history.stop_history_writer()
+        spilled = os.listdir(chat_history.HISTORY_SPILL_DIR)
+        assert stored(firestore, "bob") == {}
+
+        firestore.outage(0)
+        await chat_history.start_history_writer()
+        await drained()
+        await chat_history.stop_history_writer()
+        return ids, spilled
+
+    ids, spilled = asyncio.run(run())
+    assert len(spilled) == 1
+    assert set(stored(firestore, "bob")) == set(ids)
+    assert not [n for n in os.listdir(chat_history.HISTORY_SPILL_DIR) if n.endswith(".jsonl")]
+
+
+def test_rejected_message_is_dead_lettered_without_blocking_others(firestore):
+    async def run():
+        await chat_history.start_history_writer()
+        before = await chat_history.save_message("carol", "user", "before")
+        poison = await chat_history.save_message("carol", "user", "x" * (MAX_DOCUMENT_BYTES + 1))
+        after = await chat_history.save_message("carol", "user", "after")
+        await drained()
+        later = await chat_history.save_message("carol", "user", "later")
+        await drained()
+        await chat_history.stop_history_writer()
+        return before, poison, after, later
+
+    before, poison, after, later = asyncio.run(run())
+    assert set(stored(firestore, "carol")) == {before, after, later}
+    dead_dir = os.path.join(chat_history.HISTORY_SPILL_DIR, chat_history._DEAD_LETTER_DIR)
+    rows = [json.loads(line) for name in os.listdir(dead_dir) for line in open(os.path.join(dead_dir, name))]
+    assert [row["id"] for row in rows] == [poison]
+
+
+def test_clear_drops_messages_of_an_inflight_batch(firestore):
+    async def run():
+        firestore.latency = 0.05
+        await chat_history.start_history_writer()
+        for i in range(10):
+            await chat_history.save_message("dave", "user", f"old {i}")
+        # Let the flusher take the batch and put its commit on the wire
+        while not chat_history._buffer._committing.locked():
+            await asyncio.sleep(0.001)
+        await chat_history.clear_history("dave")
+        new = await chat_history.save_message("dave", "user", "new")
+        await drained()
+        await chat_history.stop_history_writer()
+        chat_history._history_cache.drop("dave")
+        return new, await chat_history.get_history("dave")
+
+    new, history = asyncio.run(run())
+    assert set(stored(firestore, "dave")) == {new}
+    assert [m["id"] for m in history] == [new]
+
+
+def test_clear_drops_messages_of_a_retrying_batch(firestore):
+    async def run():
+        await chat_history.start_history_writer()
+        firestore.outage(0.2)
+        for i in range(10):
+            await chat_history.save_message("erin", "user", f"old {i}")
+        await asyncio.sleep(0.1)  # the batch is failing and being retried
+        await asyncio.sleep(0.15)  # outage over; clear before the next attempt lands
+        await chat_history.clear_history("erin")
+        await drained()
+        await asyncio.sleep(0.05)
+        await chat_history.stop_history_writer()
+
+    asyncio.run(run())
+    assert stored(firestore, "erin") == {}
@@ -0,0 +1,20 @@
+"""
+Retail RAG Chatbot – Ingestion Worker Entry Point
+=================================================
+Processes uploads queued by /api/upload (parse → chunk → embed → index).
+
+Run as its own service next to the API:
+    python worker.py
+
+and set INGEST_WORKER_PROCESSES=0 on the API so it does not spawn its own.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from core.config import validate_config
+from services.ingestion_worker import run_forever
+
+if __name__ == "__main__":
+    validate_config()
+    run_forever()
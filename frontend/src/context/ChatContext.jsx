@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useCallback } from 'react'
-import { sendMessage, fetchHistory, clearHistory, uploadDocument } from '../services/api'
+import { streamMessage, fetchHistory, clearHistory, uploadDocument, uploadDocuments } from '../services/api'
 import { useAuth } from './AuthContext'
 
 const ChatContext = createContext(null)
@@ -43,19 +43,35 @@ export function ChatProvider({ children }) {
     setMessages(prev => [...prev, userMsg])
     setIsTyping(true)
 
-    try {
-      const data = await sendMessage(query, sessionId)
-      const assistantMsg = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: data.answer,
-        sources: data.sources || [],
-        timestamp: new Date().toISOString(),
+    const assistantId = (Date.now() + 1).toString()
+    const updateAssistant = (patch) => setMessages(prev => {
+      const exists = prev.some(m => m.id === assistantId)
+      if (!exists) {
+        return [...prev, {
+          id: assistantId,
+          role: 'assistant',
+          content: '',
+          sources: [],
+          timestamp: new Date().toISOString(),
+          ...patch(null),
+        }]
       }
-      setMessages(prev => [...prev, assistantMsg])
+      return prev.map(m => (m.id === assistantId ? { ...m, ...patch(m) } : m))
+    })
+
+    let streamedSources = []
+    try {
+      const data = await streamMessage(query, sessionId, {
+        onSources: (sources) => { streamedSources = sources },
+        onToken: (text) => {
+          setIsTyping(false)
+          updateAssistant(m => ({ content: (m?.content || '') + text, sources: streamedSources }))
+        },
+      })
+      updateAssistant(() => ({ content: data.answer, sources: data.sources || [] }))
     } catch (err) {
-      setMessages(prev => [...prev, {
-        id: (Date.now() + 1).toString(),
+      setMessages(prev => [...prev.filter(m => m.id !== assistantId), {
+        id: assistantId,
         role: 'assistant',
         content: 'Sorry, something went wrong. Please try again.',
         sources: [],
@@ -80,6 +96,20 @@ export function ChatProvider({ children }) {
     }
   }, [sessionId])
 
+  const uploadMany = useCallback(async (files) => {
+    setUploading(true)
+    setUploadProgress(0)
+    try {
+      const report = await uploadDocuments(files, sessionId, setUploadProgress)
+      const indexed = report.files.filter(f => f.status === 'done')
+      setDocuments(prev => [...prev, ...indexed.map(f => ({ name: f.filename, chunks: f.chunks_added }))])
+      return report
+    } finally {
+      setUploading(false)
+      setUploadProgress(0)
+    }
+  }, [sessionId])
+
   const newChat = useCallback(() => {
     if (messages.length > 0) {
       const firstUserMsg = messages.find(m => m.role === 'user')
@@ -124,6 +154,7 @@ export function ChatProvider({ children }) {
       pastSessions,
       chat,
       upload,
+      uploadMany,
       loadHistory,
       newChat,
       restoreSession,
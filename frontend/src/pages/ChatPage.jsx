@@ -7,9 +7,15 @@ import TypingIndicator from '../components/TypingIndicator'
 import { Send, Menu, Sparkles, FileText, Upload, CheckCircle, AlertCircle } from 'lucide-react'
 import { useDropzone } from 'react-dropzone'
 
+// Keep in sync with the backend extractor registry (services/extractors.py)
+const ACCEPTED_TYPES = [
+  '.pdf', '.txt', '.md', '.html', '.htm', '.docx',
+  '.csv', '.tsv', '.xlsx', '.json', '.jsonl', '.ndjson',
+]
+
 export default function ChatPage() {
   const { user } = useAuth()
-  const { messages, isTyping, chat, documents, loadHistory, upload, uploading, uploadProgress } = useChat()
+  const { messages, isTyping, chat, documents, loadHistory, upload, uploadMany, uploading, uploadProgress } = useChat()
   const [input, setInput]             = useState('')
   const [sidebarOpen, setSidebarOpen] = useState(false)
   const [uploadMsg, setUploadMsg]     = useState(null)
@@ -58,19 +64,36 @@ export default function ChatPage() {
     setTimeout(() => setUploadMsg(null), 4000)
   }
 
+  // Several files or a ZIP archive go through the bulk endpoint as one batch
+  const handleFiles = async (files) => {
+    if (!files.length) return
+    const isZip = files[0].name.toLowerCase().endsWith('.zip')
+    if (files.length === 1 && !isZip) return handleFile(files[0])
+    setUploadMsg(null)
+    try {
+      const report = await uploadMany(files)
+      const done = report.files.filter(f => f.status === 'done').length
+      setUploadMsg({
+        type: report.files_failed ? 'error' : 'success',
+        text: `${done} of ${report.files_total} documents added — ${report.chunks_added} chunks`,
+      })
+    } catch {
+      setUploadMsg({ type: 'error', text: 'Upload failed. Please try again.' })
+    }
+    setTimeout(() => setUploadMsg(null), 4000)
+  }
+
   // Drag-and-drop on the chat area
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
-    onDrop: (acceptedFiles) => handleFile(acceptedFiles[0]),
-    accept: { 'application/pdf': ['.pdf'] },
-    maxFiles: 1,
+    onDrop: (acceptedFiles) => handleFiles(acceptedFiles),
+    accept: { 'application/octet-stream': [...ACCEPTED_TYPES, '.zip'] },
     noClick: true,
     noKeyboard: true,
   })
 
   // Hidden <input type="file"> — triggered by any button anywhere on the page
   const handleFileInputChange = (e) => {
-    const file = e.target.files?.[0]
-    if (file) handleFile(file)
+    handleFiles(Array.from(e.target.files || []))
     e.target.value = ''  // reset so same file can be picked again
   }
 
@@ -83,7 +106,8 @@ export default function ChatPage() {
       <input
         ref={fileInputRef}
         type="file"
-        accept=".pdf,application/pdf"
+        accept={[...ACCEPTED_TYPES, '.zip'].join(',')}
+        multiple
         className="hidden"
         onChange={handleFileInputChange}
       />
@@ -118,7 +142,7 @@ export default function ChatPage() {
             )}
           </div>
 
-          {/* Add PDF button — visible after first upload */}
+          {/* Add document button — visible after first upload */}
           {documents.length > 0 && (
             <div className="flex items-center gap-2 shrink-0">
               {uploadMsg && (
@@ -138,7 +162,7 @@ export default function ChatPage() {
                   }`}
               >
                 <Upload size={12} />
-                {uploading ? `${uploadProgress}%` : 'Add PDF'}
+                {uploading ? `${uploadProgress}%` : 'Add file'}
               </button>
             </div>
           )}
@@ -150,7 +174,7 @@ export default function ChatPage() {
           {/* Drag overlay */}
           {isDragActive && (
             <div className="absolute inset-0 z-10 bg-accent/5 border-2 border-dashed border-accent/40 flex items-center justify-center pointer-events-none">
-              <p className="text-accent text-sm font-medium">Drop PDF here</p>
+              <p className="text-accent text-sm font-medium">Drop document here</p>
             </div>
           )}
 
@@ -165,7 +189,7 @@ export default function ChatPage() {
               </h2>
               <p className="text-white/25 text-sm max-w-sm mb-6">
                 {documents.length === 0
-                  ? 'Upload a retail PDF and start chatting about its contents'
+                  ? 'Upload a retail document and start chatting about its contents'
                   : 'Your documents are indexed and ready. Ask questions about products, reports, or manuals.'
                 }
               </p>
@@ -182,7 +206,7 @@ export default function ChatPage() {
                       }`}
                   >
                     <Upload size={15} />
-                    {uploading ? `Uploading... ${uploadProgress}%` : 'Upload PDF'}
+                    {uploading ? `Uploading... ${uploadProgress}%` : 'Upload document'}
                   </button>
                   {uploading && (
                     <div className="w-48 bg-surface-3 rounded-full h-1">
@@ -197,7 +221,7 @@ export default function ChatPage() {
                       {uploadMsg.text}
                     </p>
                   )}
-                  <p className="text-white/20 text-xs">or drag & drop a PDF anywhere</p>
+                  <p className="text-white/20 text-xs">or drag & drop a file anywhere</p>
                 </div>
               )}
 
@@ -21,6 +21,55 @@ export const sendMessage = async (query, sessionId) => {
   return data
 }
 
+// Streams the answer over Server-Sent Events.
+// onSources(sources) fires once retrieval is done, onToken(text) per LLM chunk.
+// Resolves with the final { answer, sources }.
+export const streamMessage = async (query, sessionId, { onSources, onToken } = {}) => {
+  const headers = { 'Content-Type': 'application/json' }
+  const user = auth.currentUser
+  if (user) headers.Authorization = `Bearer ${await user.getIdToken()}`
+
+  const res = await fetch(`${BASE_URL}/api/chat/stream`, {
+    method: 'POST',
+    headers,
+    body: JSON.stringify({ query, session_id: sessionId }),
+  })
+  if (!res.ok || !res.body) throw new Error(`Chat stream failed (${res.status})`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let result = null
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let sep
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, sep)
+      buffer = buffer.slice(sep + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      const payload = data ? JSON.parse(data) : {}
+
+      if (event === 'sources') onSources?.(payload.sources)
+      else if (event === 'token') onToken?.(payload.text)
+      else if (event === 'done') result = payload
+      else if (event === 'error') throw new Error(payload.detail)
+    }
+  }
+
+  if (!result) throw new Error('Chat stream ended unexpectedly')
+  return result
+}
+
 export const fetchHistory = async () => {
   const { data } = await api.get('/api/chat/history')
   return data.messages
@@ -42,9 +91,51 @@ export const uploadDocument = async (file, sessionId, onProgress) => {
       if (onProgress) onProgress(Math.round((e.loaded * 100) / e.total))
     },
   })
+  return waitForUpload(data.job_id)
+}
+
+export const fetchUploadStatus = async (jobId) => {
+  const { data } = await api.get(`/api/upload/${jobId}`)
+  return data
+}
+
+// Indexing runs in the background – poll the job until it finishes
+export const waitForUpload = async (jobId, intervalMs = 1000) => {
+  while (true) {
+    const status = await fetchUploadStatus(jobId)
+    if (status.status === 'done') return status
+    if (status.status === 'failed') throw new Error(status.error || 'Indexing failed')
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+  }
+}
+
+// Many files and/or ZIP archives in one request, indexed as one batch
+export const uploadDocuments = async (files, sessionId, onProgress) => {
+  const form = new FormData()
+  files.forEach(file => form.append('files', file))
+  form.append('session_id', sessionId)
+  const { data } = await api.post('/api/upload/bulk', form, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+    onUploadProgress: (e) => {
+      if (onProgress) onProgress(Math.round((e.loaded * 100) / e.total))
+    },
+  })
+  return waitForBatch(data.batch_id)
+}
+
+export const fetchBatchStatus = async (batchId) => {
+  const { data } = await api.get(`/api/upload/batch/${batchId}`)
   return data
 }
 
+export const waitForBatch = async (batchId, intervalMs = 1500) => {
+  while (true) {
+    const report = await fetchBatchStatus(batchId)
+    if (['done', 'partial', 'failed'].includes(report.status)) return report
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+  }
+}
+
 // ── Auth ──────────────────────────────────────────────────────────────────────
 
 export const fetchMe = async () => {